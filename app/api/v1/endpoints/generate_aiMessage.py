@@ -1,6 +1,6 @@
 # app/api/v1/endpoints/generate_card.py
 from fastapi import APIRouter, HTTPException
-from app.schemas.invite import InvitationMessageRequest
+from app.schemas.invite import InvitationMessageRequest, InvitationMessageBatchRequest
 from app.services import generator
 
 router = APIRouter(prefix="/api/v1", tags=["generate"])
@@ -17,3 +17,15 @@ def generate_aiMessage(req: InvitationMessageRequest):
     except Exception as e:
         # log / raise
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate-message/batch")
+def generate_aiMessages(req: InvitationMessageBatchRequest):
+    try:
+        data_list = [message.dict() for message in req.messages]
+        invitation_texts = generator.generate_invitation_texts(data_list)
+
+        return {"invitation_Messages": invitation_texts}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,6 +2,7 @@
 from fastapi import APIRouter, HTTPException
 from app.schemas.invite import InvitationRequest, InvitationResponse, ImageInfo
 from app.services import generator
+from app.config import CARD_MODE
 
 router = APIRouter(prefix="/api/v1", tags=["generate"])
 
@@ -9,6 +10,12 @@ router = APIRouter(prefix="/api/v1", tags=["generate"])
 def generate_card(req: InvitationRequest):
     try:
         data = req.dict()
+        if CARD_MODE == "overlay":
+            # Artwork and text are generated concurrently; the text is set on the card locally.
+            invitation_text, images = generator.generate_overlay_card(data)
+            images_out = [ImageInfo(url=i["url"], public_id=i.get("public_id")) for i in images]
+            return InvitationResponse(invitation_text=invitation_text, images=images_out)
+
         # 1) generate text (optional)
         invitation_text = generator.generate_invitation_text(data)
         if invitation_text:
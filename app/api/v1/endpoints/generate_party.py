@@ -1,22 +1,66 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Query
+from fastapi.responses import StreamingResponse
 import asyncio
+from typing import Optional
 
-from app.schemas.schema import PartyInput, PartyDetails, PartyData
+from app.config import PARTY_DEADLINE_SECONDS, PARTY_DEADLINE_MAX_SECONDS
+from app.schemas.schema import PartyInput, PartyDetails, PartyData, PartyBatchInput
 from app.services.party.party import PartyPlanGenerator
-from app.utils.helper import filter_data
+from app.services.party.batch import BatchPartyPlanner
+from app.services.prewarm import record_party_demand
+from app.utils import serialization
+from app.utils.deadline import Deadline, DeadlineExceeded
 
 
 router = APIRouter()
 
 @router.post("/party_generate")
-async def create_party_plan(party_input: PartyInput, request: Request):
+async def create_party_plan(
+    party_input: PartyInput,
+    request: Request,
+    deadline: Optional[float] = Query(
+        None, gt=0, le=PARTY_DEADLINE_MAX_SECONDS,
+        description="Time budget in seconds; optional sections are dropped when it runs out",
+    ),
+):
     try:
-        product = request.app.state.product_data  # ✅ fetch product
-        print("product-------------------",product)
+        catalog = request.app.state.catalog  # ✅ shared columnar catalog
         generator = PartyPlanGenerator()
-        result = generator.generate_full_party_json(party_input, product)
+        record_party_demand(party_input)
+        result = await generator.generate_party_json_within(
+            party_input, catalog, Deadline(deadline or PARTY_DEADLINE_SECONDS))
         
         
         return result
+    except DeadlineExceeded as e:
+        # The plan is required; a plan that missed the deadline is a gateway timeout.
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+@router.post("/party_generate/batch")
+async def create_party_plans(
+    batch: PartyBatchInput,
+    request: Request,
+    stream: bool = Query(False, description="Stream NDJSON lines as each plan completes"),
+):
+    """Plan several parties in one request; identical plan/YouTube/gift work runs once."""
+    catalog = request.app.state.catalog
+    if not len(catalog):
+        return {"error": "Product data is empty. Please load products first."}
+    planner = BatchPartyPlanner(catalog)
+
+    if stream:
+        async def lines():
+            try:
+                async for index, result in planner.stream(batch.inputs):
+                    yield serialization.dumps({"index": index, "result": result}) + b"\n"
+            finally:
+                # Client gone (or done): stop plans nobody will read.
+                planner.cancel()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = await planner.run(batch.inputs)
+    return {"results": results, "stats": planner.stats}
@@ -0,0 +1,63 @@
+# app/api/v1/endpoints/products.py
+import hashlib
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query, Request, Response
+
+from app.config import PRODUCT_PAGE_SIZE_MAX
+from app.services.catalog.search import search_index
+
+router = APIRouter(prefix="/api/v1", tags=["products"])
+
+
+def _etag(version: str, request: Request) -> str:
+    # Same catalog version and same query (page included) -> same body.
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return f'"{version}-{hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest()}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.get("/products")
+def list_products(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, max_length=200, description="Words to match in title or category (prefix match)"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    age: Optional[float] = Query(None, ge=0, le=120, description="Only products suitable for this age"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    sort: Literal["popular", "price_asc", "price_desc", "reviews", "title"] = Query("popular"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=PRODUCT_PAGE_SIZE_MAX),
+):
+    """
+    Browse the catalog with filters, sorting and pagination.
+
+    Served from the in-memory catalog and its per-version search indexes; the upstream
+    PRODUCT_API is never called. Responses carry an ETag (catalog version + query), so
+    clients can revalidate with If-None-Match and get 304 while the catalog is unchanged.
+    """
+    catalog = request.app.state.catalog
+    etag = _etag(catalog.version, request)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    matches = search_index(catalog).search(
+        q=q, min_price=min_price, max_price=max_price, age=age, min_rating=min_rating, sort=sort)
+    start = (page - 1) * page_size
+    response.headers["ETag"] = etag
+    return {
+        "items": catalog.records(matches[start:start + page_size]),
+        "total": int(len(matches)),
+        "page": page,
+        "page_size": page_size,
+        "pages": -(-len(matches) // page_size),
+        "catalog_version": catalog.version,
+    }
@@ -1,7 +1,7 @@
 # app/api/v1/endpoints/recommendation.py
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 from app.services.recommendation import RecommendationEngine
 
@@ -13,18 +13,23 @@ class PartyDetailsRequest(BaseModel):
     """Request model for party details."""
     theme: str
     favorite_activities: List[str]
+    person_age: Optional[int] = Field(None, ge=0, le=120, description="Only recommend products suitable for this age")
+    budget: Optional[float] = Field(None, gt=0, description="Only recommend products at or below this price")
 
 
 @router.post("/recommendation")
 async def get_product_recommendations(
     party_details: PartyDetailsRequest,
+    request: Request,
     limit: int = Query(10, ge=1, le=100, description="Number of recommendations to return")
 ):
     """
     Get AI-powered product recommendations based on party details.
     
     Uses Gemini AI to intelligently match products with party theme and activities.
-    If insufficient similar products are found, adds random products as fallback.
+    With person_age/budget the catalog is narrowed by the age-range and price indexes
+    before the model sees it. If insufficient similar products are found, adds popular
+    products from the matching age range and category as fallback.
     
     Args:
         party_details: Party details including theme and favorite_activities
@@ -38,15 +43,19 @@ async def get_product_recommendations(
         - total_products_considered: Total products in catalog
         - recommendations_count: Number of recommendations returned
         - used_ai: Whether AI was used
-        - has_random_fallback: Whether random products were added due to insufficient matches
+        - has_random_fallback: Whether fallback products were added due to insufficient matches
     """
     try:
-        engine = RecommendationEngine()
+        engine = RecommendationEngine(request.app.state.catalog)
         
         party_details_dict = {
             "theme": party_details.theme,
             "favorite_activities": party_details.favorite_activities
         }
+        if party_details.person_age is not None:
+            party_details_dict["person_age"] = party_details.person_age
+        if party_details.budget is not None:
+            party_details_dict["budget"] = party_details.budget
         
         result = engine.recommend_products(
             theme=party_details.theme,
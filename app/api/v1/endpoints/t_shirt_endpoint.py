@@ -1,16 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
 from fastapi.responses import JSONResponse
 from typing import Optional, Union
 import shutil
-import os
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from google.genai.errors import ServerError
 import asyncio
 
-from app.config import TEMP_FOLDER_NAME
 from app.services.t_shirt.shirt import TShirt
-from app.utils.helper import response_data_img, delete_file
-from app.utils.helper import cloudinary_file_upload
+from app.services.prewarm import record_shirt_demand
+from app.utils.helper import save_image_bytes
+from app.services.storage import storage
+from app.services.assets import AssetNamespace, request_namespace
 from app.utils.logger import get_logger
 
 
@@ -19,6 +19,12 @@ logger = get_logger(__name__)
 
 router = APIRouter()
 
+
+def render_mockup(t_shirt: TShirt, design_path: str, premium: bool, namespace: AssetNamespace) -> str:
+    """Render the mockup and encode it once into the namespace (blocking; run in a thread)."""
+    return save_image_bytes(t_shirt.generate_shirt_mockup_image(design_path, premium), namespace, "mockup")
+
+
 @retry(
     wait = wait_exponential(multiplier=1, min=4, max=10),
     stop = stop_after_attempt(3),
@@ -39,7 +45,9 @@ async def t_shirt_generate(
     t_shirt_theme: str = Form(..., description="Theme or style of the t-shirt (e.g., birthday, sports, cartoon)"),
     optional_description: Optional[str] = Form(None, description="Additional description to refine the design (optional)"),
     img_file: Optional[Union[UploadFile,str]] = File(None, description="Optional image file to include in the t-shirt design"),
-    background_task : BackgroundTasks = None
+    premium_mockup: bool = Form(False, description="Render the mockup with the image model instead of the local compositor"),
+    variation: int = Form(0, ge=0, description="Non-zero for a fresh design instead of a cached one (regenerate); used as the model seed"),
+    namespace: AssetNamespace = Depends(request_namespace)
 ):
 
     t_shirt = TShirt(
@@ -50,8 +58,10 @@ async def t_shirt_generate(
         age=age,
         theme=t_shirt_theme,
         color=t_shirt_color,
-        message=optional_description
+        message=optional_description,
+        variation=variation,
     )
+    record_shirt_demand(t_shirt)
 
     allowed_file_types = ["image/jpeg", "image/png", "image/bmp"]
 
@@ -60,29 +70,27 @@ async def t_shirt_generate(
         if img_file.content_type not in allowed_file_types:
             raise HTTPException(status_code=404, detail = "Only Image file are acceptable.")
 
-        os.makedirs(TEMP_FOLDER_NAME, exist_ok = True)
-        temp_file_path = os.path.join(TEMP_FOLDER_NAME, img_file.filename)
+        temp_file_path = namespace.path(img_file.filename)
 
         try:
             with open(temp_file_path, 'wb') as temp_file:
                 shutil.copyfileobj(img_file.file, temp_file)
 
-            print("Generating Image......")
-            response_d = t_shirt.generate_shirt_design(temp_file_path)
-            img_path = response_data_img(response_d)
-            generated_design_url = cloudinary_file_upload(img_path)
-            print("Image Generated")
-
+            logger.info("Generating design...")
+            img_path = save_image_bytes(await t_shirt.generate_shirt_design_bytes_async(temp_file_path), namespace)
+            # Upload the design while the mockup renders.
+            design_upload = storage.put(img_path, "generated_images")
+            logger.info("Design generated")
 
 
-            print("Generating Mockup......")
-            response_m = t_shirt.generate_shirt_mockup(img_path)
-            generated_mockup_url = cloudinary_file_upload(response_data_img(response_m))
-            print("Mockup Generated.")
 
+            logger.info("Generating mockup...")
+            mockup_path = await asyncio.to_thread(render_mockup, t_shirt, img_path, premium_mockup, namespace)
+            design, mockup = await asyncio.gather(design_upload, storage.put(mockup_path, "generated_images"))
+            generated_design_url, generated_mockup_url = design["url"], mockup["url"]
+            logger.info("Mockup generated")
 
 
-            background_task.add_task(delete_file, TEMP_FOLDER_NAME)
 
             return JSONResponse(
                 content={"generated_design_url": generated_design_url, "generated_mockup_url" : generated_mockup_url})
@@ -92,18 +100,19 @@ async def t_shirt_generate(
     else:
         try:
 
-            print("Generating Image......")
-            response_d = t_shirt.generate_shirt_design(None)
-            img_path = response_data_img(response_d)
-            generated_design_url = cloudinary_file_upload(img_path)
-            print("Image Generated")
+            logger.info("Generating design...")
+            img_path = save_image_bytes(await t_shirt.generate_shirt_design_bytes_async(), namespace)
+            # Upload the design while the mockup renders.
+            design_upload = storage.put(img_path, "generated_images")
+            logger.info("Design generated")
 
 
 
-            print("Generating Mockup......")
-            response_m = t_shirt.generate_shirt_mockup(img_path)
-            generated_mockup_url = cloudinary_file_upload(response_data_img(response_m))
-            print("Mockup Generated.")
+            logger.info("Generating mockup...")
+            mockup_path = await asyncio.to_thread(render_mockup, t_shirt, img_path, premium_mockup, namespace)
+            design, mockup = await asyncio.gather(design_upload, storage.put(mockup_path, "generated_images"))
+            generated_design_url, generated_mockup_url = design["url"], mockup["url"]
+            logger.info("Mockup generated")
 
             return JSONResponse(
                 content={"generated_design_url": generated_design_url, "generated_mockup_url" : generated_mockup_url})
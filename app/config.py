@@ -24,10 +24,10 @@ cloudinary.config(
     secure=True
 )
 
-# local directory for generated images
+# local directory for generated images: per-request scratch space plus a size-capped cache
 BASE_DIR = os.getcwd()
-GENERATED_DIR = os.path.join(BASE_DIR, "generated_cards")
-os.makedirs(GENERATED_DIR, exist_ok=True)
+ASSET_STORE_DIR = os.getenv("ASSET_STORE_DIR", os.path.join(BASE_DIR, "generated_assets"))
+ASSET_STORE_MAX_BYTES = int(os.getenv("ASSET_STORE_MAX_BYTES", str(512 * 2**20)))  # cached files per worker
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 ## cloudinary api key
@@ -37,12 +37,136 @@ CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 
 ## Constant
 LOG_DIR = "logs"
-TEMP_FOLDER_NAME = "temp"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records buffered for the writer thread; extra are dropped
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "2000"))  # messages and payloads are truncated to this
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))  # share of debug payloads logged
 MODEL_NAME = "gemini-2.5-flash-image-preview"
 PRODUCT_MODEL = "gemini-2.5-flash"
 TEMPERATURE = 1.0
-GENERATED_IMG_PATH = Path("data")
+# Model router: per task, model tiers (preferred first, faster fallbacks after) and p90 latency objective in seconds.
+# Override with MODEL_ROUTE_<TASK>="model-a,model-b" and MODEL_SLO_<TASK>=seconds.
+_MODEL_ROUTE_DEFAULTS = {
+    "invitation_text": (("gemini-2.5-flash", "gemini-2.5-flash-lite"), 4),
+    "invitation_batch": (("gemini-2.5-flash", "gemini-2.5-flash-lite"), 20),
+    "recommendation": (("gemini-2.5-flash", "gemini-2.5-flash-lite"), 12),
+    "party_plan": ((PRODUCT_MODEL, "gemini-2.5-flash-lite"), 15),
+    "gift_ranking": ((PRODUCT_MODEL, "gemini-2.5-flash-lite"), 12),
+    "card_image": ((MODEL_NAME,), 30),
+    "tshirt_design": ((MODEL_NAME,), 30),
+    "tshirt_mockup": ((MODEL_NAME,), 30),
+}
+MODEL_ROUTES = {
+    task: [m.strip() for m in os.getenv(f"MODEL_ROUTE_{task.upper()}", ",".join(models)).split(",") if m.strip()]
+    for task, (models, _) in _MODEL_ROUTE_DEFAULTS.items()
+}
+MODEL_LATENCY_SLOS = {
+    task: float(os.getenv(f"MODEL_SLO_{task.upper()}", str(slo))) for task, (_, slo) in _MODEL_ROUTE_DEFAULTS.items()
+}
+MODEL_ROUTER_WINDOW = int(os.getenv("MODEL_ROUTER_WINDOW", "50"))  # recent calls per task and model
+MODEL_ROUTER_MIN_SAMPLES = int(os.getenv("MODEL_ROUTER_MIN_SAMPLES", "5"))  # before a model can be demoted
+MODEL_ROUTER_MAX_ERROR_RATE = float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.2"))
+MODEL_ROUTER_PROBE_SECONDS = float(os.getenv("MODEL_ROUTER_PROBE_SECONDS", "60"))  # retry a demoted tier this often
 PRODUCT_API = os.getenv("PRODUCT_API", "https://example.com/api/products")
+# Catalog refresh: "full" rebuilds every time, "hash" diffs item hashes, "cursor" asks upstream for changes only
+CATALOG_SYNC_MODE = os.getenv("CATALOG_SYNC_MODE", "hash")
+CATALOG_DELTA_PARAM = os.getenv("CATALOG_DELTA_PARAM", "updated_since")
+CATALOG_FULL_SYNC_EVERY = int(os.getenv("CATALOG_FULL_SYNC_EVERY", "12"))  # refreshes between full rebuilds
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "snapshots")
+CATALOG_SNAPSHOT_KEEP = int(os.getenv("CATALOG_SNAPSHOT_KEEP", "2"))
+CATALOG_REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "300"))  # leader: upstream sync interval
+CATALOG_FOLLOW_SECONDS = int(os.getenv("CATALOG_FOLLOW_SECONDS", "5"))  # followers: snapshot poll interval
+# Gift matching: products remembered per suggested gift (and budget band/age group) for each catalog version
+GIFT_MATCHES_PER_GIFT = int(os.getenv("GIFT_MATCHES_PER_GIFT", "5"))
+GIFT_MEMO_SIZE = int(os.getenv("GIFT_MEMO_SIZE", "20000"))  # gift names per worker and catalog version
+# /api/v1/products: cached match lists per catalog version, and the largest page
+PRODUCT_SEARCH_CACHE_SIZE = int(os.getenv("PRODUCT_SEARCH_CACHE_SIZE", "256"))
+PRODUCT_PAGE_SIZE_MAX = int(os.getenv("PRODUCT_PAGE_SIZE_MAX", "100"))
+# Context caching of catalog prompt prefixes: "gemini" (server-side cache), "local" (stand-in) or "off"
+PROMPT_CACHE_BACKEND = os.getenv("PROMPT_CACHE_BACKEND", "gemini")
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+# Gift prompts cache one catalog prefix per budget band (upper bounds, in $)
+PROMPT_BUDGET_BANDS = (25, 50, 100, 250, 500, 1000)
+# /party_generate/batch: max stage calls (model, YouTube) in flight per batch
+PARTY_BATCH_CONCURRENCY = int(os.getenv("PARTY_BATCH_CONCURRENCY", "8"))
+# /party_generate time budget: default and max per-call deadline, and the least time an optional stage needs to start
+PARTY_DEADLINE_SECONDS = float(os.getenv("PARTY_DEADLINE_SECONDS", "20"))
+PARTY_DEADLINE_MAX_SECONDS = float(os.getenv("PARTY_DEADLINE_MAX_SECONDS", "120"))
+PARTY_MIN_STAGE_SECONDS = float(os.getenv("PARTY_MIN_STAGE_SECONDS", "2"))
+# Admission control: POST requests in progress per worker, and the priority class of each route.
+# Class settings are (weight, max_backlog, max_wait_seconds): queued work is admitted in proportion
+# to weight, and a class is shed once the backlog (all classes) reaches its max_backlog.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "16"))
+ADMISSION_CLASSES = {
+    "interactive": (8, int(os.getenv("ADMISSION_INTERACTIVE_BACKLOG", "64")), float(os.getenv("ADMISSION_INTERACTIVE_MAX_WAIT", "2"))),
+    "standard": (4, int(os.getenv("ADMISSION_STANDARD_BACKLOG", "32")), float(os.getenv("ADMISSION_STANDARD_MAX_WAIT", "8"))),
+    "heavy": (1, int(os.getenv("ADMISSION_HEAVY_BACKLOG", "8")), float(os.getenv("ADMISSION_HEAVY_MAX_WAIT", "15"))),
+}
+ADMISSION_ROUTES = {
+    "/api/v1/generate-message": "interactive",
+    "/api/v1/recommendation": "interactive",
+    "/party_generate": "standard",
+    "/api/v1/generate-message/batch": "standard",
+    "/party_generate/batch": "heavy",
+    "/t_shirt_generate": "heavy",
+    "/api/v1/generate-card": "heavy",
+}
+# Idempotency-Key support: routes whose results are stored, and for how long (per worker)
+IDEMPOTENCY_ROUTES = ("/t_shirt_generate", "/api/v1/generate-card", "/party_generate")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000"))
+# /api/v1/generate-message/batch: prompt tokens per model call (estimated) and chunks in flight
+INVITATION_BATCH_TOKEN_BUDGET = int(os.getenv("INVITATION_BATCH_TOKEN_BUDGET", "6000"))
+INVITATION_BATCH_MAX_ITEMS = int(os.getenv("INVITATION_BATCH_MAX_ITEMS", "50"))
+INVITATION_BATCH_CONCURRENCY = int(os.getenv("INVITATION_BATCH_CONCURRENCY", "4"))
+# Result caches for plans (theme templates), YouTube searches and t-shirt designs
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", "21600"))
+YOUTUBE_CACHE_TTL_SECONDS = int(os.getenv("YOUTUBE_CACHE_TTL_SECONDS", "86400"))
+DESIGN_CACHE_TTL_SECONDS = int(os.getenv("DESIGN_CACHE_TTL_SECONDS", "86400"))
+DESIGN_CACHE_MAX_MB = int(os.getenv("DESIGN_CACHE_MAX_MB", "64"))  # design image bytes kept per worker
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))  # entries per cache
+# Pre-warming of trending theme/age combinations during idle periods
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+PREWARM_INTERVAL_SECONDS = int(os.getenv("PREWARM_INTERVAL_SECONDS", "120"))
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "5"))
+PREWARM_MIN_REQUESTS = float(os.getenv("PREWARM_MIN_REQUESTS", "3"))  # decayed demand before a combo is warmed
+PREWARM_DEMAND_HALF_LIFE_SECONDS = int(os.getenv("PREWARM_DEMAND_HALF_LIFE_SECONDS", "3600"))
+MODEL_CALLS_PER_MINUTE = int(os.getenv("MODEL_CALLS_PER_MINUTE", "60"))  # per-worker upstream quota
+PREWARM_QUOTA_SHARE = float(os.getenv("PREWARM_QUOTA_SHARE", "0.1"))  # fraction of it pre-warming may use
+# Local background removal for t-shirt designs: "off" or "rembg" (process pool, one ONNX session per process)
+BACKGROUND_REMOVAL = os.getenv("BACKGROUND_REMOVAL", "off")
+REMBG_MODEL = os.getenv("REMBG_MODEL", "u2net")
+BACKGROUND_REMOVAL_WORKERS = int(os.getenv("BACKGROUND_REMOVAL_WORKERS", "2"))
+# T-shirt mockups: "local" (Pillow/NumPy compositor) or "model" (image-model call for every mockup)
+MOCKUP_MODE = os.getenv("MOCKUP_MODE", "local")
+MOCKUP_SIZE = int(os.getenv("MOCKUP_SIZE", "1024"))  # template edge in pixels
+MOCKUP_DISPLACEMENT = float(os.getenv("MOCKUP_DISPLACEMENT", "0.006"))  # max fold warp, fraction of the edge
+# Image encoding per asset type: png[:level], png-quantized[:colors], webp[:quality], webp-lossless[:effort], jpeg[:quality]
+DESIGN_IMAGE_ENCODING = os.getenv("DESIGN_IMAGE_ENCODING", "png")  # print designs: lossless encodings only
+MOCKUP_IMAGE_ENCODING = os.getenv("MOCKUP_IMAGE_ENCODING", "webp:85")
+CARD_IMAGE_ENCODING = os.getenv("CARD_IMAGE_ENCODING", "webp:85")
+# Birthday cards: "overlay" (text-free artwork generated alongside the message, text set locally) or "model" (text in the image prompt)
+CARD_MODE = os.getenv("CARD_MODE", "overlay")
+CARD_FONT_PATH = os.getenv("CARD_FONT_PATH", os.path.join(BASE_DIR, "public", "fonts", "DejaVuSans-Bold.ttf"))  # Latin, Greek, Cyrillic
+# Fonts tried, in order, for text the main font cannot draw (missing files are skipped). The
+# defaults are the Noto fonts the Docker image installs (fonts-noto-core, fonts-noto-cjk).
+CARD_FALLBACK_FONTS = [p.strip() for p in os.getenv("CARD_FALLBACK_FONTS", ",".join([
+    "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSansBengali-Bold.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Bold.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSansArabic-Bold.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+])).split(",") if p.strip()]
+CARD_ICON_FONT = os.getenv("CARD_ICON_FONT", os.path.join(BASE_DIR, "public", "fonts", "fa-solid-900.ttf"))
+CARD_ART_CACHE_SIZE = int(os.getenv("CARD_ART_CACHE_SIZE", "64"))  # artworks (about 1-2 MB each)
+CARD_ART_CACHE_TTL_SECONDS = int(os.getenv("CARD_ART_CACHE_TTL_SECONDS", "86400"))
+# Asset storage: "cloudinary" or "local" (files under STORAGE_LOCAL_DIR, served at STORAGE_PUBLIC_URL)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary")
+STORAGE_CONCURRENCY = int(os.getenv("STORAGE_CONCURRENCY", "8"))  # upload threads and pooled connections
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(20 * 2**20)))  # larger files use chunked uploads
+STORAGE_LOCAL_DIR = os.getenv("STORAGE_LOCAL_DIR", "storage")
+STORAGE_PUBLIC_URL = os.getenv("STORAGE_PUBLIC_URL", "/assets")  # path mounted by the app, or an external base URL
 
 # Prompt
 IMAGE_ANALYSIS_PROMPT = """
@@ -133,68 +257,55 @@ PARTY_PLANNER_PROMPT = """
         Guests: {num_guests}, Date: {party_date}, Location: {location},
         Theme: {theme}, Favorite Activities: {favorite_activities}
     
-        Return JSON with emojis like below, and include these gift suggestions in "🎁 Suggested Gifts":
+        Return JSON with these fields, using emojis in the items:
     
         {{
-        "🎨 Theme & Decorations": ["bullet point instructions"],
-        "🎉 Fun Activities": ["list of activities"],
-        "🍔 Food & Treats": ["list of food items"],
-        "🛍️ Party Supplies": ["list of supplies"],
-        "⏰ Party Timeline": ["timeline steps with emojis"],
-        "🎁 Suggested Gifts": ["list of gift names only"],
-        "🌟 New Adventure Ideas": ["list of adventure/fun ideas"],
+        "theme_decorations": ["bullet point instructions"],
+        "fun_activities": ["list of activities"],
+        "food_treats": ["list of food items"],
+        "party_supplies": ["list of supplies"],
+        "party_timeline": ["timeline steps with emojis"],
+        "suggested_gifts": ["list of gift names only"],
+        "new_adventure_ideas": ["list of adventure/fun ideas"]
         }}
     """
 
-PRODUCT_PROMPT = """
-You are an assistant that selects products from a given product JSON based on a suggested gifts list.
+# Gift ranking prompt is split so the catalog part can be context-cached per catalog version.
+PRODUCT_PROMPT_PREFIX = """
+You are an assistant that matches suggested gift ideas to products from a given product JSON.
 
 ### Instructions:
 1. Carefully read the provided `product_json`.
-2. Read the `suggested_gifts` list.
-3. Compare each product against the `suggested_gifts` and **rank them by relevance/similarity**.
-   - Consider title, price, average rating, total reviews, or any other relevant attributes.
-4. Return ONLY the top {top_n} most relevant products with their `id`, `title`, `link`, `price`, `avg_rating`, `total_review`, `image_url`, and `affiliated_company`.
-5. If fewer than {top_n} products match, return only the available ones.
-6. Output must be in **valid JSON format** with this structure:
-{{
-  "products": [
-    {{
-      "id": "id1",
-      "title": "title1",
-      "link": "link1",
-      "price": 0.0,
-      "avg_rating": 0,
-      "total_review": 0,
-      "image_url": "image_url1",
-      "affiliated_company": "company1"
-    }},
-    {{
-      "id": "id2",
-      "title": "title2",
-      "link": "link2",
-      "price": 0.0,
-      "avg_rating": 0,
-      "total_review": 0,
-      "image_url": "image_url2",
-      "affiliated_company": "company2"
-    }}
-    ... up to {top_n}
+2. Read the numbered `suggested_gifts` list given after the catalog.
+3. Only consider products priced at or below the `budget` given after the catalog.
+4. For **each** suggested gift, find the products that best fit it and **rank them by relevance/similarity**.
+   - Consider title, price, average rating, or any other relevant attributes.
+5. Return up to `per_gift` product ids per gift, best match first. Use only ids from `product_json`.
+6. If no product fits a gift, return an empty list for it.
+7. Output must be in **valid JSON format** with this structure:
+{
+  "matches": [
+    {"index": 0, "product_ids": ["id1", "id2"]},
+    {"index": 1, "product_ids": []}
   ]
-}}
+}
+with one entry per suggested gift, where `index` is the gift's number in the list.
 
 ⚠️ Rules:
 - Do not return any extra explanation or text.
-- If no product matches, return:
-{{
-  "products": []
-}}
 
 ---
 
 ### product_json:
-{product_json}
+"""
 
+PRODUCT_PROMPT_SUFFIX = """
 ### suggested_gifts:
 {suggested_gifts}
+
+### budget:
+{budget}
+
+### per_gift:
+{per_gift}
 """
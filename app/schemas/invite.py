@@ -1,6 +1,6 @@
 # app/schemas/invite.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 class InvitationMessageRequest(BaseModel):
     theme: Optional[str] = Field(None, example="Football lover")
     description: Optional[str] = Field(None, example="Playing a boy football with cake.")
@@ -14,6 +14,16 @@ class InvitationMessageRequest(BaseModel):
     contact_info: Optional[str] = Field(None, example="01610982021")
 
 
+class InvitationMessageBatchRequest(BaseModel):
+    messages: List[InvitationMessageRequest] = Field(..., min_length=1, max_length=500)
+
+
+class InvitationBatchItem(BaseModel):
+    """One entry of the structured output of a batched invitation-message call."""
+    index: int
+    message: str
+
+
 class InvitationRequest(BaseModel):
     theme: Optional[str] = Field(None, example="Football lover")
     description: Optional[str] = Field(None, example="Playing a boy football with cake.")
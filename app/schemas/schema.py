@@ -27,3 +27,7 @@ class PartyInput(BaseModel):
 class PartyData(PartyInput):
     num_product : Optional[int]
 
+
+class PartyBatchInput(BaseModel):
+    inputs: List[PartyInput] = Field(..., min_length=1, max_length=100)
+
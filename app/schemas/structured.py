@@ -0,0 +1,73 @@
+# app/schemas/structured.py
+# Response schemas for JSON-producing model calls (passed as ``response_schema``).
+from pydantic import BaseModel, field_validator
+from typing import ClassVar, Dict, List, Optional
+
+
+class PartyPlanOutput(BaseModel):
+    theme_decorations: List[str]
+    fun_activities: List[str]
+    food_treats: List[str]
+    party_supplies: List[str]
+    party_timeline: List[str]
+    suggested_gifts: List[str]
+    new_adventure_ideas: List[str]
+
+    # Emoji section titles the frontend renders.
+    SECTIONS: ClassVar[Dict[str, str]] = {
+        "theme_decorations": "🎨 Theme & Decorations",
+        "fun_activities": "🎉 Fun Activities",
+        "food_treats": "🍔 Food & Treats",
+        "party_supplies": "🛍️ Party Supplies",
+        "party_timeline": "⏰ Party Timeline",
+        "suggested_gifts": "🎁 Suggested Gifts",
+        "new_adventure_ideas": "🌟 New Adventure Ideas",
+    }
+
+    @classmethod
+    def from_sections(cls, data: Dict) -> "PartyPlanOutput":
+        """Accept either field names or the emoji titles (older prompts, repaired output)."""
+        fields = {title: field for field, title in cls.SECTIONS.items()}
+        fields.update({field: field for field in cls.SECTIONS})
+        sections = {field: [] for field in cls.SECTIONS}
+        sections.update({fields[key]: value for key, value in data.items() if key in fields})
+        return cls(**sections)
+
+    def to_sections(self) -> Dict[str, List[str]]:
+        return {title: getattr(self, field) for field, title in self.SECTIONS.items()}
+
+
+class GiftProduct(BaseModel):
+    id: str
+    title: str
+    link: Optional[str] = None
+    price: Optional[float] = None
+    avg_rating: Optional[float] = None
+    total_review: Optional[int] = None
+    image_url: Optional[str] = None
+    affiliated_company: Optional[str] = None
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def _id_as_str(cls, value):
+        # Catalog ids can be numeric upstream; the prompt shows them as JSON numbers.
+        return str(value) if isinstance(value, int) else value
+
+
+class GiftRankingOutput(BaseModel):
+    products: List[GiftProduct]
+
+
+class GiftMatch(BaseModel):
+    index: int
+    product_ids: List[str]
+
+    @field_validator("product_ids", mode="before")
+    @classmethod
+    def _ids_as_str(cls, value):
+        return [str(v) if isinstance(v, int) else v for v in value] if isinstance(value, list) else value
+
+
+class GiftMatchOutput(BaseModel):
+    """Products matching each suggested gift (by its index in the prompt list), best first."""
+    matches: List[GiftMatch]
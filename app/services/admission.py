@@ -0,0 +1,135 @@
+# app/services/admission.py
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from app.config import ADMISSION_CAPACITY, ADMISSION_CLASSES, ADMISSION_ROUTES
+from app.utils.metrics import metrics
+
+
+class Overloaded(Exception):
+    """Request shed by admission control; retry after ``retry_after`` seconds."""
+
+    def __init__(self, priority: str, reason: str, retry_after: int):
+        super().__init__(f"{priority} request shed ({reason})")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class PriorityClass:
+    """Requests of one kind: scheduling weight, shedding threshold and queue-time limit.
+
+    ``max_backlog`` is compared against the backlog of *all* classes, so classes with a
+    small value are shed first as the system saturates.
+    """
+
+    def __init__(self, name: str, weight: float, max_backlog: int, max_wait: float):
+        self.name = name
+        self.weight = weight
+        self.max_backlog = max_backlog
+        self.max_wait = max_wait
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.vtime = 0.0
+        self.service_seconds = 1.0  # moving average, for Retry-After estimates
+
+
+class AdmissionController:
+    """Per-worker limit on requests in progress, with weighted fair queuing.
+
+    When all ``capacity`` slots are busy, requests wait in their class queue. Freed
+    slots go to the class with the lowest virtual time, which advances by
+    ``1 / weight`` per admission. Busy classes therefore share slots in proportion to
+    their weights, and no class starves. Requests queued longer than ``max_wait``, or
+    arriving when the backlog is already at ``max_backlog``, get ``Overloaded``.
+    Runs on the worker's event loop, so it needs no locks.
+    """
+
+    def __init__(self, capacity: int = ADMISSION_CAPACITY, classes: Optional[Dict[str, tuple]] = None,
+                 routes: Optional[Dict[str, str]] = None):
+        self.capacity = max(1, capacity)
+        self.classes = {
+            name: PriorityClass(name, *settings) for name, settings in (classes or ADMISSION_CLASSES).items()
+        }
+        self.routes = routes if routes is not None else ADMISSION_ROUTES
+        self.active = 0
+        self.vtime = 0.0
+
+    def classify(self, method: str, path: str) -> Optional[PriorityClass]:
+        """Priority class for a request; None bypasses admission control (reads, docs, assets)."""
+        if method != "POST":
+            return None
+        name = self.routes.get(path.rstrip("/") or "/")
+        return self.classes.get(name) if name else None
+
+    def backlog(self) -> int:
+        return sum(len(c.waiters) for c in self.classes.values())
+
+    def retry_after(self, priority: PriorityClass) -> int:
+        """Seconds until the current backlog should have drained."""
+        seconds = (self.backlog() + 1) * priority.service_seconds / self.capacity
+        return max(1, min(60, math.ceil(seconds)))
+
+    def _shed(self, priority: PriorityClass, reason: str) -> Overloaded:
+        metrics.incr(f"admission.{priority.name}.{reason}")
+        return Overloaded(priority.name, reason, self.retry_after(priority))
+
+    async def _acquire(self, priority: PriorityClass) -> None:
+        if self.active < self.capacity and not self.backlog():
+            self.active += 1
+            return
+        if self.backlog() >= priority.max_backlog:
+            raise self._shed(priority, "shed")
+
+        waiter = asyncio.get_running_loop().create_future()
+        if not priority.waiters:
+            # An idle class rejoins at the current virtual time instead of cashing in idle credit.
+            priority.vtime = max(priority.vtime, self.vtime)
+        priority.waiters.append(waiter)
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), priority.max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                priority.waiters.remove(waiter)
+                waiter.cancel()
+                raise self._shed(priority, "timeouts")
+        except asyncio.CancelledError:
+            # Client went away: give back a slot granted in the meantime.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            elif waiter in priority.waiters:
+                priority.waiters.remove(waiter)
+            raise
+        metrics.incr(f"admission.{priority.name}.queue_seconds", time.monotonic() - queued_at)
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self.active < self.capacity:
+            waiting = [c for c in self.classes.values() if c.waiters]
+            if not waiting:
+                return
+            priority = min(waiting, key=lambda c: c.vtime)
+            waiter = priority.waiters.popleft()
+            self.vtime = priority.vtime
+            priority.vtime += 1 / priority.weight
+            self.active += 1
+            waiter.set_result(True)
+
+    @asynccontextmanager
+    async def admit(self, priority: PriorityClass):
+        """Hold a slot for the block; raises ``Overloaded`` when the request is shed."""
+        await self._acquire(priority)
+        metrics.incr(f"admission.{priority.name}.admitted")
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            priority.service_seconds = 0.8 * priority.service_seconds + 0.2 * (time.monotonic() - started)
+            self._release()
+
+
+admission = AdmissionController()
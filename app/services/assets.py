@@ -0,0 +1,181 @@
+# app/services/assets.py
+import os
+import uuid
+import shutil
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+from app.config import ASSET_STORE_DIR, ASSET_STORE_MAX_BYTES
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _start_token(pid: int) -> str:
+    """When ``pid`` started (clock ticks since boot, from ``/proc``); "0" where unavailable.
+
+    PIDs repeat across container restarts, so a namespace records its owner's start
+    time too and a new process that happens to reuse the PID does not adopt it.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return "0"
+    return stat.rsplit(")", 1)[1].split()[19]  # field 22: starttime
+
+
+def _owner_alive(name: str) -> bool:
+    pid, _, rest = name.partition("-")
+    token = rest.partition("-")[0]
+    return pid.isdigit() and _pid_alive(int(pid)) and token == _start_token(int(pid))
+
+
+class AssetNamespace:
+    """Private scratch directory for one request; removed with everything in it on release."""
+
+    def __init__(self, store: "AssetStore", path: Path):
+        self.store = store
+        self.dir = path
+
+    def path(self, name: Optional[str]) -> str:
+        # Client-supplied names may carry directories; only the base name is used.
+        return str(self.dir / (os.path.basename(name or "") or "upload"))
+
+    def write(self, name: str, data: bytes) -> str:
+        path = self.path(name)
+        partial = f"{path}.part"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+        return path
+
+    def keep(self, path: str, folder: str) -> str:
+        """Move a file out of the namespace into the store's size-capped cache."""
+        return self.store.adopt(path, folder)
+
+    def release(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self) -> "AssetNamespace":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class AssetStore:
+    """Local files for generated assets, bounded in bytes.
+
+    Request scratch files live in per-request namespaces under ``requests/`` and are
+    removed when the request ends. Files worth keeping (e.g. birthday cards) move into
+    ``cache/``, which is capped at ``ASSET_STORE_MAX_BYTES`` with least-recently-used
+    files evicted first (``lookup`` counts as a use). Namespaces are named after the
+    owning process and its start time, so startup cleanup removes what crashed workers
+    left behind without touching live ones, even when a restarted container reuses
+    their PIDs. The cap is enforced per worker over the files it knows about.
+    """
+
+    def __init__(self, root: str = ASSET_STORE_DIR, max_bytes: int = ASSET_STORE_MAX_BYTES):
+        self.root = Path(root)
+        self.requests_dir = self.root / "requests"
+        self.cache_dir = self.root / "cache"
+        self.max_bytes = max_bytes
+        self._files: "OrderedDict[str, int]" = OrderedDict()  # cache path -> size, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.cleanup()
+
+    def cleanup(self) -> None:
+        """Drop namespaces of dead processes and partial writes; re-index the cache."""
+        self.requests_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for entry in self.requests_dir.iterdir():
+            if not _owner_alive(entry.name):
+                shutil.rmtree(entry, ignore_errors=True) if entry.is_dir() else entry.unlink(missing_ok=True)
+        files = []
+        for path in self.cache_dir.rglob("*"):
+            if not path.is_file():
+                continue
+            if path.name.endswith(".part"):
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, str(path), stat.st_size))
+        with self._lock:
+            self._files.clear()
+            self._bytes = 0
+            for _, path, size in sorted(files):
+                self._files[path] = size
+                self._bytes += size
+            self._evict()
+
+    def namespace(self) -> AssetNamespace:
+        pid = os.getpid()
+        path = self.requests_dir / f"{pid}-{_start_token(pid)}-{uuid.uuid4().hex}"
+        path.mkdir(parents=True)
+        return AssetNamespace(self, path)
+
+    def adopt(self, path: str, folder: str) -> str:
+        directory = self.cache_dir / folder
+        directory.mkdir(parents=True, exist_ok=True)
+        target = str(directory / os.path.basename(path))
+        os.replace(path, target)
+        size = os.path.getsize(target)
+        with self._lock:
+            self._bytes += size - self._files.pop(target, 0)
+            self._files[target] = size
+            self._evict()
+        return target
+
+    def lookup(self, folder: str, name: str) -> Optional[str]:
+        """Path of a cached file, marked as most recently used; None if not cached."""
+        target = str(self.cache_dir / folder / os.path.basename(name))
+        with self._lock:
+            if target not in self._files:
+                return None
+            self._files.move_to_end(target)
+        try:
+            os.utime(target)  # the startup re-index orders by mtime
+        except FileNotFoundError:
+            with self._lock:
+                self._bytes -= self._files.pop(target, 0)
+            return None
+        return target
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._files:
+            path, size = self._files.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            metrics.incr("assets.evicted_files")
+            metrics.incr("assets.evicted_bytes", size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._files), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+assets = AssetStore()
+
+
+def request_namespace() -> Iterator[AssetNamespace]:
+    """FastAPI dependency: a namespace removed after the response, even on errors."""
+    with assets.namespace() as namespace:
+        yield namespace
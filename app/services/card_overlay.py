@@ -0,0 +1,230 @@
+# app/services/card_overlay.py
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import CARD_FONT_PATH, CARD_FALLBACK_FONTS, CARD_ICON_FONT
+
+# Font Awesome (solid) code points used as language-neutral labels.
+ICONS = {
+    "age": "\uf1fd",  # birthday-cake
+    "date": "\uf073",  # calendar-alt
+    "time": "\uf017",  # clock
+    "venue": "\uf3c5",  # map-marker-alt
+    "contact_info": "\uf095",  # phone
+}
+
+# Text areas in unit coordinates (x0, y0, x1, y1); the artwork prompt keeps them calm.
+TITLE_BOX = (0.1, 0.05, 0.9, 0.25)
+MESSAGE_BOX = (0.12, 0.38, 0.88, 0.62)
+DETAILS_BOX = (0.12, 0.72, 0.88, 0.94)
+
+PANEL_FILL = (0, 0, 0, 110)
+TEXT_FILL = (255, 255, 255, 255)
+STROKE_FILL = (0, 0, 0, 160)
+
+# Pictographs the text font cannot draw (they would render as empty boxes).
+EMOJI = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\uFE0F\u200D]+")
+
+
+def age_group(age: Optional[int]) -> str:
+    if age is None:
+        return "any"
+    if age < 13:
+        return "kids"
+    if age < 20:
+        return "teens"
+    if age < 60:
+        return "adults"
+    return "seniors"
+
+
+def art_key(data: Dict) -> Tuple:
+    """Cache key for card artwork: theme and style only, no personal details."""
+    return (" ".join(str(data.get("theme") or "modern").lower().split()),
+            " ".join(str(data.get("description") or "").lower().split()),
+            age_group(data.get("age")), str(data.get("gender") or "").lower())
+
+
+def build_art_prompt(data: Dict) -> str:
+    """Image prompt for text-free card artwork with calm areas where the text is set later."""
+    prompt = f"A {data.get('theme') or 'modern'} style birthday invitation card background, portrait orientation.\n"
+    if data.get("description"):
+        prompt += f"Theme description: {data['description']}\n"
+    group = age_group(data.get("age"))
+    if group != "any":
+        prompt += f"Designed for {group}"
+        prompt += f" ({data['gender']}).\n" if data.get("gender") else ".\n"
+    return prompt + """
+Style guidelines:
+- Kids → bright, fun, cartoonish; teens → stylish, trendy; adults → elegant, modern; seniors → classic, warm.
+- Colorful, attractive and celebratory, with decorative graphics/icons (no personal photo).
+
+Layout (text is added afterwards, so keep these areas calm, low-detail and evenly lit):
+- a horizontal band across the top fifth of the card,
+- a wide area across the middle of the card,
+- a band across the bottom quarter of the card.
+Place decorations around the edges and corners.
+
+Do NOT draw any text, letters, numbers, words or signatures anywhere on the image.
+"""
+
+
+# Text fonts in order of preference: the main font, then the fallbacks that exist.
+TEXT_FONTS = [path for path in [CARD_FONT_PATH, *CARD_FALLBACK_FONTS] if path and os.path.isfile(path)]
+
+
+@lru_cache(maxsize=None)
+def _notdef(path: str):
+    # What the font draws for a character it lacks (the .notdef glyph).
+    font = ImageFont.truetype(path, 32)
+    mask = font.getmask("\U0010FFFD")
+    return font, (mask.size, bytes(mask))
+
+
+@lru_cache(maxsize=4096)
+def _covers(path: str, char: str) -> bool:
+    font, notdef = _notdef(path)
+    mask = font.getmask(char)
+    return (mask.size, bytes(mask)) != notdef
+
+
+def font_for(text: str) -> Optional[str]:
+    """First text font that draws every character of ``text``, else the one missing fewest."""
+    chars = set(text) - set(" \t\n")
+    best, best_missing = None, None
+    for path in TEXT_FONTS:
+        missing = sum(not _covers(path, char) for char in chars)
+        if not missing:
+            return path
+        if best_missing is None or missing < best_missing:
+            best, best_missing = path, missing
+    return best
+
+
+@lru_cache(maxsize=64)
+def _load_font(path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+
+def text_font(size: int, text: str = "") -> ImageFont.FreeTypeFont:
+    """Text font at ``size`` that can draw ``text`` (Pillow's built-in font if none is installed)."""
+    return _load_font(font_for(text), size)
+
+
+@lru_cache(maxsize=32)
+def icon_font(size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(CARD_ICON_FONT, size)
+
+
+def clean_text(text: str) -> str:
+    return " ".join(EMOJI.sub(" ", text or "").split())
+
+
+def wrap(text: str, font: ImageFont.FreeTypeFont, width: float) -> List[str]:
+    lines: List[str] = []
+    for word in text.split():
+        if lines and font.getlength(f"{lines[-1]} {word}") <= width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return lines
+
+
+def fit_text(text: str, width: float, height: float, max_size: int, max_lines: int) -> Tuple[ImageFont.FreeTypeFont, List[str]]:
+    """Largest font (down to 12 px) at which ``text`` wraps into the box."""
+    size = max_size
+    while True:
+        font = text_font(size, text)
+        lines = wrap(text, font, width)
+        fits = len(lines) <= max_lines and all(font.getlength(line) <= width for line in lines)
+        if (fits and len(lines) * size * 1.25 <= height) or size <= 12:
+            return font, lines[:max_lines]
+        size = max(12, int(size * 0.9))
+
+
+class CardCanvas:
+    """Sets the card text on artwork: translucent panels, centred lines and icon rows."""
+
+    def __init__(self, art: Image.Image):
+        self.image = art.convert("RGBA")
+        self.width, self.height = self.image.size
+        self.overlay = Image.new("RGBA", self.image.size, (0, 0, 0, 0))
+        self.draw = ImageDraw.Draw(self.overlay)
+
+    def box(self, unit_box: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+        x0, y0, x1, y1 = unit_box
+        return int(x0 * self.width), int(y0 * self.height), int(x1 * self.width), int(y1 * self.height)
+
+    def panel(self, box: Tuple[int, int, int, int]) -> None:
+        self.draw.rounded_rectangle(box, radius=int(min(self.width, self.height) * 0.03), fill=PANEL_FILL)
+
+    def centered_lines(self, lines: List[str], font, box: Tuple[int, int, int, int], line_height: float) -> None:
+        x0, y0, x1, y1 = box
+        top = (y0 + y1 - line_height * len(lines)) / 2
+        stroke = max(1, font.size // 18)
+        for i, line in enumerate(lines):
+            self.draw.text(((x0 + x1) / 2, top + (i + 0.5) * line_height), line, font=font, anchor="mm",
+                           fill=TEXT_FILL, stroke_width=stroke, stroke_fill=STROKE_FILL)
+
+    def icon_row(self, icon: str, text: str, x: int, y: float, size: int, width: int) -> None:
+        self.draw.text((x, y), icon, font=icon_font(size), anchor="lm", fill=TEXT_FILL)
+        font, lines = fit_text(text, width - 1.6 * size, size * 1.3, size, 1)
+        self.draw.text((x + 1.6 * size, y), lines[0] if lines else "", font=font, anchor="lm", fill=TEXT_FILL)
+
+    def compose(self) -> Image.Image:
+        return Image.alpha_composite(self.image, self.overlay).convert("RGB")
+
+
+def render_card(art: Image.Image, data: Dict, message: Optional[str]) -> Image.Image:
+    """The finished card: name and age on top, the message in the middle, details with icons below."""
+    canvas = CardCanvas(art)
+    unit = canvas.height
+
+    x0, y0, x1, y1 = canvas.box(TITLE_BOX)
+    canvas.panel((x0, y0, x1, y1))
+    title = clean_text(data.get("birthday_person_name") or "")
+    if title and str(data.get("language") or "en").lower().startswith("en"):
+        # Same wording as CARD_MODE=model; other languages get the name alone, as the
+        # title is not translated locally.
+        title = f"Join us for {title}'s Birthday!"
+    title_height = (y1 - y0) * (0.62 if data.get("age") else 0.9)
+    font, lines = fit_text(title, (x1 - x0) * 0.9, title_height, int(unit * 0.1), 2)
+    canvas.centered_lines(lines, font, (x0, y0, x1, int(y0 + title_height)), font.size * 1.15)
+    if data.get("age"):
+        size = int((y1 - y0) * 0.26)
+        age_text = str(data["age"])
+        age_font = text_font(size, age_text)
+        total = size * 1.4 + age_font.getlength(age_text)
+        left = (x0 + x1 - total) / 2
+        cy = y0 + title_height + (y1 - y0 - title_height) / 2
+        canvas.draw.text((left, cy), ICONS["age"], font=icon_font(size), anchor="lm", fill=TEXT_FILL)
+        canvas.draw.text((left + size * 1.4, cy), age_text, font=age_font, anchor="lm", fill=TEXT_FILL,
+                         stroke_width=max(1, size // 18), stroke_fill=STROKE_FILL)
+
+    text = clean_text(message or "")
+    if text:
+        x0, y0, x1, y1 = canvas.box(MESSAGE_BOX)
+        canvas.panel((x0, y0, x1, y1))
+        pad = (x1 - x0) * 0.06
+        font, lines = fit_text(text, x1 - x0 - 2 * pad, (y1 - y0) * 0.85, int(unit * 0.055), 5)
+        canvas.centered_lines(lines, font, (x0, y0, x1, y1), font.size * 1.25)
+
+    details = [(ICONS[field], clean_text(str(data[field])))
+               for field in ("date", "time", "venue", "contact_info") if data.get(field)]
+    if details:
+        x0, y0, x1, y1 = canvas.box(DETAILS_BOX)
+        row = (y1 - y0) / max(len(details), 3)
+        top = (y0 + y1 - row * len(details)) / 2
+        canvas.panel((x0, int(top - row * 0.2), x1, int(top + row * (len(details) + 0.2))))
+        size = int(min(row * 0.55, unit * 0.035))
+        pad = int((x1 - x0) * 0.06)
+        for i, (icon, value) in enumerate(details):
+            canvas.icon_row(icon, value, x0 + pad, top + (i + 0.5) * row, size, x1 - x0 - 2 * pad)
+
+    return canvas.compose()
@@ -0,0 +1,124 @@
+# app/services/catalog/filters.py
+import re
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import PROMPT_BUDGET_BANDS
+from app.services.catalog.store import CatalogStore
+
+INF = float("inf")
+
+# Named ranges seen in upstream ``age_range`` values, in years.
+NAMED_AGE_RANGES = {
+    "baby": (0, 2), "babies": (0, 2), "infant": (0, 1), "infants": (0, 1),
+    "toddler": (1, 3), "toddlers": (1, 3), "preschool": (3, 5), "kid": (3, 12), "kids": (3, 12),
+    "child": (3, 12), "children": (3, 12), "tween": (9, 12), "tweens": (9, 12),
+    "teen": (13, 19), "teens": (13, 19), "teenager": (13, 19), "teenagers": (13, 19),
+    "adult": (18, INF), "adults": (18, INF), "all ages": (0, INF),
+}
+# A number with an optional unit of its own: "18 months", "3 yrs", "5".
+_NUMBER = r"(\d+(?:\.\d+)?)\s*(months?|mos?|years?|yrs?)?\b"
+_RANGE = re.compile(rf"{_NUMBER}\s*(?:-|–|to)\s*{_NUMBER}")
+_AT_LEAST = re.compile(rf"{_NUMBER}\s*(?:\+|and up|and over|or older)")
+_UNDER = re.compile(rf"(?:under|up to|below|less than)\s*{_NUMBER}")
+_SINGLE = re.compile(_NUMBER)
+_DIGITS = re.compile(r"\d+(?:\.\d+)?")
+
+
+def budget_band(budget: float) -> Optional[float]:
+    """Smallest configured band covering ``budget``; None means the whole catalog."""
+    for band in PROMPT_BUDGET_BANDS:
+        if budget <= band:
+            return band
+    return None
+
+
+def _years(number: str, unit: Optional[str], default_unit: Optional[str]) -> float:
+    unit = unit or default_unit or "years"
+    return float(number) / 12 if unit.startswith("mo") else float(number)
+
+
+def parse_age_range(text: str) -> Tuple[float, float]:
+    """``"3-5 years"`` -> ``(3, 5)``; ``"8+"`` -> ``(8, inf)``; ``"0-24 months"`` -> ``(0, 2)``;
+    ``"18 months - 3 years"`` -> ``(1.5, 3)``.
+
+    Each bound takes its own unit, else the other bound's, else years. Unknown, empty
+    or ambiguous values match every age, so products are never hidden by a label we
+    cannot read.
+    """
+    value = " ".join(str(text or "").lower().split())
+    if not value:
+        return 0, INF
+    match = _RANGE.search(value)
+    if match:
+        low, low_unit, high, high_unit = match.groups()
+        return _years(low, low_unit, high_unit), _years(high, high_unit, low_unit)
+    match = _AT_LEAST.search(value)
+    if match:
+        return _years(match.group(1), match.group(2), None), INF
+    match = _UNDER.search(value)
+    if match:
+        return 0, _years(match.group(1), match.group(2), None)
+    for name, interval in NAMED_AGE_RANGES.items():
+        if name in value:
+            return interval
+    if len(_DIGITS.findall(value)) == 1:
+        match = _SINGLE.search(value)
+        age = _years(match.group(1), match.group(2), None)
+        return age, age
+    return 0, INF
+
+
+class AgeIndex:
+    """Numeric intervals for the catalog's ``age_range`` vocabulary.
+
+    ``age_range`` is a low-cardinality category column, so the interval test runs
+    over the vocabulary and rows are selected through their codes. Row sets are
+    memoized per matching-vocabulary group.
+    """
+
+    def __init__(self, catalog: CatalogStore):
+        self.catalog = catalog
+        intervals = [parse_age_range(value) for value in catalog.age_ranges.values]
+        self.lower = np.asarray([lo for lo, _ in intervals], dtype=np.float64)
+        self.upper = np.asarray([hi for _, hi in intervals], dtype=np.float64)
+        self._rows: Dict[Tuple[int, ...], np.ndarray] = {}
+
+    def matching_codes(self, age: float) -> Tuple[int, ...]:
+        """Vocabulary codes whose interval contains ``age``; doubles as a cache key."""
+        return tuple(np.flatnonzero((self.lower <= age) & (age <= self.upper)).tolist())
+
+    def rows_for(self, age: float) -> np.ndarray:
+        """Sorted row indices of products suitable for ``age``."""
+        codes = self.matching_codes(age)
+        rows = self._rows.get(codes)
+        if rows is None:
+            mask = np.zeros(len(self.lower), dtype=bool)
+            mask[list(codes)] = True
+            rows = self._rows[codes] = np.flatnonzero(mask[self.catalog.age_ranges.codes])
+        return rows
+
+
+def age_index(catalog: CatalogStore) -> AgeIndex:
+    return catalog.derived("age_index", AgeIndex)
+
+
+def candidate_rows(catalog: CatalogStore, age: Optional[float] = None, max_price: Optional[float] = None) -> Optional[np.ndarray]:
+    """Sorted row indices passing the age and price filters; None when neither applies."""
+    rows = None
+    if age is not None:
+        rows = age_index(catalog).rows_for(age)
+    if max_price is not None:
+        priced = catalog.price_at_most(max_price)
+        rows = priced if rows is None else np.intersect1d(rows, priced, assume_unique=True)
+    return rows
+
+
+def filter_segment(catalog: CatalogStore, age: Optional[float] = None, band: Optional[float] = None) -> Tuple:
+    """Prompt-cache segment for a filtered catalog prefix.
+
+    Ages that match the same ``age_range`` values share a segment, so caching stays
+    per age group rather than per year.
+    """
+    return (band, age_index(catalog).matching_codes(age) if age is not None else None)
@@ -0,0 +1,91 @@
+# app/services/catalog/leader.py
+import os
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: no flock, every process refreshes for itself
+    fcntl = None
+
+from app.config import CATALOG_SNAPSHOT_DIR
+from app.services.catalog.store import CatalogStore
+from app.services.catalog.snapshot import current_snapshot_name, load_snapshot
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LOCK_NAME = "leader.lock"
+
+
+class CatalogLeadership:
+    """Elects one catalog-refresh leader among workers sharing ``CATALOG_SNAPSHOT_DIR``.
+
+    The leader holds an exclusive ``flock`` for its lifetime. The OS drops the lock when
+    the process exits, so a follower takes over on its next ``try_acquire``.
+    """
+
+    def __init__(self, directory: str = CATALOG_SNAPSHOT_DIR):
+        self.path = os.path.join(directory, LOCK_NAME)
+        self._fd: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        self._fd = fd
+        logger.info(f"Worker {os.getpid()} is the catalog refresh leader")
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+
+class SnapshotFollower:
+    """Tracks the snapshot the leader publishes and maps each new version.
+
+    Every worker maps the same file read-only, so the catalog pages live once in the
+    OS page cache no matter how many workers attach.
+    """
+
+    def __init__(self, directory: str = CATALOG_SNAPSHOT_DIR):
+        self.directory = directory
+        self.current: Optional[str] = None
+        self.meta: Dict[str, Any] = {}
+
+    def poll(self) -> Optional[Tuple[CatalogStore, Dict[str, Any]]]:
+        """Return the newly published snapshot, or None if nothing changed."""
+        name = current_snapshot_name(self.directory)
+        if name is None or name == self.current:
+            return None
+        try:
+            snapshot = load_snapshot(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            # Pruned between reading CURRENT and opening it; pick up the newer one next poll.
+            return None
+        except Exception as e:
+            logger.error(f"Ignoring unreadable catalog snapshot {name}: {e}")
+            self.current = name
+            return None
+        self.current = name
+        self.meta = snapshot[1]
+        return snapshot
@@ -0,0 +1,100 @@
+# app/services/catalog/pools.py
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.catalog.store import CatalogStore
+
+
+class FallbackPools:
+    """Popular products per (age range, category), age range, category and overall.
+
+    Every pool holds row indices ranked by ``avg_rating`` then ``total_review``
+    (unrated products last). Built once per catalog version, so filling ``n`` missing
+    recommendation slots walks at most ``n`` plus the excluded rows instead of
+    sampling the whole catalog.
+    """
+
+    def __init__(
+        self,
+        ranked: np.ndarray,
+        by_pair: Dict[Tuple[str, str], np.ndarray],
+        by_age: Dict[str, np.ndarray],
+        by_category: Dict[str, np.ndarray],
+    ):
+        self.ranked = ranked
+        self.by_pair = by_pair
+        self.by_age = by_age
+        self.by_category = by_category
+
+    @classmethod
+    def build(cls, catalog: CatalogStore) -> "FallbackPools":
+        rating = np.nan_to_num(np.asarray(catalog.avg_rating, dtype=np.float64), nan=-1.0)
+        # lexsort sorts by the last key first: rating desc, then reviews desc.
+        ranked = np.lexsort((-np.asarray(catalog.total_review), -rating))
+        ages = catalog.age_ranges
+        categories = catalog.categories
+        age_codes = np.asarray(ages.codes, dtype=np.int64)
+        category_codes = np.asarray(categories.codes, dtype=np.int64)
+        stride = max(len(categories.values), 1)
+
+        by_pair = {
+            (ages.values[code // stride], categories.values[code % stride]): pool
+            for code, pool in _group(ranked, age_codes * stride + category_codes).items()
+        }
+        by_age = {ages.values[code]: pool for code, pool in _group(ranked, age_codes).items()}
+        by_category = {categories.values[code]: pool for code, pool in _group(ranked, category_codes).items()}
+        return cls(ranked, by_pair, by_age, by_category)
+
+    def pools_for(self, age_range: Optional[str] = None, category: Optional[str] = None) -> List[np.ndarray]:
+        """Candidate pools from most to least specific."""
+        pools = []
+        if age_range and category and (age_range, category) in self.by_pair:
+            pools.append(self.by_pair[(age_range, category)])
+        if age_range and age_range in self.by_age:
+            pools.append(self.by_age[age_range])
+        if category and category in self.by_category:
+            pools.append(self.by_category[category])
+        pools.append(self.ranked)
+        return pools
+
+    def pick(
+        self,
+        limit: int,
+        exclude: Iterable[int] = (),
+        age_range: Optional[str] = None,
+        category: Optional[str] = None,
+        accept: Optional[Callable[[int], bool]] = None,
+    ) -> List[int]:
+        """Up to ``limit`` row indices, most specific popular pool first.
+
+        ``accept`` optionally rejects rows (e.g. outside the age group or budget).
+        """
+        skip = set(int(i) for i in exclude)
+        picked: List[int] = []
+        for pool in self.pools_for(age_range, category):
+            for index in pool:
+                if len(picked) >= limit:
+                    return picked
+                index = int(index)
+                if index not in skip:
+                    skip.add(index)
+                    if accept is None or accept(index):
+                        picked.append(index)
+        return picked
+
+
+def fallback_pools(catalog: CatalogStore) -> FallbackPools:
+    """Pools for the catalog's current version (built on first use after a refresh)."""
+    return catalog.derived("fallback_pools", FallbackPools.build)
+
+
+def _group(ranked: np.ndarray, codes: np.ndarray) -> Dict[int, np.ndarray]:
+    # Stable sort by group keeps the popularity order inside every group.
+    keys = codes[ranked]
+    order = np.argsort(keys, kind="stable")
+    rows, keys = ranked[order], keys[order]
+    bounds = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(keys)]))
+    return {int(keys[start]): rows[start:end] for start, end in zip(starts, ends) if end > start}
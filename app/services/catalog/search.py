@@ -0,0 +1,162 @@
+# app/services/catalog/search.py
+import re
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import PRODUCT_SEARCH_CACHE_SIZE
+from app.services.catalog.store import CatalogStore
+from app.services.catalog.filters import age_index
+from app.services.catalog.pools import fallback_pools
+
+TOKEN = re.compile(r"\w+")
+
+SORTS = ("popular", "price_asc", "price_desc", "reviews", "title")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+class SearchIndex:
+    """Read-only query indexes over one catalog version.
+
+    Titles and categories are tokenized into an inverted index: a sorted vocabulary
+    with one postings array, so every word sharing a prefix maps to one contiguous
+    slice. Price and rating filters are binary searches over sorted orders, age goes
+    through ``AgeIndex`` and every sort order is computed up front. Full match lists
+    of recent queries are kept, so paging through results only slices an array.
+    """
+
+    def __init__(self, catalog: CatalogStore, words: Sequence[str], postings: np.ndarray, offsets: np.ndarray,
+                 rating_order: np.ndarray, orders: Dict[str, np.ndarray], cache_size: int = PRODUCT_SEARCH_CACHE_SIZE):
+        self.catalog = catalog
+        self.cache_size = cache_size
+        self.words = words
+        self.postings = postings
+        self.offsets = offsets
+        self.rating_order = rating_order
+        self._rating_desc = np.nan_to_num(catalog.avg_rating, nan=-np.inf)[rating_order]
+        self.orders = orders
+        self._results: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, catalog: CatalogStore) -> "SearchIndex":
+        """Tokenize and sort the whole catalog: O(N) Python work, done once per version
+        by the refresh leader and published in the snapshot for the other workers."""
+        vocabulary: Dict[str, int] = {}
+        token_ids: List[int] = []
+        rows: List[int] = []
+        for i in range(len(catalog)):
+            for token in set(tokenize(f"{catalog.titles[i]} {catalog.categories[i]}")):
+                token_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                rows.append(i)
+        words = sorted(vocabulary)
+        rank = np.empty(len(words), dtype=np.int64)
+        for position, word in enumerate(words):
+            rank[vocabulary[word]] = position
+        token_ids = rank[np.asarray(token_ids, dtype=np.int64)]
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.lexsort((rows, token_ids))
+        offsets = np.searchsorted(token_ids[order], np.arange(len(words) + 1))
+
+        rating = np.nan_to_num(catalog.avg_rating, nan=-np.inf)
+        rating_order = np.argsort(-rating, kind="stable")
+        orders = {sort: _sort_order(catalog, sort) for sort in SORTS}
+        return cls(catalog, words, rows[order], offsets, rating_order, orders)
+
+    # -------------------------------------------------------------- filters
+    def rows_for_prefix(self, prefix: str) -> np.ndarray:
+        """Sorted rows whose title or category has a word starting with ``prefix``."""
+        lo = bisect.bisect_left(self.words, prefix)
+        hi = bisect.bisect_left(self.words, prefix + "\U0010ffff", lo)
+        rows = self.postings[self.offsets[lo]:self.offsets[hi]]
+        return rows if hi - lo == 1 else np.unique(rows)
+
+    def rows_in_price(self, min_price: Optional[float], max_price: Optional[float]) -> np.ndarray:
+        prices, order = self.catalog.price, self.catalog.price_order
+        lo = 0 if min_price is None else np.searchsorted(prices, min_price, side="left", sorter=order)
+        # Products without a price sort last and never match a price filter.
+        hi = np.searchsorted(prices, np.inf if max_price is None else max_price, side="right", sorter=order)
+        return order[lo:hi]
+
+    def rows_rated(self, min_rating: float) -> np.ndarray:
+        cut = np.searchsorted(-self._rating_desc, -min_rating, side="right")
+        return self.rating_order[:cut]
+
+    def order(self, sort: str) -> np.ndarray:
+        """All rows in ``sort`` order (unpriced and unrated products last)."""
+        order = self.orders.get(sort)
+        if order is None:
+            raise ValueError(f"Unknown sort {sort!r}; expected one of {', '.join(SORTS)}")
+        return order
+
+    # ---------------------------------------------------------------- query
+    def search(
+        self,
+        q: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        age: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        sort: str = "popular",
+    ) -> np.ndarray:
+        """Matching row indices in ``sort`` order; every word of ``q`` must match a prefix."""
+        tokens = tuple(sorted(set(tokenize(q or ""))))
+        key = (tokens, min_price, max_price, age, min_rating, sort)
+        with self._lock:
+            matches = self._results.get(key)
+            if matches is not None:
+                self._results.move_to_end(key)
+                return matches
+
+        order = self.order(sort)
+        sets = [self.rows_for_prefix(token) for token in tokens]
+        if min_price is not None or max_price is not None:
+            sets.append(self.rows_in_price(min_price, max_price))
+        if age is not None:
+            sets.append(age_index(self.catalog).rows_for(age))
+        if min_rating is not None:
+            sets.append(self.rows_rated(min_rating))
+        if not sets:
+            matches = order
+        else:
+            smallest = min(sets, key=len)
+            mask = np.zeros(len(self.catalog), dtype=bool)
+            mask[smallest] = True
+            for rows in sets:
+                if rows is smallest:
+                    continue
+                selected = np.zeros_like(mask)
+                selected[rows] = True
+                mask &= selected
+            matches = order[mask[order]]
+
+        with self._lock:
+            self._results[key] = matches
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return matches
+
+
+def _sort_order(catalog: CatalogStore, sort: str) -> np.ndarray:
+    if sort == "popular":
+        return fallback_pools(catalog).ranked
+    if sort == "price_asc":
+        return catalog.price_order
+    if sort == "price_desc":
+        return np.argsort(-catalog.price, kind="stable")
+    if sort == "reviews":
+        return np.argsort(-catalog.total_review, kind="stable")
+    titles = [catalog.titles[i].lower() for i in range(len(catalog))]
+    return np.asarray(sorted(range(len(titles)), key=titles.__getitem__), dtype=np.int64)
+
+
+def search_index(catalog: CatalogStore) -> SearchIndex:
+    """Index for the catalog's current version: mapped from its snapshot, or built on
+    first use after a refresh."""
+    return catalog.derived("search_index", SearchIndex.build)
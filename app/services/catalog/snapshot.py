@@ -0,0 +1,223 @@
+# app/services/catalog/snapshot.py
+import os
+import json
+import mmap
+import time
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import CATALOG_SNAPSHOT_DIR, CATALOG_SNAPSHOT_KEEP
+from app.services.catalog.store import (
+    CatalogStore,
+    CategoryColumn,
+    StringColumn,
+    STRING_COLUMNS,
+    NUMERIC_COLUMNS,
+    CATEGORY_COLUMNS,
+)
+from app.services.catalog.search import SearchIndex, search_index
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# File layout:
+#   8 bytes  MAGIC
+#   8 bytes  little-endian header length
+#   N bytes  JSON header (format, catalog version, column and search index specs, sync metadata)
+#   ...      column buffers, each starting on an ALIGN boundary relative to the data section
+MAGIC = b"PPCATSNP"
+FORMAT_VERSION = 4
+ALIGN = 64
+CURRENT_POINTER = "CURRENT"
+
+
+def write_snapshot(
+    catalog: CatalogStore,
+    directory: str = CATALOG_SNAPSHOT_DIR,
+    meta: Optional[Dict[str, Any]] = None,
+    keep: int = CATALOG_SNAPSHOT_KEEP,
+) -> str:
+    """Write ``catalog`` as a versioned, memory-mappable snapshot and point CURRENT at it.
+
+    The file is written under a temporary name and renamed into place, so readers
+    never observe a partial snapshot. The product ``SearchIndex`` goes in too, so
+    followers map it instead of re-tokenizing the catalog.
+    """
+    os.makedirs(directory, exist_ok=True)
+    buffers: List[Tuple[Dict[str, Any], memoryview]] = []
+    columns: Dict[str, Any] = {}
+    cursor = 0
+
+    def add(buffer) -> Dict[str, int]:
+        nonlocal cursor
+        view = memoryview(buffer).cast("B")
+        spec = {"offset": cursor, "length": view.nbytes}
+        buffers.append((spec, view))
+        cursor = _align(cursor + view.nbytes)
+        return spec
+
+    def add_array(array: np.ndarray) -> Dict[str, Any]:
+        array = np.ascontiguousarray(array)
+        return {"dtype": array.dtype.str, "count": len(array), **add(array)}
+
+    packed = {}
+    for name in STRING_COLUMNS:
+        column = getattr(catalog, name)
+        if column.overlay_size or len(column) != len(column.offsets) - 1:
+            column = column.compact()
+        packed[name] = column
+        columns[name] = {"offsets": add_array(column.offsets), "data": add(column.data)}
+    for name in NUMERIC_COLUMNS:
+        columns[name] = add_array(getattr(catalog, name))
+    for name in CATEGORY_COLUMNS:
+        column = getattr(catalog, name)
+        columns[name] = {"codes": add_array(column.codes), "values": column.values}
+    columns["price_order"] = add_array(catalog.price_order)
+    ids = packed["ids"]
+    id_order = np.asarray(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64)
+    columns["id_order"] = add_array(id_order)
+
+    index = search_index(catalog)
+    words = StringColumn.from_values(index.words)
+    search = {
+        "words": {"offsets": add_array(words.offsets), "data": add(words.data)},
+        "postings": add_array(index.postings),
+        "offsets": add_array(index.offsets),
+        "rating_order": add_array(index.rating_order),
+        # price_asc is the catalog's own price_order.
+        "orders": {sort: add_array(order) for sort, order in index.orders.items() if sort != "price_asc"},
+    }
+
+    header = json.dumps({
+        "format": FORMAT_VERSION,
+        "version": catalog.version,
+        "rows": len(catalog),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "meta": meta or {},
+        "columns": columns,
+        "search": search,
+    }).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    filename = f"catalog-v{FORMAT_VERSION}-{catalog.version}.snap"
+    path = os.path.join(directory, filename)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for spec, buffer in buffers:
+            f.seek(data_start + spec["offset"])
+            f.write(buffer)
+        # Extend to the full data section so trailing empty columns map cleanly.
+        f.truncate(data_start + cursor)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _write_pointer(directory, filename)
+    _prune(directory, keep, current=filename)
+    logger.info(f"Catalog snapshot written: {path} ({len(catalog)} products)")
+    return path
+
+
+def load_snapshot(path: str) -> Tuple[CatalogStore, Dict[str, Any]]:
+    """Map a snapshot file read-only. Columns are views over the page cache, so
+    load time does not depend on catalog size."""
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a catalog snapshot: {path}")
+    (header_length,) = struct.unpack("<Q", mm[len(MAGIC):len(MAGIC) + 8])
+    header_start = len(MAGIC) + 8
+    header = json.loads(mm[header_start:header_start + header_length])
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {header.get('format')} in {path}")
+
+    base = _align(header_start + header_length)
+    view = memoryview(mm)
+    columns = header["columns"]
+
+    def array(spec: Dict[str, Any]) -> np.ndarray:
+        return np.frombuffer(mm, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=base + spec["offset"])
+
+    def blob(spec: Dict[str, Any]) -> memoryview:
+        return view[base + spec["offset"]:base + spec["offset"] + spec["length"]]
+
+    kwargs: Dict[str, Any] = {}
+    for name in STRING_COLUMNS:
+        kwargs[name] = StringColumn(array(columns[name]["offsets"]), blob(columns[name]["data"]))
+    for name in NUMERIC_COLUMNS:
+        kwargs[name] = array(columns[name])
+    for name in CATEGORY_COLUMNS:
+        kwargs[name] = CategoryColumn(array(columns[name]["codes"]), list(columns[name]["values"]))
+
+    catalog = CatalogStore(
+        **kwargs,
+        price_order=array(columns["price_order"]),
+        version=header["version"],
+        id_order=array(columns["id_order"]),
+    )
+    search = header["search"]
+    orders = {sort: array(spec) for sort, spec in search["orders"].items()}
+    orders["price_asc"] = catalog.price_order
+    catalog.set_derived("search_index", SearchIndex(
+        catalog,
+        StringColumn(array(search["words"]["offsets"]), blob(search["words"]["data"])),
+        array(search["postings"]),
+        array(search["offsets"]),
+        array(search["rating_order"]),
+        orders,
+    ))
+    catalog.load_seconds = time.perf_counter() - started
+    return catalog, header.get("meta", {})
+
+
+def current_snapshot_name(directory: str = CATALOG_SNAPSHOT_DIR) -> Optional[str]:
+    """File name CURRENT points at, or None if no snapshot was published yet."""
+    try:
+        with open(os.path.join(directory, CURRENT_POINTER), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_latest_snapshot(directory: str = CATALOG_SNAPSHOT_DIR) -> Optional[Tuple[CatalogStore, Dict[str, Any]]]:
+    """Load the snapshot CURRENT points at, or None if there is no usable one."""
+    try:
+        filename = current_snapshot_name(directory)
+        if filename is None:
+            return None
+        return load_snapshot(os.path.join(directory, filename))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Ignoring unreadable catalog snapshot: {e}")
+        return None
+
+
+def _write_pointer(directory: str, filename: str) -> None:
+    pointer = os.path.join(directory, CURRENT_POINTER)
+    tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(filename)
+    os.replace(tmp_pointer, pointer)
+
+
+def _prune(directory: str, keep: int, current: str) -> None:
+    # Unlinking is safe for processes that still map an older file.
+    snapshots = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".snap")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in snapshots[max(keep, 1):]:
+        if entry.name != current:
+            os.remove(entry.path)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
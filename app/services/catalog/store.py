@@ -0,0 +1,562 @@
+# app/services/catalog/store.py
+import sys
+import time
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils import serialization
+
+
+# Fields every product row exposes, in response order.
+PRODUCT_FIELDS = (
+    "id",
+    "title",
+    "link",
+    "image_url",
+    "price",
+    "avg_rating",
+    "total_review",
+    "affiliated_company",
+    "category",
+    "age_range",
+)
+
+# Fields sent to the gift-ranking prompt (same shape the old filter_data produced).
+GIFT_FIELDS = ("id", "title", "price", "avg_rating", "link", "image_url", "affiliated_company")
+
+# Fields sent to the recommendation prompt.
+RECOMMENDATION_FIELDS = ("id", "title", "price", "avg_rating", "affiliated_company", "age_range")
+
+# CatalogStore attribute names by storage kind (also the snapshot layout).
+# ``extras`` holds any other upstream fields (description, ...) as compact JSON.
+STRING_COLUMNS = ("ids", "titles", "links", "image_urls", "extras")
+NUMERIC_COLUMNS = ("price", "avg_rating", "total_review")
+CATEGORY_COLUMNS = ("companies", "categories", "age_ranges")
+
+
+class StringColumn:
+    """Free-text column packed into one UTF-8 blob plus an offsets array.
+
+    Avoids one Python str object per cell; values are decoded on access.
+    Rows written after the build (delta sync) go to a small overlay dict until
+    the column is compacted.
+    """
+
+    __slots__ = ("offsets", "data", "_overlay", "_length")
+
+    def __init__(self, offsets: np.ndarray, data):
+        self.offsets = offsets
+        self.data = data
+        self._overlay: Dict[int, str] = {}
+        self._length = len(offsets) - 1
+
+    @classmethod
+    def from_values(cls, values: Iterable[Optional[str]]) -> "StringColumn":
+        encoded = [("" if v is None else str(v)).encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(offsets, b"".join(encoded))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int) -> str:
+        if self._overlay:
+            value = self._overlay.get(i)
+            if value is not None:
+                return value
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __setitem__(self, i: int, value: Optional[str]) -> None:
+        self._overlay[i] = "" if value is None else str(value)
+
+    def resize(self, length: int) -> None:
+        """Grow (new rows must then be written) or truncate the column."""
+        if length < self._length:
+            self._overlay = {i: v for i, v in self._overlay.items() if i < length}
+        self._length = length
+
+    @property
+    def overlay_size(self) -> int:
+        return len(self._overlay)
+
+    def copy(self) -> "StringColumn":
+        """Independent column sharing the packed buffers (they are never written)."""
+        column = StringColumn(self.offsets, self.data)
+        column._overlay = dict(self._overlay)
+        column._length = self._length
+        return column
+
+    def compact(self) -> "StringColumn":
+        """Return a fully packed copy with the overlay folded in."""
+        return StringColumn.from_values(self[i] for i in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        overlay = sum(sys.getsizeof(v) for v in self._overlay.values())
+        return self.offsets.nbytes + len(self.data) + overlay
+
+
+class CategoryColumn:
+    """Low-cardinality column stored as int32 codes into a list of interned strings."""
+
+    __slots__ = ("codes", "values", "_lookup")
+
+    def __init__(self, codes: np.ndarray, values: List[str]):
+        self.codes = codes
+        self.values = values
+        self._lookup = {v: i for i, v in enumerate(values)}
+
+    @classmethod
+    def from_values(cls, values: Iterable[Optional[str]]) -> "CategoryColumn":
+        lookup: Dict[str, int] = {}
+        vocabulary: List[str] = []
+        codes = []
+        for v in values:
+            v = "" if v is None else str(v)
+            code = lookup.get(v)
+            if code is None:
+                code = lookup[v] = len(vocabulary)
+                vocabulary.append(sys.intern(v))
+            codes.append(code)
+        return cls(np.asarray(codes, dtype=np.int32), vocabulary)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+    def __setitem__(self, i: int, value: Optional[str]) -> None:
+        value = "" if value is None else str(value)
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        self.codes[i] = code
+
+    def resize(self, length: int) -> None:
+        if length <= len(self.codes):
+            self.codes = self.codes[:length]
+        else:
+            grow = np.zeros(length - len(self.codes), dtype=self.codes.dtype)
+            self.codes = np.concatenate([self.codes, grow])
+
+    def copy(self) -> "CategoryColumn":
+        return CategoryColumn(self.codes.copy(), list(self.values))
+
+    def code_of(self, value: str) -> int:
+        """Return the code for ``value`` or -1 if it never occurs."""
+        return self._lookup.get(value, -1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(v) for v in self.values)
+
+
+class ProductRow:
+    """Lightweight view over one catalog row; holds no product data itself."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CatalogStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def id(self) -> str:
+        return self._store.ids[self._index]
+
+    @property
+    def title(self) -> str:
+        return self._store.titles[self._index]
+
+    @property
+    def link(self) -> str:
+        return self._store.links[self._index]
+
+    @property
+    def image_url(self) -> str:
+        return self._store.image_urls[self._index]
+
+    @property
+    def price(self) -> Optional[float]:
+        return _nullable(self._store.price[self._index])
+
+    @property
+    def avg_rating(self) -> Optional[float]:
+        return _nullable(self._store.avg_rating[self._index])
+
+    @property
+    def total_review(self) -> int:
+        return int(self._store.total_review[self._index])
+
+    @property
+    def affiliated_company(self) -> str:
+        return self._store.companies[self._index]
+
+    @property
+    def category(self) -> str:
+        return self._store.categories[self._index]
+
+    @property
+    def age_range(self) -> str:
+        return self._store.age_ranges[self._index]
+
+    @property
+    def extras(self) -> Dict[str, Any]:
+        """Upstream fields without a column of their own, passed through unchanged."""
+        raw = self._store.extras[self._index]
+        return serialization.loads(raw) if raw else {}
+
+    def to_dict(self, fields: Sequence[str] = PRODUCT_FIELDS) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in fields}
+
+    def to_item(self) -> Dict[str, Any]:
+        """The product as ``PRODUCT_API`` returned it: every column plus the passthrough fields."""
+        return {**self.to_dict(), **self.extras}
+
+    def __repr__(self) -> str:
+        return f"ProductRow(id={self.id!r}, title={self.title!r})"
+
+
+class CatalogStore:
+    """Columnar, read-mostly product catalog shared by every service.
+
+    Built once per refresh from the upstream ``PRODUCT_API`` payload and kept in
+    ``app.state.catalog``. Numeric fields live in NumPy arrays, free text is packed
+    into UTF-8 blobs and company/category/age-range strings are interned.
+    A store is never modified once published: delta syncs build a patched copy
+    through ``apply_changes`` and swap it in, so readers on other threads always see
+    one consistent version.
+    """
+
+    # Fold string overlays back into packed blobs once they cover this share of rows.
+    COMPACT_RATIO = 0.25
+
+    def __init__(
+        self,
+        ids: StringColumn,
+        titles: StringColumn,
+        links: StringColumn,
+        image_urls: StringColumn,
+        extras: StringColumn,
+        price: np.ndarray,
+        avg_rating: np.ndarray,
+        total_review: np.ndarray,
+        companies: CategoryColumn,
+        categories: CategoryColumn,
+        age_ranges: CategoryColumn,
+        load_seconds: float = 0.0,
+        price_order: Optional[np.ndarray] = None,
+        version: Optional[str] = None,
+        id_order: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.titles = titles
+        self.links = links
+        self.image_urls = image_urls
+        self.extras = extras
+        self.price = price
+        self.avg_rating = avg_rating
+        self.total_review = total_review
+        self.companies = companies
+        self.categories = categories
+        self.age_ranges = age_ranges
+        self.load_seconds = load_seconds
+
+        # Built on first lookup so snapshot loads stay O(1) in catalog size.
+        self._id_index: Optional[Dict[str, int]] = None
+        # Row indices sorted by id (snapshot-backed stores): lets read-only workers
+        # look ids up by binary search over shared pages instead of building a dict.
+        self.id_order = id_order
+        # Ascending price order, used to answer budget filters with a binary search.
+        self.price_order = np.argsort(price, kind="stable") if price_order is None else price_order
+        self.version = self._compute_version() if version is None else version
+        # Indexes derived from the columns (fallback pools, ...), rebuilt per version.
+        self._derived: Dict[str, Any] = {}
+
+    # ---------------------------------------------------------------- build
+    @classmethod
+    def from_items(cls, items: Sequence[Dict[str, Any]]) -> "CatalogStore":
+        started = time.perf_counter()
+        store = cls(
+            ids=StringColumn.from_values(item.get("id") for item in items),
+            titles=StringColumn.from_values(item.get("title") for item in items),
+            links=StringColumn.from_values(item.get("link") for item in items),
+            image_urls=StringColumn.from_values(item.get("image_url") for item in items),
+            extras=StringColumn.from_values(_extras(item) for item in items),
+            price=np.asarray([_as_float(item.get("price")) for item in items], dtype=np.float64),
+            avg_rating=np.asarray([_as_float(item.get("avg_rating")) for item in items], dtype=np.float64),
+            total_review=np.asarray([_as_int(item.get("total_review")) for item in items], dtype=np.int64),
+            companies=CategoryColumn.from_values(item.get("affiliated_company") for item in items),
+            categories=CategoryColumn.from_values(item.get("category") for item in items),
+            age_ranges=CategoryColumn.from_values(item.get("age_range") for item in items),
+        )
+        store.load_seconds = time.perf_counter() - started
+        return store
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "CatalogStore":
+        """Build from the raw ``PRODUCT_API`` response (``{"data": {"items": [...]}}``)."""
+        if isinstance(payload, dict):
+            items = payload.get("data", {}).get("items", [])
+        elif isinstance(payload, list):
+            items = payload
+        else:
+            raise ValueError(f"Unsupported product payload type: {type(payload).__name__}")
+        return cls.from_items(items)
+
+    @classmethod
+    def empty(cls) -> "CatalogStore":
+        return cls.from_items([])
+
+    # --------------------------------------------------------------- access
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def __iter__(self) -> Iterator[ProductRow]:
+        return (ProductRow(self, i) for i in range(len(self)))
+
+    def row(self, index: int) -> ProductRow:
+        return ProductRow(self, index)
+
+    @property
+    def id_index(self) -> Dict[str, int]:
+        if self._id_index is None:
+            self._id_index = {self.ids[i]: i for i in range(len(self))}
+        return self._id_index
+
+    def get(self, product_id: Any) -> Optional[ProductRow]:
+        key = str(product_id)
+        if self._id_index is None and self.id_order is not None:
+            index = self._search_id(key)
+        else:
+            index = self.id_index.get(key)
+        return None if index is None else ProductRow(self, index)
+
+    def _search_id(self, key: str) -> Optional[int]:
+        order, ids = self.id_order, self.ids
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ids[order[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and ids[order[lo]] == key:
+            return int(order[lo])
+        return None
+
+    def rows(self, indices: Iterable[int]) -> List[ProductRow]:
+        return [ProductRow(self, int(i)) for i in indices]
+
+    def records(self, indices: Optional[Iterable[int]] = None, fields: Sequence[str] = PRODUCT_FIELDS) -> List[Dict[str, Any]]:
+        """Materialize plain dicts for prompts and responses."""
+        if indices is None:
+            indices = range(len(self))
+        return [ProductRow(self, int(i)).to_dict(fields) for i in indices]
+
+    # -------------------------------------------------------------- updates
+    def apply_changes(
+        self, upserts: Sequence[Dict[str, Any]], deleted_ids: Iterable[Any] = ()
+    ) -> Tuple["CatalogStore", Dict[str, int]]:
+        """Return a copy of the catalog with changed/new items and deletions applied.
+
+        ``self`` is left untouched (threads may still be reading it). The copy shares
+        the packed string buffers; numeric arrays, category codes and the id index are
+        copied, which is a few milliseconds at 100k rows. Repeated ids in one batch
+        collapse to their last item. Returns ``self`` when nothing changed.
+        """
+        upserts = list({str(item.get("id")): item for item in upserts}.values())
+        deleted_ids = list(dict.fromkeys(str(product_id) for product_id in deleted_ids))
+        id_index = self.id_index
+        if not upserts and not any(product_id in id_index for product_id in deleted_ids):
+            return self, {"updated": 0, "added": 0, "removed": 0}
+
+        store = self.copy()
+        id_index = store.id_index
+        updated = added = removed = 0
+        new_items = []
+        for item in upserts:
+            index = id_index.get(str(item.get("id")))
+            if index is None:
+                new_items.append(item)
+            else:
+                store._write_row(index, item)
+                updated += 1
+
+        if new_items:
+            start = len(store)
+            store._resize(start + len(new_items))
+            for offset, item in enumerate(new_items):
+                store._write_row(start + offset, item)
+                id_index[str(item.get("id"))] = start + offset
+            added = len(new_items)
+
+        for product_id in deleted_ids:
+            index = id_index.pop(product_id, None)
+            if index is None:
+                continue
+            # Swap-remove: move the last row into the hole, then shrink by one.
+            last = len(store) - 1
+            if index != last:
+                store._move_row(last, index)
+                id_index[store.ids[index]] = index
+            store._resize(last)
+            removed += 1
+
+        store.price_order = np.argsort(store.price, kind="stable")
+        store.version = self._delta_version(upserts, deleted_ids)
+        store._maybe_compact()
+        return store, {"updated": updated, "added": added, "removed": removed}
+
+    def copy(self) -> "CatalogStore":
+        """Writable copy for ``apply_changes``; derived indexes are rebuilt per version anyway."""
+        store = CatalogStore(
+            **{name: getattr(self, name).copy() for name in STRING_COLUMNS + NUMERIC_COLUMNS + CATEGORY_COLUMNS},
+            load_seconds=self.load_seconds,
+            price_order=self.price_order,
+            version=self.version,
+        )
+        store._id_index = dict(self.id_index)
+        return store
+
+    def _write_row(self, index: int, item: Dict[str, Any]) -> None:
+        self.ids[index] = item.get("id")
+        self.titles[index] = item.get("title")
+        self.links[index] = item.get("link")
+        self.image_urls[index] = item.get("image_url")
+        self.extras[index] = _extras(item)
+        self.price[index] = _as_float(item.get("price"))
+        self.avg_rating[index] = _as_float(item.get("avg_rating"))
+        self.total_review[index] = _as_int(item.get("total_review"))
+        self.companies[index] = item.get("affiliated_company")
+        self.categories[index] = item.get("category")
+        self.age_ranges[index] = item.get("age_range")
+
+    def _move_row(self, src: int, dst: int) -> None:
+        for name in STRING_COLUMNS:
+            column = getattr(self, name)
+            column[dst] = column[src]
+        for name in NUMERIC_COLUMNS:
+            array = getattr(self, name)
+            array[dst] = array[src]
+        for name in CATEGORY_COLUMNS:
+            column = getattr(self, name)
+            column.codes[dst] = column.codes[src]
+
+    def _resize(self, length: int) -> None:
+        for name in STRING_COLUMNS + CATEGORY_COLUMNS:
+            getattr(self, name).resize(length)
+        self.price = _resize_array(self.price, length, np.nan)
+        self.avg_rating = _resize_array(self.avg_rating, length, np.nan)
+        self.total_review = _resize_array(self.total_review, length, 0)
+
+    def _maybe_compact(self) -> None:
+        limit = max(1, int(len(self) * self.COMPACT_RATIO))
+        for name in STRING_COLUMNS:
+            column = getattr(self, name)
+            if column.overlay_size > limit:
+                setattr(self, name, column.compact())
+
+    def _delta_version(self, upserts: Sequence[Dict[str, Any]], deleted_ids: Iterable[Any]) -> str:
+        digest = hashlib.blake2b(self.version.encode("utf-8"), digest_size=8)
+        for item in upserts:
+            digest.update(serialization.dumps(item, sort_keys=True))
+        for product_id in deleted_ids:
+            digest.update(f"-{product_id}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def derived(self, name: str, build: Callable[["CatalogStore"], Any]) -> Any:
+        """``build(self)``, computed once per catalog version and cached on the store."""
+        entry = self._derived.get(name)
+        if entry is None or entry[0] != self.version:
+            entry = self._derived[name] = (self.version, build(self))
+        return entry[1]
+
+    def set_derived(self, name: str, value: Any) -> None:
+        """Install a prebuilt ``derived`` value for the current version (e.g. mapped from a snapshot)."""
+        self._derived[name] = (self.version, value)
+
+    def price_at_most(self, max_price: float) -> np.ndarray:
+        """Indices (in catalog order) of products priced at or below ``max_price``."""
+        cut = np.searchsorted(self.price, max_price, side="right", sorter=self.price_order)
+        return np.sort(self.price_order[:cut])
+
+    # ---------------------------------------------------------------- stats
+    def _compute_version(self) -> str:
+        digest = hashlib.blake2b(digest_size=8)
+        for name in STRING_COLUMNS:
+            column = getattr(self, name)
+            digest.update(column.offsets.tobytes())
+            digest.update(bytes(column.data))
+        for name in NUMERIC_COLUMNS:
+            digest.update(getattr(self, name).tobytes())
+        for name in CATEGORY_COLUMNS:
+            column = getattr(self, name)
+            digest.update(column.codes.tobytes())
+            digest.update("\x00".join(column.values).encode("utf-8"))
+        return digest.hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the id index (mapped pages included)."""
+        total = sum(getattr(self, name).nbytes for name in STRING_COLUMNS + CATEGORY_COLUMNS)
+        total += sum(getattr(self, name).nbytes for name in NUMERIC_COLUMNS)
+        total += self.price_order.nbytes
+        if self.id_order is not None:
+            total += self.id_order.nbytes
+        if self._id_index is not None:
+            total += sys.getsizeof(self._id_index) + sum(sys.getsizeof(k) for k in self._id_index)
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "products": len(self),
+            "memory_mb": round(self.nbytes / (1024 * 1024), 2),
+            "load_ms": round(self.load_seconds * 1000, 1),
+        }
+
+
+def _resize_array(array: np.ndarray, length: int, fill) -> np.ndarray:
+    if length <= len(array):
+        return array[:length]
+    return np.concatenate([array, np.full(length - len(array), fill, dtype=array.dtype)])
+
+
+def _extras(item: Dict[str, Any]) -> str:
+    extras = {key: value for key, value in item.items() if key not in PRODUCT_FIELDS}
+    return serialization.dumps_text(extras) if extras else ""
+
+
+def _nullable(value) -> Optional[float]:
+    # Missing numbers are stored as NaN; surface them as None like the raw JSON did.
+    return None if np.isnan(value) else float(value)
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _as_int(value: Any) -> int:
+    # Upstream counts arrive as ints, floats or numeric strings ("12", "12.0").
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):  # None, "", "n/a", nan, inf
+        return 0
@@ -0,0 +1,162 @@
+# app/services/catalog/sync.py
+import time
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from app.config import PRODUCT_API, CATALOG_SYNC_MODE, CATALOG_DELTA_PARAM, CATALOG_FULL_SYNC_EVERY
+from app.services.catalog.store import CatalogStore
+from app.utils import serialization
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SYNC_MODES = ("full", "hash", "cursor")
+
+
+class CatalogSync:
+    """Keeps a ``CatalogStore`` in step with ``PRODUCT_API`` by applying only what changed.
+
+    Modes (``CATALOG_SYNC_MODE``):
+        full    re-download and rebuild on every refresh (previous behaviour)
+        hash    conditional GET (ETag); when the body changed, diff per-item content
+                hashes and patch only the changed/removed rows in place
+        cursor  send ``?{CATALOG_DELTA_PARAM}=<last sync time>`` so the upstream returns
+                only changed items (plus optional ``data.deleted_ids``)
+
+    A full rebuild still runs on first load and every ``full_sync_every`` refreshes,
+    which reconciles anything a cursor-based upstream failed to report.
+    """
+
+    def __init__(
+        self,
+        api_url: str = PRODUCT_API,
+        mode: str = CATALOG_SYNC_MODE,
+        full_sync_every: int = CATALOG_FULL_SYNC_EVERY,
+    ):
+        if mode not in SYNC_MODES:
+            raise ValueError(f"Unknown catalog sync mode {mode!r}; expected one of {SYNC_MODES}")
+        self.api_url = api_url
+        self.mode = mode
+        self.full_sync_every = full_sync_every
+        self.session = requests.Session()
+        self.last_result: Dict[str, Any] = {}
+        self._etag: Optional[str] = None
+        self._cursor: Optional[str] = None
+        self._hashes: Dict[str, bytes] = {}
+        self._syncs_since_full = 0
+
+    def fetch(self, catalog: Optional[CatalogStore]) -> Dict[str, Any]:
+        """Download and diff against the last sync. Does not touch ``catalog``.
+
+        Safe to run in a worker thread; returns a change set for ``apply``.
+        """
+        has_catalog = catalog is not None and len(catalog) > 0
+        full = (
+            not has_catalog
+            or not self._hashes  # e.g. warm-started from a snapshot: nothing to diff against
+            or self.mode == "full"
+            or self._syncs_since_full >= self.full_sync_every
+        )
+        headers: Dict[str, str] = {}
+        params: Dict[str, str] = {}
+        if has_catalog and self._etag:
+            # A 304 means the catalog we already serve is current, even before a rebuild.
+            headers["If-None-Match"] = self._etag
+        if not full and self.mode == "cursor" and self._cursor:
+            params[CATALOG_DELTA_PARAM] = self._cursor
+
+        requested_at = datetime.now(timezone.utc).isoformat()
+        response = self.session.get(self.api_url, params=params, headers=headers, timeout=60)
+        if response.status_code == 304:
+            return {"kind": "unchanged", "cursor": requested_at}
+        if response.status_code != 200:
+            raise ValueError(f"Failed to fetch product. Status code: {response.status_code}")
+
+        payload = serialization.loads(response.content)
+        items = _items(payload)
+        hashes = {str(item.get("id")): _item_hash(item) for item in items}
+        changes: Dict[str, Any] = {
+            "etag": response.headers.get("ETag"),
+            "cursor": requested_at,
+            "hashes": hashes,
+            "bytes": len(response.content),
+        }
+
+        if full:
+            changes.update(kind="full", catalog=CatalogStore.from_items(items))
+            return changes
+
+        upserts = [item for item in items if self._hashes.get(str(item.get("id"))) != hashes[str(item.get("id"))]]
+        if self.mode == "cursor":
+            deleted = [str(pid) for pid in payload.get("data", {}).get("deleted_ids", []) or []]
+        else:
+            # Hash mode receives the whole catalog, so anything missing was removed upstream.
+            deleted = [pid for pid in self._hashes if pid not in hashes]
+        changes.update(kind="delta", upserts=upserts, deleted=deleted)
+        return changes
+
+    def apply(self, catalog: Optional[CatalogStore], changes: Dict[str, Any]) -> CatalogStore:
+        """Apply a change set from ``fetch`` and return the catalog to publish.
+
+        Deltas produce a new store (see ``CatalogStore.apply_changes``); ``catalog``
+        itself is never modified, so callers swap the result in with one assignment.
+        """
+        started = time.perf_counter()
+        kind = changes["kind"]
+        self._cursor = changes.get("cursor", self._cursor)
+        if changes.get("etag"):
+            self._etag = changes["etag"]
+
+        if kind == "full":
+            catalog = changes["catalog"]
+            self._hashes = changes["hashes"]
+            self._syncs_since_full = 0
+            counts = {"products": len(catalog)}
+        elif kind == "delta":
+            catalog, counts = catalog.apply_changes(changes["upserts"], changes["deleted"])
+            hashes = changes["hashes"]
+            for item in changes["upserts"]:
+                product_id = str(item.get("id"))
+                self._hashes[product_id] = hashes[product_id]
+            for product_id in changes["deleted"]:
+                self._hashes.pop(product_id, None)
+            self._syncs_since_full += 1
+        else:
+            counts = {}
+            self._syncs_since_full += 1
+
+        self.last_result = {
+            "kind": kind,
+            **counts,
+            "bytes": changes.get("bytes", 0),
+            "apply_ms": round((time.perf_counter() - started) * 1000, 2),
+            "version": catalog.version if catalog is not None else None,
+        }
+        logger.info(f"Catalog sync: {self.last_result}")
+        return catalog
+
+    def state(self) -> Dict[str, Any]:
+        """Resume point persisted alongside catalog snapshots."""
+        return {"etag": self._etag, "cursor": self._cursor}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self._etag = state.get("etag")
+        self._cursor = state.get("cursor")
+
+    def sync(self, catalog: Optional[CatalogStore]) -> CatalogStore:
+        return self.apply(catalog, self.fetch(catalog))
+
+
+def _items(payload: Any) -> List[Dict[str, Any]]:
+    if isinstance(payload, dict):
+        return payload.get("data", {}).get("items", []) or []
+    if isinstance(payload, list):
+        return payload
+    raise ValueError(f"Unsupported product payload type: {type(payload).__name__}")
+
+
+def _item_hash(item: Dict[str, Any]) -> bytes:
+    return hashlib.blake2b(serialization.dumps(item, sort_keys=True), digest_size=8).digest()
@@ -1,17 +1,37 @@
 # app/services/generator.py
-import os
+import json
 import time
 import uuid
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from google.genai import types
 from google.genai.errors import ClientError
 
-import cloudinary.uploader
+from app.config import (
+    GENAI_CLIENT,
+    INVITATION_BATCH_TOKEN_BUDGET,
+    INVITATION_BATCH_MAX_ITEMS,
+    INVITATION_BATCH_CONCURRENCY,
+    CARD_ART_CACHE_SIZE,
+    CARD_ART_CACHE_TTL_SECONDS,
+)
+from app.schemas.invite import InvitationBatchItem
+from app.services.assets import assets
+from app.services.card_overlay import art_key, build_art_prompt, render_card
+from app.services.model_router import router
+from app.services.storage import storage
+from app.utils.cache import TTLCache
+from app.utils.encoding import encode_image
+from app.utils.helper import response_image_bytes
+from app.utils.logger import get_logger
 
-from app.config import GENAI_CLIENT, GENERATED_DIR
+logger = get_logger(__name__)
+
+# Text-free card artwork per theme and style, shared by every personalization.
+art_cache = TTLCache(CARD_ART_CACHE_SIZE, CARD_ART_CACHE_TTL_SECONDS)
 
 # Build the same image prompt generator as in your notebook
 def build_image_prompt(data: Dict) -> str:
@@ -88,10 +108,10 @@ Only **one line**, no lists.
     # instruct language for the generated message
     lang = data.get("language", "en")
     prompt_text = f"{prompt_text}\nPlease write the invitation message in {lang}."
-    resp = GENAI_CLIENT.models.generate_content(
-        model="gemini-2.5-pro",
+    resp = router.call("invitation_text", lambda model: GENAI_CLIENT.models.generate_content(
+        model=model,
         contents=[types.Part(text=prompt_text)]
-    )
+    ))
     invitation_text = ""
     if resp.candidates:
         candidate = resp.candidates[0]
@@ -101,14 +121,99 @@ Only **one line**, no lists.
                     invitation_text += part.text.strip() + " "
     return invitation_text.strip()
 
+
+BATCH_INVITATION_PROMPT = """
+You are a cheerful, creative party planner AI.
+For **each** invitation request in the JSON array below, write **one short, unique, fun, heartwarming birthday invitation message**.
+Each message: **10-15 words**, playful, lively, and exciting, emojis if appropriate, only **one line**, no lists.
+Personalize it for the request's birthday_person_name turning age, match its theme, and write it in its language.
+Messages must differ from each other.
+Return one object per request with the request's "index" and its "message".
+
+Requests:
+"""
+# Rough size of one generated message (emojis and non-Latin scripts tokenize densely).
+INVITATION_OUTPUT_TOKENS = 48
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prompts; good enough to size chunks.
+    return len(text) // 4 + 1
+
+
+def _chunk_invitations(entries: List[Dict]) -> List[List[Dict]]:
+    """Split indexed requests into chunks that fit the per-call token budget."""
+    budget = INVITATION_BATCH_TOKEN_BUDGET - _estimate_tokens(BATCH_INVITATION_PROMPT)
+    chunks: List[List[Dict]] = []
+    current: List[Dict] = []
+    used = 0
+    for entry in entries:
+        cost = _estimate_tokens(json.dumps(entry, ensure_ascii=False)) + INVITATION_OUTPUT_TOKENS
+        if current and (used + cost > budget or len(current) >= INVITATION_BATCH_MAX_ITEMS):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(entry)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _generate_invitation_chunk(chunk: List[Dict]) -> Dict[int, str]:
+    resp = router.call("invitation_batch", lambda model: GENAI_CLIENT.models.generate_content(
+        model=model,
+        contents=[types.Part(text=BATCH_INVITATION_PROMPT + json.dumps(chunk, ensure_ascii=False))],
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=list[InvitationBatchItem],
+        ),
+    ))
+    items = resp.parsed
+    if items is None:
+        items = [InvitationBatchItem(**item) for item in json.loads(resp.text or "[]")]
+    return {item.index: item.message.strip() for item in items if item.message.strip()}
+
+
+def generate_invitation_texts(data_list: List[Dict]) -> List[str]:
+    """Generate one invitation message per request, many per model call.
+
+    Requests are packed into structured-output calls returning a JSON array, split by
+    ``INVITATION_BATCH_TOKEN_BUDGET``; chunks run in parallel. Any request the model
+    skipped (or whose chunk failed) falls back to ``generate_invitation_text``.
+    """
+    fields = ("birthday_person_name", "age", "theme", "description", "gender", "language")
+    entries = [
+        {"index": i, **{key: data.get(key) for key in fields if data.get(key) is not None}}
+        for i, data in enumerate(data_list)
+    ]
+    chunks = _chunk_invitations(entries)
+    messages: Dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(INVITATION_BATCH_CONCURRENCY, len(chunks)))) as pool:
+        futures = [pool.submit(_generate_invitation_chunk, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                generated = future.result()
+            except Exception as e:
+                logger.error(f"Batch invitation chunk of {len(chunk)} failed, retrying per message: {e}")
+                continue
+            wanted = {entry["index"] for entry in chunk}
+            messages.update({i: text for i, text in generated.items() if i in wanted})
+
+    missing = [i for i in range(len(data_list)) if i not in messages]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(INVITATION_BATCH_CONCURRENCY, len(missing)))) as pool:
+            for i, text in zip(missing, pool.map(lambda i: generate_invitation_text(data_list[i]), missing)):
+                messages[i] = text
+    return [messages[i] for i in range(len(data_list))]
+
 def generate_birthday_card_image(data: Dict, output_prefix: str = "birthday_card") -> List[Dict]:
     prompt = build_image_prompt(data)
-    response = GENAI_CLIENT.models.generate_content(
-        model="gemini-2.5-flash-image-preview",
+    response = router.call("card_image", lambda model: GENAI_CLIENT.models.generate_content(
+        model=model,
         contents=[types.Part(text=prompt)]
-    )
+    ))
 
-    uploaded = []
+    images = []
     # Candidate might have inline_data parts with raw bytes
     candidate = response.candidates[0]
     for i, part in enumerate(candidate.content.parts):
@@ -118,15 +223,58 @@ def generate_birthday_card_image(data: Dict, output_prefix: str = "birthday_card
             image = Image.open(BytesIO(raw))
             if image.mode in ("RGBA", "P"):
                 image = image.convert("RGB")
+            images.append(image)
+    return store_card_images(images, output_prefix)
+
+
+def generate_card_art(data: Dict) -> bytes:
+    """Text-free artwork for the card's theme and style, from ``art_cache`` when possible."""
+    key = art_key(data)
+    art = art_cache.get(key)
+    if art is not None:
+        logger.info("Serving card artwork from cache")
+        return art
+    response = router.call("card_image", lambda model: GENAI_CLIENT.models.generate_content(
+        model=model,
+        contents=[types.Part(text=build_art_prompt(data))]
+    ))
+    art = response_image_bytes(response)
+    if art is None:
+        raise ValueError("Model returned no card artwork.")
+    art_cache.set(key, art)
+    return art
+
+
+def generate_overlay_card(data: Dict, output_prefix: str = "birthday_card") -> Tuple[str, List[Dict]]:
+    """Invitation text and a card whose text is set locally on generated artwork.
+
+    The artwork does not depend on the text, so both model calls run concurrently. If
+    the text call fails, the request's own ``message`` (if any) is used instead.
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        art_future = pool.submit(generate_card_art, data)
+        text_future = pool.submit(generate_invitation_text, data)
+        art = art_future.result()
+        try:
+            invitation_text = text_future.result()
+        except Exception as e:
+            logger.error(f"Invitation text failed, using the request message: {e}")
+            invitation_text = data.get("message") or ""
+    card = render_card(Image.open(BytesIO(art)), data, invitation_text)
+    return invitation_text, store_card_images([card], output_prefix)
+
+
+def store_card_images(images: List[Image.Image], output_prefix: str = "birthday_card") -> List[Dict]:
+    """Encode and upload card images; local copies are kept in the size-capped asset cache."""
+    with assets.namespace() as namespace:
+        saved = []
+        for image in images:
+            encoded, encoder = encode_image(image, "card")
+            fname = f"{output_prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}.{encoder.extension}"
+            saved.append((namespace.write(fname, encoded), "birthday_cards"))
 
-            fname = f"{output_prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
-            local_path = os.path.join(GENERATED_DIR, fname)
-            image.save(local_path)
-
-            # Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(local_path, folder="birthday_cards")
-            uploaded.append({
-                "url": upload_result.get("secure_url"),
-                "public_id": upload_result.get("public_id")
-            })
-    return uploaded
+        # Upload all images in parallel
+        uploaded = storage.put_many_sync(saved)
+        for local_path, folder in saved:
+            namespace.keep(local_path, folder)
+    return [{"url": u["url"], "public_id": u.get("public_id")} for u in uploaded]
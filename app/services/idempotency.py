@@ -0,0 +1,110 @@
+# app/services/idempotency.py
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from app.config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_ROUTES
+from app.utils.cache import TTLCache
+from app.utils.metrics import metrics
+from app.utils import serialization
+
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    fingerprint: str
+
+    @property
+    def failed(self) -> bool:
+        """Server error, or a 200 whose JSON body reports ``{"error": ...}`` (as ``/party_generate`` does)."""
+        if self.status_code >= 500:
+            return True
+        content_type = next((v for k, v in self.headers if k.lower() == b"content-type"), b"")
+        if not content_type.startswith(b"application/json"):
+            return False
+        try:
+            body = serialization.loads(self.body)
+        except ValueError:
+            return False
+        return isinstance(body, dict) and "error" in body
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request (other body, query or route)."""
+
+
+def fingerprint(method: str, path: str, query: str, body: bytes) -> str:
+    digest = hashlib.sha256(f"{method} {path}?{query}\n".encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Results of expensive POST requests, keyed by the client's ``Idempotency-Key``.
+
+    The first request with a key runs; retries with the same key wait for that run
+    instead of starting another, and later retries get the stored response until it
+    expires. Failures (5xx, or an ``{"error": ...}`` body) are not stored, so the next
+    retry runs again. Entries live in this worker's memory only: with several uvicorn
+    workers, a retry routed to another worker runs the request again.
+    """
+
+    def __init__(self, ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS, maxsize: int = IDEMPOTENCY_MAX_ENTRIES,
+                 routes=IDEMPOTENCY_ROUTES):
+        self.routes = frozenset(routes)
+        self.results = TTLCache(maxsize, ttl_seconds)
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    def applies(self, method: str, path: str) -> bool:
+        return method == "POST" and (path.rstrip("/") or "/") in self.routes
+
+    async def execute(self, key: str, request_fingerprint: str,
+                      run: Callable[[], Awaitable[StoredResponse]]) -> Tuple[StoredResponse, bool]:
+        """Response for ``key`` and whether it was replayed rather than produced by this call."""
+        while True:
+            stored = self.results.get(key)
+            if stored is not None:
+                if stored.fingerprint != request_fingerprint:
+                    raise IdempotencyConflict(key)
+                metrics.incr("idempotency.replayed")
+                return stored, True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            if inflight[0] != request_fingerprint:
+                raise IdempotencyConflict(key)
+            metrics.incr("idempotency.attached")
+            try:
+                return await asyncio.shield(inflight[1]), True
+            except asyncio.CancelledError:
+                if not inflight[1].cancelled():
+                    raise
+                # The original request was cancelled (client went away): run it here instead.
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (request_fingerprint, future)
+        try:
+            response = await run()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here; attached retries re-raise it
+            raise
+        finally:
+            del self._inflight[key]
+        if not response.failed:
+            self.results.set(key, response)
+        future.set_result(response)
+        metrics.incr("idempotency.executed")
+        return response, False
+
+
+idempotency = IdempotencyStore()
@@ -0,0 +1,162 @@
+# app/services/model_router.py
+import time
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+import httpx
+from google.genai.errors import ClientError, ServerError
+
+from app.config import (
+    MODEL_ROUTES, MODEL_LATENCY_SLOS, MODEL_ROUTER_WINDOW, MODEL_ROUTER_MIN_SAMPLES,
+    MODEL_ROUTER_MAX_ERROR_RATE, MODEL_ROUTER_PROBE_SECONDS,
+)
+from app.utils.deadline import DeadlineExceeded, current_deadline
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """Errors that say the model is overloaded or slow, rather than that the request is bad."""
+    if isinstance(error, DeadlineExceeded):
+        return False  # the request's budget ran out before the call; says nothing about the model
+    if isinstance(error, ClientError):
+        return error.code == 429
+    return isinstance(error, (ServerError, TimeoutError, httpx.TimeoutException))
+
+
+class ModelStats:
+    """Latencies and outcomes of the last ``window`` calls of one task to one model."""
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.last_call = 0.0
+
+    def p90(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class ModelRouter:
+    """Picks the model for each call from the task's ordered tiers.
+
+    The first tier meeting the task's p90 latency objective with an acceptable error
+    rate is used. A tier is also skipped when its p90 would not fit in the remaining
+    request deadline. Skipped tiers get a probe call every ``probe_seconds`` so they
+    are promoted again once they recover. A call failing with an availability error
+    (5xx, 429, timeout) moves on to the next faster tier.
+    """
+
+    def __init__(self, routes: Dict[str, List[str]] = MODEL_ROUTES, slos: Dict[str, float] = MODEL_LATENCY_SLOS,
+                 window: int = MODEL_ROUTER_WINDOW, min_samples: int = MODEL_ROUTER_MIN_SAMPLES,
+                 max_error_rate: float = MODEL_ROUTER_MAX_ERROR_RATE, probe_seconds: float = MODEL_ROUTER_PROBE_SECONDS):
+        self.routes = routes
+        self.slos = slos
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.probe_seconds = probe_seconds
+        self._stats: Dict[Tuple[str, str], ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, task: str, model: str) -> ModelStats:
+        key = (task, model)
+        if key not in self._stats:
+            self._stats[key] = ModelStats(self.window)
+        return self._stats[key]
+
+    def _healthy(self, task: str, stats: ModelStats) -> bool:
+        if len(stats.outcomes) < self.min_samples:
+            return True
+        if stats.error_rate() > self.max_error_rate:
+            return False
+        p90 = stats.p90()
+        if p90 is None:
+            return True
+        deadline = current_deadline()
+        budget = self.slos[task] if deadline is None else min(self.slos[task], deadline.remaining())
+        return p90 <= budget
+
+    def choose(self, task: str) -> Tuple[int, bool]:
+        """Index of the tier to call for ``task``, and whether the call probes a demoted tier."""
+        tiers = self.routes[task]
+        now = time.monotonic()
+        probe = False
+        with self._lock:
+            for index, model in enumerate(tiers[:-1]):
+                stats = self._stats_for(task, model)
+                if self._healthy(task, stats):
+                    break
+                if now - stats.last_call >= self.probe_seconds:
+                    probe = True
+                    metrics.incr(f"router.{task}.probes")
+                    break
+            else:
+                index = len(tiers) - 1
+            self._stats_for(task, tiers[index]).last_call = now
+        if index:
+            metrics.incr(f"router.{task}.demoted")
+        return index, probe
+
+    def record(self, task: str, model: str, seconds: float, ok: bool, probe: bool = False) -> None:
+        with self._lock:
+            stats = self._stats_for(task, model)
+            if probe and ok and seconds <= self.slos[task]:
+                # A demoted tier answered within the objective again: forget the bad period.
+                stats.latencies.clear()
+                stats.outcomes.clear()
+            stats.outcomes.append(ok)
+            if ok:
+                stats.latencies.append(seconds)
+        prefix = f"router.{task}.{model}"
+        metrics.incr(f"{prefix}.calls")
+        metrics.incr(f"{prefix}.seconds", seconds)
+        if not ok:
+            metrics.incr(f"{prefix}.errors")
+
+    def call(self, task: str, fn: Callable[[str], T]) -> T:
+        """Run ``fn(model)`` on the routed model, falling back to faster tiers on availability errors."""
+        tiers = self.routes[task]
+        index, probe = self.choose(task)
+        while True:
+            model = tiers[index]
+            started = time.monotonic()
+            try:
+                result = fn(model)
+            except Exception as e:
+                # Bad requests say nothing about the model's health.
+                if not is_unavailable(e):
+                    raise
+                self.record(task, model, time.monotonic() - started, ok=False)
+                if index + 1 >= len(tiers):
+                    raise
+                index, probe = index + 1, False
+                metrics.incr(f"router.{task}.fallbacks")
+                logger.warning(f"{model} unavailable for {task}, falling back to {tiers[index]}: {e}")
+                continue
+            self.record(task, model, time.monotonic() - started, ok=True, probe=probe)
+            return result
+
+    def gauges(self) -> Dict[str, float]:
+        """Current p90 latency and error rate per task and model, for ``GET /metrics``."""
+        gauges = {}
+        with self._lock:
+            for (task, model), stats in self._stats.items():
+                p90 = stats.p90()
+                if p90 is not None:
+                    gauges[f"router.{task}.{model}.p90_seconds"] = round(p90, 3)
+                gauges[f"router.{task}.{model}.error_rate"] = round(stats.error_rate(), 3)
+        return gauges
+
+
+router = ModelRouter()
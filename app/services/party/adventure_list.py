@@ -1,6 +1,9 @@
 from googleapiclient.discovery import build
 import os
 from dotenv import load_dotenv
+
+from app.utils.deadline import check_deadline
+
 load_dotenv(override=True)
 # Load API key
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")  # অথবা সরাসরি string হিসেবে লিখতে পারো
@@ -16,6 +19,7 @@ def search_youtube_videos(query: str, max_results: int = 5):
         type="video",
         maxResults=max_results
     )
+    check_deadline("youtube search")
     search_response = search_request.execute()
 
     # Get video IDs
@@ -26,6 +30,7 @@ def search_youtube_videos(query: str, max_results: int = 5):
         part="snippet,statistics",
         id=",".join(video_ids)
     )
+    check_deadline("youtube details")
     video_response = video_request.execute()
 
     # Format results
@@ -0,0 +1,118 @@
+# app/services/party/batch.py
+import asyncio
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config import PARTY_BATCH_CONCURRENCY
+from app.schemas.schema import PartyInput
+from app.services.catalog.store import CatalogStore
+from app.services.party.party import PartyPlanGenerator, personalize_plan, plan_template_key, theme_key
+from app.utils.logger import get_logger, log_context
+
+logger = get_logger(__name__)
+
+
+class BatchPartyPlanner:
+    """Plans many parties at once, running each shared stage once per distinct key.
+
+    Stage keys:
+        plan     ``plan_template_key`` (theme, age, budget band, activities):
+                 inputs sharing it get one placeholder plan, personalized per input;
+                 an input alone in its key gets a plan written for its exact details
+        youtube  (theme, age)
+        gifts    (budget, age, suggested gift names)
+
+    Stage calls are blocking SDK calls; they run in worker threads, with at most
+    ``concurrency`` in flight across the batch. ``cancel`` stops whatever has not
+    finished (e.g. when a streaming client disconnects).
+    """
+
+    def __init__(
+        self,
+        catalog: CatalogStore,
+        generator: Optional[PartyPlanGenerator] = None,
+        concurrency: int = PARTY_BATCH_CONCURRENCY,
+    ):
+        self.catalog = catalog
+        self.generator = generator or PartyPlanGenerator()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._stages: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._tasks: List[asyncio.Future] = []
+        self._plan_keys: Counter = Counter()
+        self.stats = {"inputs": 0, "plan_calls": 0, "youtube_calls": 0, "gifts_calls": 0, "shared_hits": 0}
+
+    def _shared(self, stage: str, key: Hashable, fn: Callable, *args) -> Awaitable:
+        """Return the (possibly already running) result of ``fn(*args)`` for this stage key."""
+        future = self._stages.get((stage, key))
+        if future is not None:
+            self.stats["shared_hits"] += 1
+            return future
+
+        async def run():
+            async with self._semaphore:
+                self.stats[f"{stage}_calls"] += 1
+                with log_context(stage=stage):
+                    return await asyncio.to_thread(fn, *args)
+
+        future = self._stages[(stage, key)] = asyncio.ensure_future(run())
+        return future
+
+    async def plan_one(self, party_input: PartyInput) -> Dict[str, Any]:
+        generator = self.generator
+        theme = party_input.party_details.theme
+        age = party_input.person_age
+        try:
+            music = self._shared(
+                "youtube", (theme_key(theme), age),
+                generator.generate_youtube_links, theme, age,
+            )
+            key = plan_template_key(party_input)
+            template = None
+            if self._plan_keys[key] > 1:
+                template = await self._shared("plan", key, generator.plan_template, key)
+            if template is not None:
+                party_json = personalize_plan(template, party_input)
+                suggested_gifts_list = party_json.get("🎁 Suggested Gifts", [])
+            else:
+                # Alone in its key, or the template was unusable: plan for the exact details.
+                party_json, suggested_gifts_list = await self._shared(
+                    "plan", party_input.model_dump_json(),
+                    generator.generate_party_plan, party_input,
+                )
+            gifts_json = await self._shared(
+                "gifts", (party_input.budget, age, tuple(suggested_gifts_list)),
+                generator.suggested_gifts, self.catalog, party_input.budget,
+                suggested_gifts_list, len(suggested_gifts_list), age,
+            )
+            return generator.build_party_json(party_json, gifts_json, await music)
+        except Exception as e:
+            logger.error(f"Error in batch party plan: {e}")
+            return {"error": str(e)}
+
+    def _start(self, inputs: List[PartyInput]) -> None:
+        self.stats["inputs"] = len(inputs)
+        self._plan_keys = Counter(plan_template_key(party_input) for party_input in inputs)
+
+    def cancel(self) -> None:
+        """Cancel unfinished plans and stage calls (threads already running finish on their own)."""
+        for future in [*self._tasks, *self._stages.values()]:
+            future.cancel()
+
+    async def run(self, inputs: List[PartyInput]) -> List[Dict[str, Any]]:
+        """Plan every input; results come back in input order."""
+        self._start(inputs)
+        return await asyncio.gather(*(self.plan_one(party_input) for party_input in inputs))
+
+    async def stream(self, inputs: List[PartyInput]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield ``(input index, result)`` as each plan completes."""
+        self._start(inputs)
+
+        async def indexed(index: int, party_input: PartyInput):
+            return index, await self.plan_one(party_input)
+
+        self._tasks = [asyncio.ensure_future(indexed(i, p)) for i, p in enumerate(inputs)]
+        try:
+            for next_done in asyncio.as_completed(self._tasks):
+                yield await next_done
+        finally:
+            self.cancel()
@@ -0,0 +1,45 @@
+# app/services/party/gift_memo.py
+import re
+from typing import Hashable, List, Optional
+
+from app.config import GIFT_MEMO_SIZE
+from app.services.catalog.store import CatalogStore
+from app.utils.cache import TTLCache
+
+_PARENTHESES = re.compile(r"\([^)]*\)")
+_WORD = re.compile(r"\w+")
+_ARTICLES = {"a", "an", "the"}
+
+
+def gift_key(name: str) -> str:
+    """``"A LEGO Set (ages 8+)"`` -> ``"lego set"``: case, punctuation, notes and articles dropped."""
+    words = _WORD.findall(_PARENTHESES.sub(" ", str(name)).lower())
+    while words and words[0] in _ARTICLES:
+        words.pop(0)
+    return " ".join(words)
+
+
+class GiftMatchMemo:
+    """Ranked product ids per normalized gift name and catalog segment.
+
+    Lives on one catalog version (see ``gift_memo``), so a refresh starts a new,
+    empty memo instead of serving ids the catalog no longer holds. Empty lists are
+    remembered too: a gift with no match in its budget band stays unmatched until the
+    catalog changes.
+    """
+
+    def __init__(self, maxsize: int = GIFT_MEMO_SIZE):
+        self._matches = TTLCache(maxsize, float("inf"))
+
+    def get(self, gift: str, segment: Hashable) -> Optional[List[str]]:
+        return self._matches.get((gift, segment))
+
+    def set(self, gift: str, segment: Hashable, product_ids: List[str]) -> None:
+        self._matches.set((gift, segment), product_ids)
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+
+def gift_memo(catalog: CatalogStore) -> GiftMatchMemo:
+    return catalog.derived("gift_memo", lambda _: GiftMatchMemo())
@@ -1,68 +1,168 @@
-import google.generativeai as genai
 from sympy import product
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from google.api_core.exceptions import ServiceUnavailable
+from google.genai import types
+from google.genai.errors import ServerError
+import re
 import json
-from typing import List, Dict, Any, Union
-from app.config import PRODUCT_MODEL, GEMINI_API_KEY, PARTY_PLANNER_PROMPT, PRODUCT_PROMPT
-from app.utils.logger import get_logger
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+from app.config import (
+    GENAI_CLIENT, PARTY_PLANNER_PROMPT,
+    PRODUCT_PROMPT_PREFIX, PRODUCT_PROMPT_SUFFIX, PROMPT_BUDGET_BANDS,
+    PLAN_CACHE_TTL_SECONDS, YOUTUBE_CACHE_TTL_SECONDS, RESULT_CACHE_SIZE, PARTY_MIN_STAGE_SECONDS,
+    GIFT_MATCHES_PER_GIFT,
+)
+from app.utils import serialization
+from app.utils.cache import TTLCache
+from app.utils.deadline import Deadline, stop_at_deadline, with_deadline
+from app.utils.metrics import metrics
+from app.utils.logger import get_logger, log_context, log_payload
 from app.schemas.schema import PartyInput
+from app.schemas.structured import PartyPlanOutput, GiftProduct, GiftRankingOutput, GiftMatchOutput
+from app.utils.structured import parse_structured, StructuredOutputError
 from app.services.party.adventure_list import search_youtube_videos
-from app.utils.helper import filter_data
+from app.services.catalog.store import CatalogStore, GIFT_FIELDS
+from app.services.catalog.filters import budget_band, candidate_rows, filter_segment
+from app.services.prompt_cache import prompt_cache
+from app.services.party.gift_memo import gift_key, gift_memo
+from app.services.model_router import router
 
 logger = get_logger(__name__)
 
+# Plan templates are generated with placeholders and personalized per request.
+PLAN_PLACEHOLDERS = {
+    "person_name": "{{NAME}}",
+    "party_date": "{{DATE}}",
+    "location": "{{LOCATION}}",
+    "num_guests": "{{GUESTS}}",
+    "budget": "{{BUDGET}}",
+}
+PLAN_TEMPLATE_INSTRUCTIONS = """
+        Values in double braces are placeholders filled in later. Copy {{{{NAME}}}}, {{{{DATE}}}},
+        {{{{LOCATION}}}}, {{{{GUESTS}}}} and {{{{BUDGET}}}} exactly as written wherever you mention them,
+        and always refer to the birthday person as {{{{NAME}}}}. Do not assume a number of guests:
+        give food and supply quantities per guest (e.g. "2 cupcakes per guest").
+        Plan for a total budget of {budget_range}.
+    """
+# Placeholders the model reformatted ("{{ name }}", "{NAME}") are repaired before checking.
+_NEAR_PLACEHOLDER = re.compile(r"\{+\s*(NAME|DATE|LOCATION|GUESTS|BUDGET)\s*\}+", re.IGNORECASE)
+_BRACE = re.compile(r"[{}]")
+
+plan_cache = TTLCache(RESULT_CACHE_SIZE, PLAN_CACHE_TTL_SECONDS)
+youtube_cache = TTLCache(RESULT_CACHE_SIZE, YOUTUBE_CACHE_TTL_SECONDS)
+
+
+def theme_key(theme: str) -> str:
+    return " ".join(theme.lower().split())
+
+
+def plan_template_key(party_input: PartyInput) -> Tuple:
+    """Everything a plan template depends on: theme, age, budget band and activities.
+
+    Name, date, location, guest count and the exact budget are placeholders in the
+    template (quantities are written per guest), filled in by ``personalize_plan``.
+    """
+    activities = tuple(sorted({theme_key(a) for a in party_input.party_details.favorite_activities}))
+    return (theme_key(party_input.party_details.theme), party_input.person_age,
+            budget_band(party_input.budget), activities)
+
+
+def checked_template(template: Any) -> Any:
+    """``template`` with reformatted placeholders repaired, or None if it cannot be personalized.
+
+    A usable template names the birthday person through ``{{NAME}}`` and has no other
+    brace fragments left (a mangled placeholder would reach the user verbatim).
+    """
+    strings: List[str] = []
+
+    def repair(value: Any) -> Any:
+        if isinstance(value, str):
+            value = _NEAR_PLACEHOLDER.sub(lambda m: "{{" + m.group(1).upper() + "}}", value)
+            strings.append(value)
+            return value
+        if isinstance(value, list):
+            return [repair(item) for item in value]
+        if isinstance(value, dict):
+            return {key: repair(item) for key, item in value.items()}
+        return value
+
+    template = repair(template)
+    if not any("{{NAME}}" in text for text in strings):
+        return None
+    if any(_BRACE.search(_NEAR_PLACEHOLDER.sub("", text)) for text in strings):
+        return None
+    return template
+
+
+def personalize_plan(template: Any, party_input: PartyInput) -> Any:
+    """Copy of a plan template with the placeholders replaced by this party's details."""
+    if isinstance(template, str):
+        for field, placeholder in PLAN_PLACEHOLDERS.items():
+            value = getattr(party_input, field)
+            template = template.replace(placeholder, f"{value:g}" if isinstance(value, float) else str(value))
+        return template
+    if isinstance(template, list):
+        return [personalize_plan(item, party_input) for item in template]
+    if isinstance(template, dict):
+        return {key: personalize_plan(value, party_input) for key, value in template.items()}
+    return template
+
 
 class PartyPlanGenerator:
     @staticmethod
     def model_client():
-        """Configure Gemini AI client."""
-        try:
-            genai.configure(api_key=GEMINI_API_KEY)
-            config = genai.GenerationConfig(response_mime_type="application/json")
-            return genai, config
-        except Exception as e:
-            logger.error(f"Error in model client: {e}")
-            raise e
+        """Gemini client and a config constraining output to the party plan schema."""
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=PartyPlanOutput,
+        )
+        return GENAI_CLIENT, config
 
     @retry(
-        stop=stop_after_attempt(3),
+        stop=stop_after_attempt(3) | stop_at_deadline,
         wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(ServiceUnavailable),
+        retry=retry_if_exception_type((ServerError, StructuredOutputError)),
     )
-    def _make_api_call(self, client, model, contents, config):
-        """Call Gemini AI with retries."""
-        model_instance = client.GenerativeModel(model)
-        return model_instance.generate_content(
+    def _make_api_call(self, client, task, contents, config):
+        """Call Gemini AI and parse the plan, retrying server errors and unrepairable output."""
+        response = router.call(task, lambda model: client.models.generate_content(
+            model=model,
             contents=contents,
-            generation_config=config
-        )
+            config=with_deadline(config, task),
+        ))
+        return parse_structured(response, PartyPlanOutput, "party_plan", coerce=PartyPlanOutput.from_sections)
+
+    def _plan_json(self, instructions: str = "", **fields) -> Dict[str, Any]:
+        party_prompt = [
+            {
+                "parts": [
+                    {"text": PARTY_PLANNER_PROMPT.format(**fields) + instructions}
+                ]
+            }
+        ]
+        client, config = self.model_client()
+        plan = self._make_api_call(client, "party_plan", party_prompt, config)
+        return plan.to_sections()
 
     def generate_party_plan(self, party_input: PartyInput):
         """Generate party plan JSON using AI."""
         try:
-            party_prompt = [
-                {
-                    "parts": [
-                        {"text": PARTY_PLANNER_PROMPT.format(
-                            person_name=party_input.person_name,
-                            person_age=party_input.person_age,
-                            theme=party_input.party_details.theme,   # ✅ fixed
-                            favorite_activities=party_input.party_details.favorite_activities,  # ✅ fixed
-                            num_guests=party_input.num_guests,
-                            budget=party_input.budget,
-                            party_date=party_input.party_date,
-                            location=party_input.location
-                        )}
-                    ]
-                }
-            ]
-
-            logger.info("Generating party plan...")
-            client, config = self.model_client()
-            response = self._make_api_call(client, PRODUCT_MODEL, party_prompt, config)
-            raw_text = response.text.strip()
-            party_json = json.loads(raw_text)
+            template = plan_cache.get(plan_template_key(party_input))
+            if template is not None:
+                logger.info("Serving party plan from pre-warmed template")
+                party_json = personalize_plan(template, party_input)
+            else:
+                logger.info("Generating party plan...")
+                party_json = self._plan_json(
+                    person_name=party_input.person_name,
+                    person_age=party_input.person_age,
+                    theme=party_input.party_details.theme,   # ✅ fixed
+                    favorite_activities=party_input.party_details.favorite_activities,  # ✅ fixed
+                    num_guests=party_input.num_guests,
+                    budget=party_input.budget,
+                    party_date=party_input.party_date,
+                    location=party_input.location
+                )
 
             # Extract suggested gifts
             suggested_gifts = party_json.get("🎁 Suggested Gifts", [])
@@ -72,99 +172,267 @@ class PartyPlanGenerator:
             logger.error(f"Error in generate_party_plan: {e}")
             raise e
 
+    def plan_template(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Placeholder plan for a ``plan_template_key``; generated and cached on a miss."""
+        template = plan_cache.get(key)
+        return template if template is not None else self.warm_plan_template(key)
+
+    def warm_plan_template(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Generate and cache the placeholder plan for a ``plan_template_key``.
+
+        Returns None (and caches nothing) when the model did not keep the placeholders.
+        """
+        theme, age, band, activities = key
+        if band is None:
+            budget_range = f"more than ${PROMPT_BUDGET_BANDS[-1]}"
+        else:
+            lower = max([b for b in PROMPT_BUDGET_BANDS if b < band], default=0)
+            budget_range = f"${lower}-${band}"
+        template = checked_template(self._plan_json(
+            PLAN_TEMPLATE_INSTRUCTIONS.format(budget_range=budget_range),
+            person_age=age,
+            theme=theme,
+            favorite_activities=list(activities),
+            **PLAN_PLACEHOLDERS,
+        ))
+        if template is None:
+            metrics.incr("party.plan_template.rejected")
+            logger.warning(f"Plan template for {theme!r} lost its placeholders; not cached")
+            return None
+        plan_cache.set(key, template)
+        return template
+
+
+    @retry(
+        stop=stop_after_attempt(3) | stop_at_deadline,
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(ServerError),
+    )
+    def _make_cached_call(self, task, catalog: CatalogStore, prefix, suffix, segment=None):
+        """Call Gemini with a catalog prefix that is context-cached per catalog version."""
+        return router.call(task, lambda model: prompt_cache.generate(
+            task=task,
+            model=model,
+            version=catalog.version,
+            prefix=prefix,
+            suffix=suffix,
+            config=with_deadline(types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=GiftMatchOutput,
+            ), task),
+            segment=segment,
+        ))
+
+    def rank_gifts(self, catalog: CatalogStore, budget: float, suggested_gifts: List[str], top_n: int,
+                   age: Optional[int] = None) -> Dict[str, Any]:
+        """Detailed gift info JSON: one product per suggested gift, up to ``top_n``; errors propagate.
+
+        Matches are memoized per gift name, budget band and age group for the catalog
+        version, so only gift names not seen before go to the model. A gift whose band
+        matches are all above this exact budget is matched again at the exact budget
+        (memoized per budget), instead of being dropped.
+        """
+        band = budget_band(budget)
+        segment = filter_segment(catalog, age=age, band=band)
+        memo = gift_memo(catalog)
+        keys = [gift_key(gift) for gift in suggested_gifts]
+
+        def catalog_prefix() -> str:
+            # Same for every request in this budget band and age group until the catalog changes.
+            indices = candidate_rows(catalog, age=age, max_price=band)
+            return PRODUCT_PROMPT_PREFIX + serialization.dumps_text(catalog.records(indices, GIFT_FIELDS))
 
-    def suggested_gifts(self, product_list: List[str], suggested_gifts: List[str], top_n: int):
+        matches = self._gift_matches(catalog, memo, keys, segment, segment, catalog_prefix,
+                                     band if band is not None else budget)
+
+        # Pick the best unused match within this budget for each gift, in plan order.
+        chosen, used, over_budget = {}, set(), []
+
+        def choose(position: int, ids: Optional[List[str]]) -> None:
+            rows = [(pid, row) for pid, row in ((pid, catalog.get(pid)) for pid in ids or []) if row is not None]
+            for pid, row in rows:
+                if pid in used or (row.price is not None and row.price > budget):
+                    continue
+                used.add(pid)
+                chosen[position] = row
+                return
+            if rows and all(row.price is not None and row.price > budget for _, row in rows):
+                over_budget.append(position)
+
+        for position, key in enumerate(keys):
+            choose(position, matches[key])
+        # Only gifts whose band matches all cost too much can gain from an exact-budget call.
+        # Above the top band the first call already ran at the exact budget.
+        rematch, over_budget = over_budget, []
+        if rematch and band is not None:
+            metrics.incr("party.gift_memo.exact_budget", len(rematch))
+            exact = self._gift_matches(catalog, memo, [keys[p] for p in rematch], segment, (segment, budget),
+                                       catalog_prefix, budget)
+            for position in rematch:
+                choose(position, exact[keys[position]])
+
+        products = [GiftProduct(**chosen[p].to_dict(GiftProduct.model_fields)) for p in sorted(chosen)]
+        return GiftRankingOutput(products=products[:top_n]).model_dump()
+
+    def _gift_matches(self, catalog: CatalogStore, memo, keys: List[str], segment, memo_segment,
+                      catalog_prefix, budget: float) -> Dict[str, Optional[List[str]]]:
+        """Ranked product ids per gift key: memo hits, plus one model call for the rest."""
+        matches = {key: memo.get(key, memo_segment) for key in keys}
+        unseen = [key for key in matches if matches[key] is None]
+        metrics.incr("party.gift_memo.hits", len(matches) - len(unseen))
+        metrics.incr("party.gift_memo.misses", len(unseen))
+        if not unseen:
+            return matches
+
+        suffix = PRODUCT_PROMPT_SUFFIX.format(
+            suggested_gifts=serialization.dumps_text(dict(enumerate(unseen))),
+            budget=budget,
+            per_gift=GIFT_MATCHES_PER_GIFT,
+        )
+        logger.info(f"Matching {len(unseen)} new gift names...")
+        response = self._make_cached_call("gift_ranking", catalog, catalog_prefix, suffix, segment=segment)
+        log_payload(logger, "Gift matching response", getattr(response, "text", None))
+        for match in parse_structured(response, GiftMatchOutput, "gift_matching").matches:
+            if 0 <= match.index < len(unseen):
+                ids = [pid for pid in match.product_ids if catalog.get(pid) is not None]
+                key = unseen[match.index]
+                matches[key] = ids[:GIFT_MATCHES_PER_GIFT]
+                memo.set(key, memo_segment, matches[key])
+        return matches
+
+    def suggested_gifts(self, catalog: CatalogStore, budget: float, suggested_gifts: List[str], top_n: int,
+                        age: Optional[int] = None):
         """Generate detailed gift info JSON using AI."""
         try:
-            gifts_prompt = [
-                {
-                    "parts": [
-                        {"text": PRODUCT_PROMPT.format(
-                            product_json=product_list,
-                            suggested_gifts=suggested_gifts,
-                            top_n=top_n
-                        )}
-                    ]
-                }
-            ]
-            print("gift_prompt--------------------",gifts_prompt)
-            logger.info("Generating detailed gift list...")
-            client, config = self.model_client()
-            print("prompt--------------------",gifts_prompt)
-            response = self._make_api_call(client, PRODUCT_MODEL, gifts_prompt, config)
-            
-            
-            print("api response--------------------------",response)
-            raw_text = response.text.strip()
-            gifts_json = json.loads(raw_text)
-            return gifts_json
-
+            return self.rank_gifts(catalog, budget, suggested_gifts, top_n, age)
         except Exception as e:
             logger.error(f"Error in suggested_gifts: {e}")
             return []
-        
-        
+
+    def fetch_youtube_links(self, theme: str, age: int) -> List[dict]:
+        """YouTube music/movie links for the party (cached per theme and age); errors propagate."""
+        key = (theme_key(theme), age)
+        videos = youtube_cache.get(key)
+        if videos is not None:
+            return videos
+        query = f"fun party music/song for age {age} with theme {theme}"
+        videos = search_youtube_videos(query, max_results=5)
+        if videos:
+            youtube_cache.set(key, videos)
+        return videos
 
     def generate_youtube_links(self, theme: str, age: int) -> List[dict]:
         """Fetch YouTube music/movie links for the party."""
         try:
-            query = f"fun party music/song for age {age} with theme {theme}"
-            videos = search_youtube_videos(query, max_results=5)
-            return videos
+            return self.fetch_youtube_links(theme, age)
         except Exception as e:
             logger.error(f"Error in generate_youtube_links: {e}")
             return []
 
-    def generate_full_party_json(self, party_input: PartyInput, product: Union[dict, list]) -> Dict[str, Any]:
+    def generate_full_party_json(self, party_input: PartyInput, catalog: CatalogStore) -> Dict[str, Any]:
         """Generate final structured party JSON for frontend."""
-        if isinstance(product, list):
-            if not product:
-                return {"error": "Product data is empty. Please load products first."}
-            product = product[0]  # safe now
+        if not len(catalog):
+            return {"error": "Product data is empty. Please load products first."}
         try:
             # 1️⃣ AI Party Plan
-            party_json, suggested_gifts_list = self.generate_party_plan(party_input)
-            print("gfparty--------------------",suggested_gifts_list)
-           
-            logger.info(f"Party Plan JSON: {party_json}")
-            
-            new_party_ideas = {
-                "🎨 Theme & Decorations": party_json.get("🎨 Theme & Decorations", []),
-                "🎉 Fun Activities": party_json.get("🎉 Fun Activities", []),
-                "🍔 Food & Treats": party_json.get("🍔 Food & Treats", []),
-                "🛍️ Party Supplies": party_json.get("🛍️ Party Supplies", []),
-                "⏰ Party Timeline": party_json.get("⏰ Party Timeline", [])
-            }
-            logger.info(f"Suggested Gifts List: {suggested_gifts_list}")
+            with log_context(stage="plan"):
+                party_json, suggested_gifts_list = self.generate_party_plan(party_input)
+                log_payload(logger, "Party plan", party_json)
+                logger.info(f"Party plan ready with {len(suggested_gifts_list)} suggested gifts")
             # 2️⃣ YouTube links
-            music_links = self.generate_youtube_links(
-                theme=party_input.party_details.theme,   # ✅ fixed
-                age=party_input.person_age
-            )
-            
-            filtered_data = filter_data(product, party_input.budget)
+            with log_context(stage="youtube"):
+                music_links = self.generate_youtube_links(
+                    theme=party_input.party_details.theme,   # ✅ fixed
+                    age=party_input.person_age
+                )
 
             # 3️⃣ Detailed Gift Suggestions
-            gifts_json = self.suggested_gifts(
-                product_list=filtered_data,
-                suggested_gifts=suggested_gifts_list,
-                top_n=len(suggested_gifts_list),
-            )
-            print("giftjson---------------------",gifts_json)
-            logger.info(f"Detailed Gifts JSON: {gifts_json}")
-
-            
-            
-            return {
-                "party_plan": new_party_ideas,
-                "suggested_gifts": gifts_json,
-                "adventure_song_movie_links": music_links
-            }
+            with log_context(stage="gifts"):
+                gifts_json = self.suggested_gifts(
+                    catalog=catalog,
+                    budget=party_input.budget,
+                    suggested_gifts=suggested_gifts_list,
+                    top_n=len(suggested_gifts_list),
+                    age=party_input.person_age,
+                )
+                log_payload(logger, "Detailed gifts", gifts_json)
+
+            return self.build_party_json(party_json, gifts_json, music_links)
 
         except Exception as e:
             logger.error(f"Error generating full party JSON: {e}")
             raise e
 
+    async def generate_party_json_within(self, party_input: PartyInput, catalog: CatalogStore,
+                                         deadline: Deadline) -> Dict[str, Any]:
+        """``generate_full_party_json`` under a request deadline.
+
+        The plan is required: if it misses the deadline, ``DeadlineExceeded`` propagates.
+        YouTube links are fetched alongside the plan and gifts are ranked after it. An
+        optional stage that fails, times out or has less than ``PARTY_MIN_STAGE_SECONDS``
+        left to start is returned empty and named in ``degraded_sections``.
+        """
+        if not len(catalog):
+            return {"error": "Product data is empty. Please load products first."}
+        theme, age = party_input.party_details.theme, party_input.person_age
+        degraded = []
+        with deadline.use():
+            music = asyncio.ensure_future(self._run_stage(deadline, "youtube", self.fetch_youtube_links, theme, age))
+            try:
+                party_json, suggested_gifts_list = await self._run_stage(
+                    deadline, "plan", self.generate_party_plan, party_input)
+            except BaseException:
+                music.cancel()
+                raise
+
+            gifts_json = []
+            if deadline.remaining() < PARTY_MIN_STAGE_SECONDS:
+                degraded.append("suggested_gifts")
+            else:
+                try:
+                    gifts_json = await self._run_stage(
+                        deadline, "gifts", self.rank_gifts, catalog, party_input.budget,
+                        suggested_gifts_list, len(suggested_gifts_list), age)
+                except Exception as e:
+                    logger.warning(f"Gift suggestions degraded: {e}")
+                    degraded.append("suggested_gifts")
+
+            try:
+                music_links = await music
+            except Exception as e:
+                logger.warning(f"YouTube links degraded: {e}")
+                music_links = []
+                degraded.append("adventure_song_movie_links")
+
+        for section in degraded:
+            metrics.incr(f"party.degraded.{section}")
+        result = self.build_party_json(party_json, gifts_json, music_links)
+        result["degraded_sections"] = degraded
+        return result
+
+    @staticmethod
+    async def _run_stage(deadline: Deadline, stage: str, fn, *args):
+        # The worker thread inherits the deadline and log context, so retries and
+        # model calls inside it stop when the budget runs out.
+        with log_context(stage=stage):
+            return await deadline.run(asyncio.to_thread(fn, *args), stage)
+
+    @staticmethod
+    def build_party_json(party_json: Dict[str, Any], gifts_json: Any, music_links: List[dict]) -> Dict[str, Any]:
+        """Shape the stage outputs into the response the frontend expects."""
+        new_party_ideas = {
+            "🎨 Theme & Decorations": party_json.get("🎨 Theme & Decorations", []),
+            "🎉 Fun Activities": party_json.get("🎉 Fun Activities", []),
+            "🍔 Food & Treats": party_json.get("🍔 Food & Treats", []),
+            "🛍️ Party Supplies": party_json.get("🛍️ Party Supplies", []),
+            "⏰ Party Timeline": party_json.get("⏰ Party Timeline", [])
+        }
+        return {
+            "party_plan": new_party_ideas,
+            "suggested_gifts": gifts_json,
+            "adventure_song_movie_links": music_links
+        }
+
 
 
 if __name__ == "__main__":
@@ -181,31 +449,29 @@ if __name__ == "__main__":
             "favorite_activities": ["Treasure Hunt", "Magic Show"]
         }
     )
-    product = {
-        "data": [
-            {
-                "id": "1",
-                "title": "Superhero Cape",
-                "description": "A cool superhero cape for kids.",
-                "price": 20,
-                "theme": "Superhero"
-            },
-            {
-                "id": "2",
-                "title": "Magic Wand",
-                "description": "A magical wand for performing tricks.",
-                "price": 15,
-                "theme": "Magic"
-            },
-            {
-                "id": "3",
-                "title": "Treasure Chest",
-                "description": "A treasure chest filled with goodies.",
-                "price": 30,
-                "theme": "Pirate"
-            }
-        ]
-    }
+    product = CatalogStore.from_items([
+        {
+            "id": "1",
+            "title": "Superhero Cape",
+            "description": "A cool superhero cape for kids.",
+            "price": 20,
+            "theme": "Superhero"
+        },
+        {
+            "id": "2",
+            "title": "Magic Wand",
+            "description": "A magical wand for performing tricks.",
+            "price": 15,
+            "theme": "Magic"
+        },
+        {
+            "id": "3",
+            "title": "Treasure Chest",
+            "description": "A treasure chest filled with goodies.",
+            "price": 30,
+            "theme": "Pirate"
+        }
+    ])
 
     party_plan_generator = PartyPlanGenerator()
     full_party_json = party_plan_generator.generate_full_party_json(party_input, product)
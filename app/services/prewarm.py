@@ -0,0 +1,172 @@
+# app/services/prewarm.py
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.config import (
+    PREWARM_TOP_N,
+    PREWARM_MIN_REQUESTS,
+    PREWARM_DEMAND_HALF_LIFE_SECONDS,
+    PREWARM_INTERVAL_SECONDS,
+    PREWARM_QUOTA_SHARE,
+    MODEL_CALLS_PER_MINUTE,
+)
+from app.schemas.schema import PartyInput
+from app.services.party.party import PartyPlanGenerator, plan_cache, plan_template_key, theme_key, youtube_cache
+from app.services.t_shirt.shirt import TShirt, design_cache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Kinds of cached work a request can create demand for.
+PARTY = "party"
+SHIRT = "shirt"
+
+
+class DemandTracker:
+    """Exponentially decayed request counts per (kind, theme, age).
+
+    Each combination also remembers which variants (the rest of the cache key, e.g.
+    activities and budget band) were requested, so the most common one can be warmed.
+    ``inflight`` counts requests currently being served (see ``busy``); pre-warming
+    only runs while it is zero.
+    """
+
+    MAX_COMBOS = 1000
+    MAX_VARIANTS = 16
+
+    def __init__(self, half_life_seconds: float = PREWARM_DEMAND_HALF_LIFE_SECONDS):
+        self.half_life_seconds = half_life_seconds
+        self.inflight = 0
+        self._scores: Dict[Tuple, Tuple[float, float]] = {}  # combo -> (score, updated_at)
+        self._variants: Dict[Tuple, Counter] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated_at) / self.half_life_seconds)
+
+    def record(self, kind: str, theme: str, age: int, variant: Hashable) -> None:
+        now = time.monotonic()
+        combo = (kind, theme_key(theme), age)
+        with self._lock:
+            score, updated_at = self._scores.get(combo, (0.0, now))
+            self._scores[combo] = (self._decayed(score, updated_at, now) + 1.0, now)
+            variants = self._variants.setdefault(combo, Counter())
+            variants[variant] += 1
+            if len(variants) > self.MAX_VARIANTS:
+                del variants[min(variants, key=variants.get)]
+            if len(self._scores) > self.MAX_COMBOS:
+                coldest = min(self._scores, key=lambda c: self._decayed(*self._scores[c], now))
+                del self._scores[coldest]
+                del self._variants[coldest]
+
+    @contextmanager
+    def busy(self):
+        """Mark a request as in flight for the duration of the block."""
+        with self._lock:
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+    def top(self, kind: str, n: int, min_score: float = 0.0) -> List[Tuple[float, Hashable]]:
+        """Hottest combinations of ``kind`` as (score, most requested variant)."""
+        now = time.monotonic()
+        with self._lock:
+            scored = [
+                (self._decayed(score, updated_at, now), combo)
+                for combo, (score, updated_at) in self._scores.items()
+                if combo[0] == kind
+            ]
+            scored = sorted((s for s in scored if s[0] >= min_score), reverse=True)[:n]
+            return [(score, self._variants[combo].most_common(1)[0][0]) for score, combo in scored]
+
+
+class QuotaShare:
+    """Token bucket refilled at ``share`` of the upstream per-minute call quota."""
+
+    def __init__(self, calls_per_minute: float = MODEL_CALLS_PER_MINUTE, share: float = PREWARM_QUOTA_SHARE,
+                 burst_seconds: float = PREWARM_INTERVAL_SECONDS):
+        self.rate = calls_per_minute * share / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = 0.0
+        self._updated_at = time.monotonic()
+
+    def try_spend(self, calls: int = 1) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self.tokens < calls:
+            return False
+        self.tokens -= calls
+        return True
+
+
+class Prewarmer:
+    """Fills the plan, YouTube and design caches for trending combinations while idle.
+
+    A run stops as soon as live generation traffic arrives or the quota share is spent.
+    """
+
+    def __init__(
+        self,
+        tracker: DemandTracker,
+        quota: Optional[QuotaShare] = None,
+        top_n: int = PREWARM_TOP_N,
+        min_requests: float = PREWARM_MIN_REQUESTS,
+    ):
+        self.tracker = tracker
+        self.quota = quota or QuotaShare()
+        self.top_n = top_n
+        self.min_requests = min_requests
+        self.generator = PartyPlanGenerator()
+        self.stats = {"runs": 0, "plans": 0, "youtube": 0, "designs": 0, "errors": 0, "skipped_busy": 0}
+
+    def _jobs(self):
+        for _, key in self.tracker.top(PARTY, self.top_n, self.min_requests):
+            theme, age = key[0], key[1]
+            if (theme, age) not in youtube_cache:
+                yield "youtube", lambda theme=theme, age=age: self.generator.generate_youtube_links(theme, age)
+            if key not in plan_cache:
+                yield "plans", lambda key=key: self.generator.warm_plan_template(key)
+        for _, key in self.tracker.top(SHIRT, self.top_n, self.min_requests):
+            if key not in design_cache:
+                theme, age, tshirt_type, gender, color = key
+                shirt = TShirt(tshirt_type, None, None, gender, age, theme, color)
+                yield "designs", shirt.generate_shirt_design_bytes
+
+    def run_once(self) -> Dict[str, int]:
+        """One idle-time pass. Blocking; run it in a worker thread."""
+        self.stats["runs"] += 1
+        for name, job in self._jobs():
+            if self.tracker.inflight:
+                self.stats["skipped_busy"] += 1
+                break
+            if not self.quota.try_spend():
+                break
+            try:
+                job()
+                self.stats[name] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Pre-warm {name} failed: {e}")
+        logger.info(f"Pre-warm pass: {self.stats}")
+        return self.stats
+
+
+demand = DemandTracker()
+
+
+def record_party_demand(party_input: PartyInput) -> None:
+    demand.record(PARTY, party_input.party_details.theme, party_input.person_age, plan_template_key(party_input))
+
+
+def record_shirt_demand(t_shirt: TShirt) -> None:
+    # Designs with a custom message are personal and never cached.
+    key = t_shirt.design_key
+    if key is not None:
+        demand.record(SHIRT, t_shirt.theme, t_shirt.age, key)
@@ -0,0 +1,197 @@
+# app/services/prompt_cache.py
+import time
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.genai import types
+from google.genai.errors import ClientError
+
+from app.config import GENAI_CLIENT, MODEL_ROUTES, PROMPT_CACHE_BACKEND, PROMPT_CACHE_TTL_SECONDS
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheEntry:
+    """One catalog prefix for a (task, segment) at a given catalog version.
+
+    The prefix text serves every model of the task; a remote cache (``name``) is
+    only created for ``model``, the task's preferred tier.
+    """
+
+    __slots__ = ("version", "prefix", "model", "name", "expires_at")
+
+    def __init__(self, version: str, prefix: str, model: str):
+        self.version = version
+        self.prefix = prefix
+        self.model = model
+        self.name: Optional[str] = None  # remote cached-content name, if any
+        self.expires_at = float("inf")
+
+
+class LocalContextCache:
+    """In-process stand-in for Gemini context caching (tests, offline runs).
+
+    Renders each catalog prefix once per catalog version and sends it inline with
+    the per-request suffix. ``stats`` counts hits, misses and invalidations so the
+    behaviour can be asserted without calling the API.
+
+    A miss renders and registers its prefix under a lock of its own key, so requests
+    for other keys never wait behind it; requests for the same key wait and reuse it.
+    """
+
+    def __init__(self, client=GENAI_CLIENT, ttl_seconds: int = PROMPT_CACHE_TTL_SECONDS):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.entries: Dict[Tuple[str, Any], CacheEntry] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, Any], threading.Lock] = {}
+
+    def generate(
+        self,
+        task: str,
+        model: str,
+        version: str,
+        prefix: Callable[[], str],
+        suffix: str,
+        config: Optional[types.GenerateContentConfig] = None,
+        segment: Any = None,
+    ):
+        """Call ``model`` with ``prefix() + suffix``, reusing the prefix for this catalog version.
+
+        ``prefix`` is only rendered on a miss. ``segment`` distinguishes prefixes that
+        differ within one catalog version (e.g. a budget band). Fallback tiers reuse
+        the rendered prefix inline instead of creating a cache of their own.
+        """
+        entry = self.entry(task, model, version, prefix, segment)
+        return self._call(entry, model, suffix, config)
+
+    def entry(self, task: str, model: str, version: str, prefix: Callable[[], str], segment: Any = None) -> CacheEntry:
+        key = (task, segment)
+        with self._lock:
+            entry = self._fresh(key, version)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._fresh(key, version)
+                if entry is not None:
+                    # Built by the request we waited for.
+                    self.stats["hits"] += 1
+                    return entry
+            tiers = MODEL_ROUTES.get(task)
+            entry = CacheEntry(version, prefix(), tiers[0] if tiers else model)
+            self._create(task, entry.model, entry)
+            with self._lock:
+                self.stats["misses"] += 1
+                stale = self.entries.get(key)
+                self.entries[key] = entry
+            if stale is not None:
+                self._invalidate(stale)
+            return entry
+
+    def retain(self, version: str) -> None:
+        """Invalidate every prefix that was built for another catalog version."""
+        with self._lock:
+            stale = [self.entries.pop(k) for k, e in list(self.entries.items()) if e.version != version]
+        for entry in stale:
+            self._invalidate(entry)
+
+    def _fresh(self, key, version: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is not None and entry.version == version and entry.expires_at > time.time():
+            return entry
+        return None
+
+    def _invalidate(self, entry: CacheEntry) -> None:
+        # Remote deletes run outside ``_lock`` so they never hold up other keys.
+        with self._lock:
+            self.stats["invalidations"] += 1
+        self._delete(entry)
+
+    # Hooks for remote backends -------------------------------------------
+    def _create(self, task: str, model: str, entry: CacheEntry) -> None:
+        pass
+
+    def _delete(self, entry: CacheEntry) -> None:
+        pass
+
+    def _call(self, entry: CacheEntry, model: str, suffix: str, config):
+        return self.client.models.generate_content(
+            model=model,
+            contents=[types.Part(text=entry.prefix + suffix)],
+            config=config,
+        )
+
+
+class GeminiContextCache(LocalContextCache):
+    """Creates a Gemini cached-content entry per catalog version and sends only the suffix.
+
+    Prefixes below the model's minimum cacheable size (or any create failure) fall back
+    to inline prompts for that version.
+    """
+
+    # Recreate a little before the server-side TTL runs out.
+    EXPIRY_MARGIN_SECONDS = 60
+
+    def _create(self, task: str, model: str, entry: CacheEntry) -> None:
+        try:
+            cached = self.client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    contents=[types.Content(role="user", parts=[types.Part(text=entry.prefix)])],
+                    display_name=f"{task}-{entry.version}",
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+            entry.name = cached.name
+            entry.expires_at = time.time() + self.ttl_seconds - self.EXPIRY_MARGIN_SECONDS
+            logger.info(f"Created context cache {cached.name} for {task} @ {entry.version}")
+        except Exception as e:
+            logger.info(f"Context cache unavailable for {task} @ {entry.version}, sending inline: {e}")
+
+    def _delete(self, entry: CacheEntry) -> None:
+        if entry.name is None:
+            return
+        try:
+            self.client.caches.delete(name=entry.name)
+        except Exception as e:
+            logger.info(f"Could not delete context cache {entry.name}: {e}")
+
+    def _call(self, entry: CacheEntry, model: str, suffix: str, config):
+        if entry.name is None or model != entry.model:
+            return super()._call(entry, model, suffix, config)
+        cached_config = (config or types.GenerateContentConfig()).model_copy(update={"cached_content": entry.name})
+        try:
+            return self.client.models.generate_content(
+                model=model,
+                contents=[types.Part(text=suffix)],
+                config=cached_config,
+            )
+        except ClientError as e:
+            # Expired or deleted server-side: stop using it and answer inline this time.
+            logger.info(f"Context cache {entry.name} rejected, sending inline: {e}")
+            entry.name = None
+            return super()._call(entry, model, suffix, config)
+
+
+class NoContextCache(LocalContextCache):
+    """Caching disabled: renders and sends the full prompt on every call."""
+
+    def entry(self, task: str, model: str, version: str, prefix: Callable[[], str], segment: Any = None) -> CacheEntry:
+        self.stats["misses"] += 1
+        return CacheEntry(version, prefix(), model)
+
+
+def create_prompt_cache(backend: str = PROMPT_CACHE_BACKEND) -> LocalContextCache:
+    backends = {"gemini": GeminiContextCache, "local": LocalContextCache, "off": NoContextCache}
+    if backend not in backends:
+        raise ValueError(f"Unknown prompt cache backend {backend!r}; expected one of {tuple(backends)}")
+    return backends[backend]()
+
+
+# Shared by the gift-ranking and recommendation prompts.
+prompt_cache = create_prompt_cache()
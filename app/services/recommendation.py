@@ -1,38 +1,72 @@
 # app/services/recommendation.py
-import requests
-import json
-import random
-from typing import List, Dict
+from collections import Counter
+from typing import Callable, List, Dict, Optional
 
-from app.config import PRODUCT_API, GENAI_CLIENT
 from google.genai import types
 
+from app.services.catalog.store import CatalogStore, RECOMMENDATION_FIELDS
+from app.services.catalog.pools import fallback_pools
+from app.services.catalog.filters import age_index, budget_band, candidate_rows, filter_segment
+from app.services.prompt_cache import prompt_cache
+from app.services.model_router import router
+from app.utils import serialization
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+from app.utils.structured import parse_structured
+
+logger = get_logger(__name__)
+
+
+# Catalog part of the prompt: identical for every request until the catalog changes,
+# so it is context-cached per catalog version.
+RECOMMENDATION_PROMPT_PREFIX = """
+You are a party planning expert. Given party details and a product catalog, recommend the best products for this party.
+
+Product Catalog (JSON):
+"""
+
+RECOMMENDATION_PROMPT_SUFFIX = """
+
+Party Theme: {theme}
+Party Activities: {activities}
+
+Task:
+1. Analyze the party theme and activities
+2. From the product catalog provided, select the TOP {limit} most relevant products that would be perfect for this party
+3. Return ONLY a JSON array with the product IDs of the recommended products
+4. Products should match the theme and support the activities
+
+Return ONLY the JSON array of product IDs, nothing else. Example format:
+["id1", "id2", "id3"]
+"""
+
 
 class RecommendationEngine:
     """AI-powered recommendation system for party products using Gemini."""
     
-    def __init__(self, api_url: str = PRODUCT_API):
-        self.api_url = api_url
-    
-    def fetch_products(self) -> List[Dict]:
-        """Fetch all products from the API with limit=100000."""
-        try:
-            params = {"limit": 100000}
-            response = requests.get(self.api_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                # Extract items from the API response
-                return data.get("data", {}).get("items", [])
-            else:
-                raise ValueError(f"Failed to fetch products. Status code: {response.status_code}")
-        except Exception as e:
-            raise ValueError(f"Error fetching products: {str(e)}")
+    def __init__(self, catalog: CatalogStore):
+        self.catalog = catalog
+
+    def _filter(self, party_details: Dict) -> Optional[Callable[[int], bool]]:
+        """Row predicate for the optional ``person_age``/``budget`` in ``party_details``."""
+        age = party_details.get("person_age")
+        budget = party_details.get("budget")
+        if age is None and budget is None:
+            return None
+        codes = set(age_index(self.catalog).matching_codes(age)) if age is not None else None
+        price, age_codes = self.catalog.price, self.catalog.age_ranges.codes
+
+        def accepts(index: int) -> bool:
+            if codes is not None and int(age_codes[index]) not in codes:
+                return False
+            return budget is None or price[index] <= budget
+
+        return accepts
     
     def get_ai_recommendations(
         self,
         theme: str,
         party_details: Dict,
-        products: List[Dict],
         limit: int = 10
     ) -> List[Dict]:
         """
@@ -41,89 +75,69 @@ class RecommendationEngine:
         Args:
             theme: Party theme
             party_details: Party details dict with theme and favorite_activities
-            products: List of all available products
             limit: Number of recommendations to return
         
         Returns:
             List of recommended products with all fields
         """
-        if not products:
+        try:
+            return self._ai_recommendations(theme, party_details, limit)
+        except Exception as e:
+            metrics.incr("recommendation.ai_errors")
+            logger.error(f"Error getting AI recommendations: {e}")
+        return []
+
+    def _ai_recommendations(self, theme: str, party_details: Dict, limit: int) -> List[Dict]:
+        """``get_ai_recommendations`` without the error handling."""
+        if not len(self.catalog):
             return []
         
-        # Create a mapping of product IDs to full product data for later retrieval
-        product_map = {p.get("id"): p for p in products}
+        age = party_details.get("person_age")
+        budget = party_details.get("budget")
+        band = budget_band(budget) if budget is not None else None
         
-        # Prepare product catalog for the AI (limited fields for prompt)
-        product_catalog = json.dumps([
-            {
-                "id": p.get("id"),
-                "title": p.get("title"),
-                "price": p.get("price"),
-                "avg_rating": p.get("avg_rating"),
-                "affiliated_company": p.get("affiliated_company"),
-                "age_range": p.get("age_range")
-            }
-            for p in products[:1000]  # Use first 1000 products to avoid token limits
-        ])
+        def catalog_prefix() -> str:
+            # Prepare product catalog for the AI (limited fields for prompt), narrowed
+            # to the age group and budget band first.
+            # Use first 1000 products to avoid token limits
+            indices = candidate_rows(self.catalog, age=age, max_price=band)
+            if indices is None:
+                indices = range(len(self.catalog))
+            product_catalog = serialization.dumps_text(
+                self.catalog.records(indices[:1000], RECOMMENDATION_FIELDS)
+            )
+            return RECOMMENDATION_PROMPT_PREFIX + product_catalog
         
-        # Build Gemini prompt
+        # Per-request part of the Gemini prompt
         activities = party_details.get("favorite_activities", [])
         activities_str = ", ".join(activities) if isinstance(activities, list) else str(activities)
+        suffix = RECOMMENDATION_PROMPT_SUFFIX.format(theme=theme, activities=activities_str, limit=limit)
         
-        prompt = f"""
-You are a party planning expert. Given party details and a product catalog, recommend the best products for this party.
-
-Party Theme: {theme}
-Party Activities: {activities_str}
-
-Product Catalog (JSON):
-{product_catalog}
-
-Task:
-1. Analyze the party theme and activities
-2. From the product catalog provided, select the TOP {limit} most relevant products that would be perfect for this party
-3. Return ONLY a JSON array with the product IDs of the recommended products
-4. Products should match the theme and support the activities
-
-Return ONLY the JSON array of product IDs, nothing else. Example format:
-["id1", "id2", "id3"]
-"""
-        
-        try:
-            response = GENAI_CLIENT.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=[types.Part(text=prompt)]
-            )
-            
-            # Extract and parse the response
-            if response.candidates:
-                candidate = response.candidates[0]
-                if candidate.content.parts:
-                    for part in candidate.content.parts:
-                        if hasattr(part, "text") and part.text:
-                            try:
-                                # Try to parse JSON from response
-                                text = part.text.strip()
-                                # Remove markdown code blocks if present
-                                if text.startswith("```"):
-                                    text = text.split("```")[1]
-                                    if text.startswith("json"):
-                                        text = text[4:]
-                                
-                                recommended_ids = json.loads(text)
-                                if isinstance(recommended_ids, list):
-                                    # Return full product objects from the map
-                                    recommendations = [
-                                        product_map[pid] for pid in recommended_ids
-                                        if pid in product_map
-                                    ]
-                                    return recommendations[:limit]
-                            except json.JSONDecodeError:
-                                pass
-        except Exception as e:
-            print(f"Error getting AI recommendations: {str(e)}")
+        response = router.call("recommendation", lambda model: prompt_cache.generate(
+            task="recommendation",
+            model=model,
+            version=self.catalog.version,
+            prefix=catalog_prefix,
+            suffix=suffix,
+            segment=filter_segment(self.catalog, age=age, band=band),
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=list[str],
+            ),
+        ))
+        recommended_ids = parse_structured(
+            response, List[str], "recommendation",
+            coerce=lambda ids: [str(pid) for pid in ids] if isinstance(ids, list) else ids,
+        )
         
-        return []
+        # Return full product objects from the catalog id index
+        rows = [row for row in (self.catalog.get(pid) for pid in recommended_ids) if row is not None]
+        metrics.incr("recommendation.unknown_ids", len(recommended_ids) - len(rows))
+        accepts = self._filter(party_details)
+        if accepts is not None:
+            # The prompt holds the whole budget band; enforce the exact budget here.
+            rows = [row for row in rows if accepts(row.index)]
+        return [row.to_item() for row in rows][:limit]
     
     def recommend_products(
         self,
@@ -132,7 +146,8 @@ Return ONLY the JSON array of product IDs, nothing else. Example format:
         limit: int = 10
     ) -> Dict:
         """
-        Main recommendation method: fetch products, use AI to recommend, and add random fallback if needed.
+        Main recommendation method: use AI to recommend from the shared catalog, and fill
+        missing slots from the precomputed popular-product pools.
         
         Args:
             theme: Party theme
@@ -142,10 +157,9 @@ Return ONLY the JSON array of product IDs, nothing else. Example format:
         Returns:
             Dictionary with recommendations and metadata
         """
-        # Fetch all products
-        products = self.fetch_products()
+        total_products = len(self.catalog)
         
-        if not products:
+        if not total_products:
             return {
                 "theme": theme,
                 "recommendations": [],
@@ -159,34 +173,47 @@ Return ONLY the JSON array of product IDs, nothing else. Example format:
         ai_recommendations = self.get_ai_recommendations(
             theme=theme,
             party_details=party_details,
-            products=products,
             limit=limit
         )
         
         has_random_fallback = False
         
-        # If AI didn't return enough recommendations, add random products
+        # If AI didn't return enough recommendations, add popular products from the
+        # age range/category the AI picks lean towards (overall best-rated otherwise)
         if len(ai_recommendations) < limit:
             remaining = limit - len(ai_recommendations)
-            ai_ids = {rec.get("id") for rec in ai_recommendations}
+            ai_rows = [self.catalog.get(rec.get("id")) for rec in ai_recommendations]
+            ai_rows = [row for row in ai_rows if row is not None]
+            age_range = _most_common(row.age_range for row in ai_rows)
+            category = _most_common(row.category for row in ai_rows)
             
-            # Get random products that weren't already recommended
-            available_random = [p for p in products if p.get("id") not in ai_ids]
-            random_products = random.sample(
-                available_random,
-                min(remaining, len(available_random))
+            picked = fallback_pools(self.catalog).pick(
+                remaining,
+                exclude=(row.index for row in ai_rows),
+                age_range=age_range,
+                category=category,
+                accept=self._filter(party_details),
             )
+            fallback_products = [row.to_item() for row in self.catalog.rows(picked)]
             
-            ai_recommendations.extend(random_products)
-            if random_products:
+            ai_recommendations.extend(fallback_products)
+            if fallback_products:
+                # Key name kept for API compatibility; the fill is popularity-ranked now.
                 has_random_fallback = True
+                metrics.incr("recommendation.fallbacks")
+                metrics.incr("recommendation.fallback_products", len(fallback_products))
         
         return {
             "theme": theme,
             "party_details": party_details,
             "recommendations": ai_recommendations[:limit],
-            "total_products_considered": len(products),
+            "total_products_considered": total_products,
             "recommendations_count": len(ai_recommendations[:limit]),
             "used_ai": True,
             "has_random_fallback": has_random_fallback,
         }
+
+
+def _most_common(values) -> Optional[str]:
+    counts = Counter(value for value in values if value)
+    return counts.most_common(1)[0][0] if counts else None
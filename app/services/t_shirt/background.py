@@ -0,0 +1,128 @@
+# app/services/t_shirt/background.py
+import time
+import asyncio
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from app.config import BACKGROUND_REMOVAL, REMBG_MODEL, BACKGROUND_REMOVAL_WORKERS
+from app.services.t_shirt import rembg_worker
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+class BackgroundRemover:
+    """Local background removal for generated designs (``rembg`` + ONNX Runtime).
+
+    Images go to a process pool whose workers each load the ONNX session once, in the
+    pool initializer, and keep it for their lifetime. The pool starts on first use,
+    and is replaced if a worker dies (``BrokenProcessPool``). Failures return the
+    original image: transparency is a finishing step and must never fail a design
+    request.
+    """
+
+    def __init__(self, model_name: str = REMBG_MODEL, workers: int = BACKGROUND_REMOVAL_WORKERS):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("rembg") is not None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs event-loop and SDK threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=rembg_worker.init_worker,
+                    initargs=(self.model_name,),
+                )
+                logger.info(f"Started {self.workers} background-removal workers ({self.model_name})")
+            return self._pool
+
+    def _reset(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool; the next image starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        metrics.incr("background_removal.pool_restarts")
+        logger.error("Background-removal pool broke; starting a new one on next use")
+
+    def _submit(self, data: bytes) -> Tuple[ProcessPoolExecutor, Future]:
+        pool = self._executor()
+        try:
+            return pool, pool.submit(rembg_worker.remove_background, data)
+        except BrokenProcessPool:
+            self._reset(pool)
+            pool = self._executor()
+            return pool, pool.submit(rembg_worker.remove_background, data)
+
+    def _failed(self, pool: ProcessPoolExecutor, data: bytes, error: Exception) -> bytes:
+        if pool is not None and isinstance(error, BrokenProcessPool):
+            self._reset(pool)
+        metrics.incr("background_removal.errors")
+        logger.error(f"Background removal failed, keeping original design: {error}")
+        return data
+
+    def _done(self, started: float, output: bytes, cpu_seconds: float) -> bytes:
+        metrics.incr("background_removal.images")
+        metrics.incr("background_removal.wall_seconds", time.perf_counter() - started)
+        metrics.incr("background_removal.cpu_seconds", cpu_seconds)
+        return output
+
+    def remove(self, data: bytes) -> bytes:
+        """PNG bytes of ``data`` with a transparent background (``data`` on failure).
+
+        Blocks until the pool answers; use ``remove_async`` on the event loop.
+        """
+        started = time.perf_counter()
+        pool = None
+        try:
+            pool, future = self._submit(data)
+            output, cpu_seconds = future.result()
+        except Exception as e:
+            return self._failed(pool, data, e)
+        return self._done(started, output, cpu_seconds)
+
+    async def remove_async(self, data: bytes) -> bytes:
+        """``remove`` for async endpoints: awaits the pool instead of blocking the loop."""
+        started = time.perf_counter()
+        pool = None
+        try:
+            pool, future = self._submit(data)
+            output, cpu_seconds = await asyncio.wrap_future(future)
+        except Exception as e:
+            return self._failed(pool, data, e)
+        return self._done(started, output, cpu_seconds)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+def create_background_remover(mode: str = BACKGROUND_REMOVAL) -> Optional[BackgroundRemover]:
+    if mode == "off":
+        return None
+    if mode != "rembg":
+        raise ValueError(f"Unknown background removal mode {mode!r}; expected 'off' or 'rembg'")
+    if not BackgroundRemover.available():
+        logger.error("BACKGROUND_REMOVAL=rembg but rembg is not installed; skipping background removal")
+        return None
+    return BackgroundRemover()
+
+
+# None when disabled; shared by every design request in this worker.
+background_remover = create_background_remover()
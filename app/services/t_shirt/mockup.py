@@ -0,0 +1,170 @@
+# app/services/t_shirt/mockup.py
+import re
+from io import BytesIO
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.config import MOCKUP_SIZE, MOCKUP_DISPLACEMENT
+
+# Named apparel colours (anything else: "#rrggbb" or the fallback grey).
+COLORS = {
+    "white": (245, 245, 243), "black": (28, 28, 30), "grey": (140, 142, 146), "gray": (140, 142, 146),
+    "heather grey": (170, 170, 172), "charcoal": (64, 66, 70), "navy": (30, 40, 80), "blue": (40, 90, 190),
+    "royal blue": (45, 75, 170), "sky blue": (120, 180, 230), "light blue": (150, 195, 235),
+    "red": (190, 30, 40), "maroon": (110, 25, 40), "pink": (240, 150, 180), "purple": (110, 60, 150),
+    "green": (40, 130, 70), "forest green": (35, 80, 50), "olive": (110, 110, 60), "yellow": (245, 210, 60),
+    "orange": (240, 120, 40), "brown": (110, 75, 50), "beige": (220, 205, 175), "cream": (240, 232, 210),
+}
+FALLBACK_COLOR = COLORS["grey"]
+
+# Silhouettes in unit coordinates (x right, y down), with the print area (x0, y0, x1, y1).
+SILHOUETTES = {
+    "tshirt": (
+        [(0.33, 0.08), (0.42, 0.12), (0.5, 0.14), (0.58, 0.12), (0.67, 0.08), (0.9, 0.2), (0.82, 0.36),
+         (0.74, 0.32), (0.74, 0.93), (0.26, 0.93), (0.26, 0.32), (0.18, 0.36), (0.1, 0.2)],
+        (0.34, 0.24, 0.66, 0.62),
+    ),
+    "tank": (
+        [(0.36, 0.06), (0.42, 0.06), (0.45, 0.2), (0.5, 0.24), (0.55, 0.2), (0.58, 0.06), (0.64, 0.06),
+         (0.66, 0.28), (0.72, 0.36), (0.72, 0.93), (0.28, 0.93), (0.28, 0.36), (0.34, 0.28)],
+        (0.36, 0.34, 0.64, 0.66),
+    ),
+    "sweatshirt": (
+        [(0.33, 0.08), (0.42, 0.11), (0.5, 0.13), (0.58, 0.11), (0.67, 0.08), (0.86, 0.18), (0.95, 0.84),
+         (0.85, 0.86), (0.76, 0.38), (0.75, 0.93), (0.25, 0.93), (0.24, 0.38), (0.15, 0.86), (0.05, 0.84),
+         (0.14, 0.18)],
+        (0.34, 0.24, 0.66, 0.6),
+    ),
+    "hoodie": (
+        [(0.38, 0.02), (0.5, 0.0), (0.62, 0.02), (0.67, 0.1), (0.86, 0.2), (0.95, 0.84), (0.85, 0.86),
+         (0.76, 0.4), (0.75, 0.93), (0.25, 0.93), (0.24, 0.4), (0.15, 0.86), (0.05, 0.84), (0.14, 0.2),
+         (0.33, 0.1)],
+        (0.35, 0.3, 0.65, 0.58),
+    ),
+}
+APPAREL_ALIASES = {
+    "t-shirt": "tshirt", "t shirt": "tshirt", "tee": "tshirt", "shirt": "tshirt", "tshirt": "tshirt",
+    "tank top": "tank", "tank": "tank", "singlet": "tank", "vest": "tank",
+    "sweatshirt": "sweatshirt", "sweater": "sweatshirt", "jumper": "sweatshirt", "long sleeve": "sweatshirt",
+    "hoodie": "hoodie", "hooded sweatshirt": "hoodie", "hoody": "hoodie",
+}
+
+
+def apparel_key(apparel_type: str) -> str:
+    value = " ".join(str(apparel_type or "").lower().replace("_", " ").split())
+    if value in APPAREL_ALIASES:
+        return APPAREL_ALIASES[value]
+    for alias, key in APPAREL_ALIASES.items():
+        if alias in value:
+            return key
+    return "tshirt"
+
+
+def parse_color(color: str) -> Tuple[int, int, int]:
+    value = " ".join(str(color or "").lower().split())
+    if re.fullmatch(r"#?[0-9a-f]{6}", value):
+        value = value.lstrip("#")
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    if value in COLORS:
+        return COLORS[value]
+    for name in sorted(COLORS, key=len, reverse=True):
+        if name in value:
+            return COLORS[name]
+    return FALLBACK_COLOR
+
+
+class ApparelTemplate:
+    """Pre-rendered apparel: fabric mask, shading map and displacement map.
+
+    The fold field drives both maps, so printed artwork bends and darkens with the
+    same creases the garment shows. The maps do not depend on the colour; the fabric
+    is tinted per mockup, so one template per apparel type serves every colour.
+    """
+
+    def __init__(self, mask: np.ndarray, shading: np.ndarray,
+                 displacement: Tuple[np.ndarray, np.ndarray], print_box: Tuple[int, int, int, int]):
+        self.mask = mask
+        self.shading = shading
+        self.displacement = displacement
+        self.print_box = print_box
+
+    @classmethod
+    def render(cls, apparel: str, size: int = MOCKUP_SIZE) -> "ApparelTemplate":
+        outline, box = SILHOUETTES[apparel]
+        mask_image = Image.new("L", (size, size), 0)
+        ImageDraw.Draw(mask_image).polygon([(x * size, y * size) for x, y in outline], fill=255)
+        mask_image = mask_image.filter(ImageFilter.GaussianBlur(size / 512))
+        mask = np.asarray(mask_image, dtype=np.float32) / 255.0
+
+        # Fold field: a few soft diagonal/vertical creases, deterministic per apparel type.
+        y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+        rng = np.random.default_rng(sum(map(ord, apparel)))
+        folds = np.zeros((size, size), dtype=np.float32)
+        for _ in range(6):
+            angle, frequency, phase = rng.uniform(-0.6, 0.6), rng.uniform(4, 11), rng.uniform(0, 2 * np.pi)
+            folds += np.sin((x * np.cos(angle) + y * np.sin(angle)) * frequency + phase) * rng.uniform(0.3, 1.0)
+        folds = np.asarray(
+            Image.fromarray(((folds - folds.min()) / np.ptp(folds) * 255).astype(np.uint8)).filter(
+                ImageFilter.GaussianBlur(size / 64)),
+            dtype=np.float32,
+        ) / 255.0 - 0.5
+
+        # Edge falloff: fabric darkens where it turns away from the camera.
+        inner = np.asarray(mask_image.filter(ImageFilter.GaussianBlur(size / 24)), dtype=np.float32) / 255.0
+        shading = (0.86 + 0.14 * inner) * (1.0 + 0.18 * folds) * (1.02 - 0.06 * y)
+        shading = shading.astype(np.float32)
+
+        # Displacement follows the fold slope, peaking at MOCKUP_DISPLACEMENT of the width.
+        dy, dx = np.gradient(folds)
+        scale = MOCKUP_DISPLACEMENT * size / max(float(np.abs(dx).max()), float(np.abs(dy).max()), 1e-6)
+        displacement = ((dx * scale).astype(np.float32), (dy * scale).astype(np.float32))
+
+        x0, y0, x1, y1 = (int(v * size) for v in box)
+        return cls(mask, shading, displacement, (x0, y0, x1, y1))
+
+    def tint(self, rgb: Tuple[int, int, int]) -> np.ndarray:
+        """The garment in ``rgb`` on a white background, shaded by the folds."""
+        mask = self.mask[..., None]
+        fabric = np.asarray(rgb, dtype=np.float32) * self.shading[..., None]
+        return np.clip(255.0 * (1 - mask) + fabric * mask, 0, 255)
+
+    def composite(self, design: Image.Image, rgb: Tuple[int, int, int]) -> Image.Image:
+        x0, y0, x1, y1 = self.print_box
+        design = design.convert("RGBA")
+        design.thumbnail((x1 - x0, y1 - y0), Image.LANCZOS)
+        art = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.float32)
+        left, top = (x1 - x0 - design.width) // 2, (y1 - y0 - design.height) // 2
+        art[top:top + design.height, left:left + design.width] = np.asarray(design, dtype=np.float32)
+
+        # Warp the artwork along the folds (bilinear remap, print area only).
+        dx, dy = (d[y0:y1, x0:x1] for d in self.displacement)
+        rows = np.clip(np.arange(y1 - y0, dtype=np.float32)[:, None] + dy, 0, y1 - y0 - 1.001)
+        cols = np.clip(np.arange(x1 - x0, dtype=np.float32)[None, :] + dx, 0, x1 - x0 - 1.001)
+        r, c = rows.astype(np.intp), cols.astype(np.intp)
+        fr, fc = (rows - r)[..., None], (cols - c)[..., None]
+        art = ((art[r, c] * (1 - fc) + art[r, c + 1] * fc) * (1 - fr)
+               + (art[r + 1, c] * (1 - fc) + art[r + 1, c + 1] * fc) * fr)
+
+        # Ink takes on the fabric's shading; alpha is clipped to the garment.
+        alpha = art[..., 3:4] / 255.0 * self.mask[y0:y1, x0:x1, None]
+        ink = art[..., :3] * self.shading[y0:y1, x0:x1, None]
+        out = self.tint(rgb)
+        out[y0:y1, x0:x1] = out[y0:y1, x0:x1] * (1 - alpha) + ink * alpha
+        return Image.fromarray(np.clip(out, 0, 255).astype(np.uint8), "RGB")
+
+
+@lru_cache(maxsize=len(SILHOUETTES))
+def get_template(apparel: str, size: int = MOCKUP_SIZE) -> ApparelTemplate:
+    return ApparelTemplate.render(apparel, size)
+
+
+def compose_mockup(design: bytes, apparel_type: str, color: str) -> Image.Image:
+    """Place a finished design on the apparel template.
+
+    Returns the image unencoded: the caller encodes it once with the mockup encoder.
+    """
+    template = get_template(apparel_key(apparel_type))
+    return template.composite(Image.open(BytesIO(design)), parse_color(color))
@@ -0,0 +1,23 @@
+# app/services/t_shirt/rembg_worker.py
+# Runs inside BackgroundRemover's worker processes. Kept free of app imports so a
+# spawned worker only loads rembg/onnxruntime, not the web app or its logging.
+import time
+
+_session = None
+
+
+def init_worker(model_name: str) -> None:
+    """Process-pool initializer: load the ONNX session once per worker process."""
+    global _session
+    from rembg import new_session
+
+    _session = new_session(model_name)
+
+
+def remove_background(data: bytes):
+    """Return ``(png_bytes, cpu_seconds)`` with the background made transparent."""
+    from rembg import remove
+
+    started = time.process_time()
+    output = remove(data, session=_session)
+    return output, time.process_time() - started
@@ -1,22 +1,34 @@
+import asyncio
 from google import genai
 from google.genai.types import GenerateContentConfig, Modality
-from typing import Optional
+from typing import Optional, Union
+from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from google.api_core.exceptions import ServiceUnavailable
 
+from app.utils.cache import TTLCache
 from app.utils.logger import get_logger
-from app.utils.helper import upload_image
-from app.config import IMAGE_ANALYSIS_PROMPT, GEMINI_API_KEY, MODEL_NAME, TEMPERATURE, SHIRT_MOCKUP_PROMPT
+from app.utils.helper import upload_image, response_image_bytes
+from app.services.t_shirt.background import background_remover
+from app.services.t_shirt.mockup import compose_mockup
+from app.services.model_router import router
+from app.config import (
+    IMAGE_ANALYSIS_PROMPT, GEMINI_API_KEY, TEMPERATURE, SHIRT_MOCKUP_PROMPT,
+    DESIGN_CACHE_TTL_SECONDS, DESIGN_CACHE_MAX_MB, RESULT_CACHE_SIZE, MOCKUP_MODE,
+)
 
 logger = get_logger(__name__)
 
+# Design image bytes for prompt-only designs (no reference image, no custom message).
+design_cache = TTLCache(RESULT_CACHE_SIZE, DESIGN_CACHE_TTL_SECONDS, max_bytes=DESIGN_CACHE_MAX_MB * 1024 * 1024)
+
 
 # 1. t-shirt Design
 # 2. t-shirt mockup
 
 class TShirt:
 
-    def __init__(self,tshirt_type, tshirt_size,apparel_type, gender, age, theme, color, message = None):
+    def __init__(self,tshirt_type, tshirt_size,apparel_type, gender, age, theme, color, message = None, variation = 0):
         self.tshirt_type = tshirt_type
         self.tshirt_size = tshirt_size
         self.apparel_type = apparel_type
@@ -25,7 +37,17 @@ class TShirt:
         self.theme = theme
         self.color = color
         self.message = message
+        self.variation = variation
+
 
+    @property
+    def design_key(self):
+        """Cache key for this design, or None when it is personal (custom message) or a
+        requested variation (a fresh design, never served from or stored in the cache)."""
+        if self.message or self.variation:
+            return None
+        return (" ".join(str(self.theme).lower().split()), self.age,
+                str(self.tshirt_type).lower(), str(self.gender).lower(), str(self.color).lower())
 
     ## model
     @staticmethod
@@ -50,12 +72,12 @@ class TShirt:
         wait = wait_exponential(multiplier = 1, min = 4, max = 10),
         retry = retry_if_exception_type(ServiceUnavailable)
     )
-    def _make_api_call(self, client, model, contents, config):
-        return client.models.generate_content(
+    def _make_api_call(self, client, task, contents, config):
+        return router.call(task, lambda model: client.models.generate_content(
             model=model,
             contents=contents,
             config=config
-        )
+        ))
 
     ## T-Shirt Design
     def generate_shirt_design(self, ref_img_path : Optional[str] = None):
@@ -84,20 +106,86 @@ class TShirt:
             ## Model
             logger.info("Generating t-shirt design...")
             client, config = self.model_client()
+            if self.variation:
+                config = config.model_copy(update={"seed": self.variation})
 
             # response = client.models.generate_content(
             #     model=MODEL_NAME,
             #     contents=t_shirt_content,
             #     config=config
             # )
-            response = self._make_api_call(client, MODEL_NAME, t_shirt_content, config)
+            response = self._make_api_call(client, "tshirt_design", t_shirt_content, config)
             logger.info("T-shirt design generated successfully.")
             return response
         except Exception as e:
             logger.error(f"Error in shirt design: {e}")
             raise e
 
-    # T-Shirt Mockup Design
+    def generate_shirt_design_bytes(self, ref_img_path: Optional[str] = None) -> bytes:
+        """Finished design image bytes.
+
+        The background is removed locally when ``BACKGROUND_REMOVAL`` is on. Prompt-only
+        designs are served from ``design_cache`` when pre-warmed or repeated. Blocking;
+        async endpoints use ``generate_shirt_design_bytes_async``.
+        """
+        key, data = self._cached_design(ref_img_path)
+        if data is None:
+            data = self._model_design_bytes(ref_img_path)
+            if background_remover is not None:
+                logger.info("Removing design background...")
+                data = background_remover.remove(data)
+            self._store_design(key, data)
+        return data
+
+    async def generate_shirt_design_bytes_async(self, ref_img_path: Optional[str] = None) -> bytes:
+        """``generate_shirt_design_bytes`` without blocking the event loop."""
+        key, data = self._cached_design(ref_img_path)
+        if data is None:
+            data = await asyncio.to_thread(self._model_design_bytes, ref_img_path)
+            if background_remover is not None:
+                logger.info("Removing design background...")
+                data = await background_remover.remove_async(data)
+            self._store_design(key, data)
+        return data
+
+    def _cached_design(self, ref_img_path: Optional[str]):
+        key = self.design_key if ref_img_path is None else None
+        data = design_cache.get(key) if key is not None else None
+        if data is not None:
+            logger.info("Serving t-shirt design from cache")
+        return key, data
+
+    def _model_design_bytes(self, ref_img_path: Optional[str]) -> bytes:
+        data = response_image_bytes(self.generate_shirt_design(ref_img_path))
+        if data is None:
+            raise ValueError("Model returned no design image.")
+        return data
+
+    @staticmethod
+    def _store_design(key, data: bytes) -> None:
+        if key is not None:
+            design_cache.set(key, data)
+
+    def generate_shirt_mockup_image(self, design_path: str, premium: bool = False) -> Union[Image.Image, bytes]:
+        """Mockup for a saved design, ready for ``save_image_bytes`` to encode once.
+
+        Composited locally onto an apparel template (an unencoded image) unless
+        ``premium`` is set or ``MOCKUP_MODE`` is ``model``; those make the image-model
+        mockup call instead (its image bytes). Blocking (model call or ~0.5 s of
+        NumPy); async callers run it in a thread.
+        """
+        if not premium and MOCKUP_MODE == "local":
+            try:
+                with open(design_path, "rb") as f:
+                    return compose_mockup(f.read(), self.apparel_type, self.color)
+            except Exception as e:
+                logger.error(f"Local mockup failed, falling back to the model: {e}")
+        data = response_image_bytes(self.generate_shirt_mockup(design_path))
+        if data is None:
+            raise ValueError("Model returned no mockup image.")
+        return data
+
+    # T-Shirt Mockup Design (premium: image model)
     def generate_shirt_mockup(self, generated_design):
         try:
             t_shirt_mockup_content = [
@@ -119,7 +207,7 @@ class TShirt:
             #     config=config
             # )
             response = self._make_api_call(
-                client, MODEL_NAME, t_shirt_mockup_content, config)
+                client, "tshirt_mockup", t_shirt_mockup_content, config)
             logger.info("T-shirt mockup generated successfully.")
             return response
         except Exception as e:
@@ -0,0 +1,93 @@
+# app/utils/deadline.py
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+from google.genai import types
+
+T = TypeVar("T")
+C = TypeVar("C", bound=types.GenerateContentConfig)
+
+_current: ContextVar[Optional["Deadline"]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before a stage finished."""
+
+
+class Deadline:
+    """Absolute point in time a request must answer by.
+
+    Installed with ``use()``, it is visible to every stage of the request through a
+    context variable (copied into ``asyncio.to_thread`` workers). Retries stop and
+    model calls time out when it runs out.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @contextmanager
+    def use(self):
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """Await ``awaitable`` within the remaining budget, else raise ``DeadlineExceeded``."""
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded during {stage}")
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def stop_at_deadline(retry_state) -> bool:
+    """tenacity stop condition: no retry whose wait would outlast the current deadline."""
+    deadline = current_deadline()
+    return deadline is not None and deadline.remaining() <= (retry_state.upcoming_sleep or 0)
+
+
+def check_deadline(stage: str = "call") -> None:
+    """Raise ``DeadlineExceeded`` if the current deadline has run out.
+
+    ``Deadline.run`` only cancels the awaiting coroutine; the worker thread keeps going.
+    Checking before each outbound call stops it from spending quota on a dead request.
+    """
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded before {stage}")
+
+
+def deadline_http_options() -> Optional[types.HttpOptions]:
+    """Per-call HTTP timeout (ms) for Gemini requests made under a deadline."""
+    deadline = current_deadline()
+    if deadline is None:
+        return None
+    return types.HttpOptions(timeout=max(1, int(deadline.remaining() * 1000)))
+
+
+def with_deadline(config: C, stage: str = "call") -> C:
+    """``config`` with its HTTP timeout set to what is left of the current deadline.
+
+    Call it per attempt (inside retries and model fallbacks), not once per request,
+    so later attempts never outlive the request. Raises ``DeadlineExceeded`` if
+    nothing is left.
+    """
+    check_deadline(stage)
+    options = deadline_http_options()
+    return config if options is None else config.model_copy(update={"http_options": options})
@@ -1,33 +1,9 @@
-import os
-from PIL import Image
-from io import BytesIO
 import mimetypes
 import json
-import cloudinary
-from cloudinary.uploader import upload
-import shutil
 import requests
 
-from app.config import CLOUDINARY_API_KEY, CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_SECRET, GENERATED_IMG_PATH
-
-cloudinary.config(
-    cloud_name = CLOUDINARY_CLOUD_NAME,
-    api_key = CLOUDINARY_API_KEY,
-    api_secret = CLOUDINARY_API_SECRET
-)
-
-
-def cloudinary_file_upload(file_path):
-    try:
-        result = upload(
-            file = file_path,
-            resource_type = "auto",
-            folder = "generated_images"
-        )
-
-        return result['secure_url']
-    except Exception as e:
-        raise ValueError(str(e))
+from app.utils import serialization
+from app.utils.encoding import encode_image
 
 
 def upload_image(image_path):
@@ -40,17 +16,20 @@ def upload_image(image_path):
 
     return {"mime_type": mime_type, "data": image_data}
 
-def response_data_img(response):
-    os.makedirs(GENERATED_IMG_PATH, exist_ok=True)
-    temp_file_path = os.path.join(GENERATED_IMG_PATH, "generated_image.png")
-
+def response_image_bytes(response):
+    """Raw bytes of the last image part in a model response, or None."""
+    data = None
     for part in response.candidates[0].content.parts:
         if part.inline_data is not None:
-            image = Image.open(BytesIO(part.inline_data.data))
-            image.save(temp_file_path)
-            # image.show()
+            data = part.inline_data.data
+    return data
+
 
-    return temp_file_path
+def save_image_bytes(data, namespace, asset="design"):
+    """Encode ``data`` with the asset type's encoder (see ``app.utils.encoding``) and save it
+    into the request's asset namespace."""
+    encoded, encoder = encode_image(data, asset)
+    return namespace.write(f"{asset}.{encoder.extension}", encoded)
 
 
 def load_json(json_data, JsonOpject):
@@ -62,33 +41,13 @@ def load_json(json_data, JsonOpject):
     except Exception as e:
         raise ValueError(str(e))
 
-def delete_file(file_path):
-    if os.path.exists(file_path):
-        shutil.rmtree(file_path)
-
 
 
 def request_product(url):
     response = requests.get(url)
     if response.status_code == 200:
-        product = response.json()
+        product = serialization.loads(response.content)
         return product
     else:
         raise ValueError(f"Failed to fetch product. Status code: {response.status_code}")
 
-
-def filter_data(data, price):
-    filtered_items = [
-        {
-            "id": item["id"],
-            "title": item["title"],
-            "price": item["price"],
-            "avg_rating": item["avg_rating"],
-            "link": item["link"],
-            "image_url": item["image_url"],
-            "affiliated_company": item["affiliated_company"]
-        }
-        for item in data["data"]["items"]
-        if item["price"] <= price
-    ]
-    return filtered_items
\ No newline at end of file
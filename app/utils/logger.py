@@ -1,8 +1,18 @@
+import json
+import queue
+import atexit
+import random
 import logging
+import logging.handlers
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from typing import Any, Dict
 
-from app.config import LOG_DIR
+from app.config import LOG_DIR, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_MAX_FIELD_CHARS, LOG_PAYLOAD_SAMPLE_RATE
+from app.utils.metrics import metrics
 
 # make dir
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -10,20 +20,104 @@ os.makedirs(LOG_DIR, exist_ok=True)
 # log file name
 LOG_FILE = os.path.join(LOG_DIR, f"log_{datetime.now().strftime('%Y_%m_%d-%H_%M_%S')}.log")
 
-LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Fields attached to every record logged in the current request/stage (see ``log_context``).
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def truncate(text: str, limit: int = LOG_MAX_FIELD_CHARS) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", {}))
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Runs in the calling thread: formats, truncates and enqueues without waiting.
+
+    File I/O happens on the listener thread. When the queue is full the record is
+    dropped and counted as ``logging.dropped`` rather than stalling a request.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.msg = truncate(record.msg)
+        record.context = _context.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.incr("logging.dropped")
+
+
+def _configure() -> None:
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        file_handler = logging.FileHandler(LOG_FILE)
+        file_handler.setFormatter(JsonFormatter())
+        records = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        root = logging.getLogger()
+        root.addHandler(NonBlockingQueueHandler(records))
+        root.setLevel(LOG_LEVEL)
+        _listener = logging.handlers.QueueListener(records, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records to the file and stop the writer thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
 ## Function
 def get_logger(name : str) -> logging.Logger:
-    logger = logging.getLogger(name)
+    _configure()
+    return logging.getLogger(name)
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach ``fields`` (e.g. ``request_id``, ``stage``) to records logged inside the block.
+
+    Context variables follow ``asyncio`` tasks and ``asyncio.to_thread``.
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
 
-    if not logger.handlers:
-        logging.basicConfig(
-            filename=LOG_FILE,
-            format=LOG_FORMAT,
-            datefmt=DATE_FORMAT,
-            level = logging.INFO
-        )
 
-    return logger
+def log_payload(logger: logging.Logger, message: str, payload: Any, level: int = logging.DEBUG,
+                sample_rate: float = LOG_PAYLOAD_SAMPLE_RATE, **fields) -> None:
+    """Log a large payload (plans, model responses) for a sample of calls only.
 
+    Nothing is serialised unless the level is enabled and the call is sampled; the
+    serialised payload is truncated to ``LOG_MAX_FIELD_CHARS``.
+    """
+    if not logger.isEnabledFor(level) or random.random() >= sample_rate:
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str, ensure_ascii=False)
+    logger.log(level, message, extra={"fields": {**fields, "payload": truncate(text)}})
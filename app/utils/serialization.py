@@ -0,0 +1,54 @@
+# app/utils/serialization.py
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same JSON, only slower
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(obj: Any) -> Any:
+    # NumPy values from catalog columns become plain numbers and lists (orjson hands over
+    # arrays it cannot serialize natively, e.g. non-contiguous ones). Anything else is a
+    # bug in the caller: fail as ``json.dumps`` would instead of writing its str().
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Compact UTF-8 JSON (no ASCII escaping), as Starlette's ``JSONResponse`` writes it."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys,
+                      default=_default).encode("utf-8")
+
+
+def dumps_text(obj: Any, sort_keys: bool = False) -> str:
+    """``dumps`` as ``str``, for prompt text."""
+    return dumps(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from ``bytes``/``str``; decodes large upstream payloads without a ``str`` copy."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: ``dumps`` instead of the stdlib encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,70 @@
+import re
+import json
+from typing import Any, Callable, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.utils.logger import get_logger
+from app.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class StructuredOutputError(ValueError):
+    """Model output could not be parsed or repaired into the expected schema."""
+
+
+def loads_lenient(text: str) -> Tuple[Any, bool]:
+    """``json.loads`` that also survives the usual model slips.
+
+    Handles code fences, prose around the JSON and trailing commas. Returns
+    ``(value, repaired)``.
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+    candidate = _FENCE.sub("", text.strip())
+    starts = [i for i in (candidate.find("{"), candidate.find("[")) if i != -1]
+    if starts:
+        start = min(starts)
+        end = candidate.rfind("}" if candidate[start] == "{" else "]")
+        if end > start:
+            candidate = candidate[start:end + 1]
+    candidate = _TRAILING_COMMA.sub(r"\1", candidate)
+    try:
+        return json.loads(candidate), True
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Unparseable model output: {e}") from e
+
+
+def parse_structured(response, schema: Any, task: str, coerce: Optional[Callable[[Any], Any]] = None) -> Any:
+    """Validate a ``response_schema`` response as ``schema`` (a Pydantic model or type).
+
+    Uses the SDK-parsed value when present, otherwise repairs the raw text.
+    ``coerce`` maps a repaired raw value onto the schema (e.g. legacy keys).
+    Counts ``structured.<task>.{parsed,repaired,failed}``.
+    """
+    adapter = TypeAdapter(schema)
+    parsed = getattr(response, "parsed", None)
+    if parsed is not None:
+        try:
+            value = adapter.validate_python(parsed)
+            metrics.incr(f"structured.{task}.parsed")
+            return value
+        except ValidationError:
+            pass
+    try:
+        value, repaired = loads_lenient(response.text or "")
+        if coerce is not None:
+            value = coerce(value)
+        value = adapter.validate_python(value)
+    except (StructuredOutputError, ValidationError, TypeError, ValueError) as e:
+        metrics.incr(f"structured.{task}.failed")
+        logger.error(f"Structured output for {task} failed: {e}")
+        raise StructuredOutputError(str(e)) from e
+    metrics.incr(f"structured.{task}.{'repaired' if repaired else 'parsed'}")
+    return value
@@ -0,0 +1,61 @@
+# benchmarks/background_bench.py
+"""Throughput and CPU time per image of local background removal (rembg).
+
+Run from the repo root (needs rembg + onnxruntime; the first run downloads the model):
+    python -m benchmarks.background_bench --workers 2 --rounds 3
+"""
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.t_shirt.background import BackgroundRemover
+from app.utils.metrics import metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", default="data", help="directory of sample .png/.jpg images")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the sample images")
+    parser.add_argument("--model", default="u2net")
+    args = parser.parse_args()
+
+    if not BackgroundRemover.available():
+        raise SystemExit("rembg is not installed: pip install rembg onnxruntime")
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.images, "*")) if p.lower().endswith((".png", ".jpg", ".jpeg")))
+    images = [open(path, "rb").read() for path in paths]
+    print(f"{len(images)} sample images from {args.images}, {args.workers} workers, model {args.model}\n")
+
+    remover = BackgroundRemover(args.model, args.workers)
+    try:
+        # Warm-up: starts the pool and loads one ONNX session per worker.
+        started = time.perf_counter()
+        remover.remove(images[0])
+        print(f"{'pool start + first image':<28} {(time.perf_counter() - started) * 1000:>10.1f} ms")
+
+        before = metrics.snapshot()
+        batch = images * args.rounds
+        started = time.perf_counter()
+        # One caller thread per worker process keeps every worker busy, like concurrent requests.
+        with ThreadPoolExecutor(max_workers=args.workers) as callers:
+            list(callers.map(remover.remove, batch))
+        elapsed = time.perf_counter() - started
+    finally:
+        remover.shutdown()
+
+    after = metrics.snapshot()
+    count = after.get("background_removal.images", 0) - before.get("background_removal.images", 0)
+    cpu = after.get("background_removal.cpu_seconds", 0) - before.get("background_removal.cpu_seconds", 0)
+    errors = after.get("background_removal.errors", 0) - before.get("background_removal.errors", 0)
+    print(f"{'images':<28} {count:>10.0f}")
+    print(f"{'errors':<28} {errors:>10.0f}")
+    print(f"{'throughput':<28} {count / elapsed:>10.2f} img/s")
+    print(f"{'wall per image':<28} {elapsed / max(count, 1) * 1000:>10.1f} ms")
+    print(f"{'worker CPU per image':<28} {cpu / max(count, 1) * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
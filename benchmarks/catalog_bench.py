@@ -0,0 +1,67 @@
+# benchmarks/catalog_bench.py
+"""Memory footprint and load time of the columnar catalog vs. the raw JSON dict.
+
+Run from the repo root:
+    python -m benchmarks.catalog_bench --products 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tempfile
+import tracemalloc
+
+from app.services.catalog.store import CatalogStore
+from app.services.catalog.snapshot import write_snapshot, load_latest_snapshot
+from benchmarks.common import synthetic_payload
+
+
+def measure(label, build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {elapsed * 1000:>10.1f} ms {current / 2**20:>10.1f} MB {peak / 2**20:>10.1f} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+
+    raw = json.dumps(synthetic_payload(args.products)).encode("utf-8")
+    print(f"benchmark catalog: {args.products} products, {len(raw) / 2**20:.1f} MB JSON\n")
+    print(f"{'stage':<32} {'time':>13} {'retained':>13} {'peak':>13}")
+
+    payload = measure("json.loads (raw dict)", lambda: json.loads(raw))
+    store = measure("CatalogStore.from_payload", lambda: CatalogStore.from_payload(payload))
+    del payload
+    gc.collect()
+
+    # tracemalloc inflates build times; report an untraced build as well.
+    started = time.perf_counter()
+    CatalogStore.from_payload(json.loads(raw))
+    print(f"{'loads + build (untraced)':<32} {(time.perf_counter() - started) * 1000:>10.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        write_snapshot(store, directory)
+        print(f"{'write_snapshot':<32} {(time.perf_counter() - started) * 1000:>10.1f} ms")
+        mapped, _ = measure("load_latest_snapshot (mmap)", lambda: load_latest_snapshot(directory))
+        print("snapshot stats:", mapped.stats())
+        del mapped
+
+    print()
+    print("catalog stats:", store.stats())
+    started = time.perf_counter()
+    for budget in (25, 50, 100, 250, 500):
+        store.price_at_most(budget)
+    print(f"price_at_most x5: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
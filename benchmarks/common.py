@@ -0,0 +1,36 @@
+# benchmarks/common.py
+import random
+from typing import Any, Dict, List
+
+THEMES = ["Superhero", "Princess", "Football", "Dinosaur", "Space", "Pirate", "Unicorn", "Art"]
+KINDS = ["Cape", "Costume", "LEGO Set", "Art Supplies Kit", "Puzzle", "Board Game", "Plush Toy", "Ball"]
+COMPANIES = ["Amazon", "Walmart", "Target", "Etsy", "eBay"]
+CATEGORIES = ["Toys", "Costumes", "Crafts", "Games", "Sports", "Books", "Decorations"]
+AGE_RANGES = ["0-2 years", "3-5 years", "6-8 years", "9-12 years", "8+", "13+ years", "Adults"]
+
+
+def synthetic_items(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Deterministic stand-in for the upstream PRODUCT_API items."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        theme = rng.choice(THEMES)
+        kind = rng.choice(KINDS)
+        items.append({
+            "id": f"prod-{i:06d}",
+            "title": f"{theme} {kind} #{i}",
+            "link": f"https://shop.example.com/products/{theme.lower()}-{i}",
+            "image_url": f"https://cdn.example.com/images/{i}.jpg",
+            "price": round(rng.uniform(2, 400), 2),
+            "avg_rating": round(rng.uniform(1, 5), 1),
+            "total_review": rng.randint(0, 20000),
+            "affiliated_company": rng.choice(COMPANIES),
+            "category": rng.choice(CATEGORIES),
+            "age_range": rng.choice(AGE_RANGES),
+        })
+    return items
+
+
+def synthetic_payload(n: int, seed: int = 7) -> Dict[str, Any]:
+    """Synthetic items wrapped the way PRODUCT_API returns them."""
+    return {"data": {"items": synthetic_items(n, seed)}}
@@ -0,0 +1,69 @@
+# benchmarks/encoding_bench.py
+"""Encode time, output size and quality (PSNR vs. the source pixels) per image encoding.
+
+Run from the repo root:
+    python -m benchmarks.encoding_bench --rounds 3
+    python -m benchmarks.encoding_bench --encodings png webp:75 webp:90 jpeg:85
+"""
+import argparse
+import glob
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from app.utils.encoding import get_encoder
+
+DEFAULT_ENCODINGS = ["png", "png:9", "png-quantized", "webp:85", "webp-lossless", "webp-lossless:50", "jpeg:85"]
+
+
+def psnr(reference: np.ndarray, decoded: np.ndarray) -> float:
+    mse = float(np.mean((reference.astype(np.float64) - decoded.astype(np.float64)) ** 2))
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def flatten(image: Image.Image) -> np.ndarray:
+    """RGB pixels composited onto white, so formats with and without alpha compare fairly."""
+    image = image.convert("RGBA")
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return np.asarray(background)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", default="data", help="directory of sample .png/.jpg images")
+    parser.add_argument("--encodings", nargs="+", default=DEFAULT_ENCODINGS)
+    parser.add_argument("--rounds", type=int, default=3, help="encodes per image (best time is reported)")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.images, "*")) if p.lower().endswith((".png", ".jpg", ".jpeg")))
+    print(f"{'image':<22} {'encoding':<16} {'source KB':>10} {'output KB':>10} {'ratio':>7} {'encode ms':>10} {'PSNR dB':>8}")
+    totals = {}
+    for path in paths:
+        source_size = os.path.getsize(path)
+        image = Image.open(path)
+        image.load()
+        reference = flatten(image)
+        for spec in args.encodings:
+            encoder = get_encoder(spec)
+            best = float("inf")
+            for _ in range(max(1, args.rounds)):
+                started = time.perf_counter()
+                data = encoder.encode(image)
+                best = min(best, time.perf_counter() - started)
+            quality = psnr(reference, flatten(Image.open(BytesIO(data))))
+            size, ms = totals.get(spec, (0, 0.0))
+            totals[spec] = (size + len(data), ms + best * 1000)
+            print(f"{os.path.basename(path):<22} {spec:<16} {source_size / 1024:>10.1f} {len(data) / 1024:>10.1f} "
+                  f"{len(data) / source_size:>7.2f} {best * 1000:>10.1f} {quality:>8.1f}")
+
+    print(f"\n{'encoding':<16} {'total KB':>10} {'total encode ms':>16}")
+    for spec, (size, ms) in totals.items():
+        print(f"{spec:<16} {size / 1024:>10.1f} {ms:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/serialization_bench.py
+"""Serialization CPU time per operation: stdlib ``json`` (before) vs. ``app.utils.serialization`` (after).
+
+Covers the JSON work on the hot paths: decoding the PRODUCT_API payload and hashing
+its items on each catalog sync, encoding catalog slices into prompts, and rendering
+response bodies (a products page and a party plan with gifts).
+
+Run from the repo root:
+    python -m benchmarks.serialization_bench --products 100000
+"""
+import argparse
+import hashlib
+import json
+import time
+
+from starlette.responses import JSONResponse
+
+from app.services.catalog.store import CatalogStore, GIFT_FIELDS, RECOMMENDATION_FIELDS
+from app.utils import serialization
+from app.utils.serialization import FastJSONResponse
+from benchmarks.common import synthetic_payload
+
+
+def cpu_ms(run, rounds: int) -> float:
+    """Best process CPU time of ``rounds`` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(max(1, rounds)):
+        started = time.process_time()
+        run()
+        best = min(best, time.process_time() - started)
+    return best * 1000
+
+
+def party_plan(catalog: CatalogStore, gifts: int) -> dict:
+    """A party response shaped like ``build_party_json`` output."""
+    section = [f"Idea {i}: balloons, banners and a photo corner 🎉" for i in range(8)]
+    return {
+        "🎨 Theme & Decorations": section,
+        "🎉 Fun Activities": section,
+        "🍔 Food & Treats": section,
+        "🛍️ Party Supplies": section,
+        "⏰ Party Timeline": section,
+        "suggested_gifts": catalog.records(range(gifts)),
+        "music_links": [{"title": f"Party song {i}", "url": f"https://youtu.be/{i:011d}"} for i in range(10)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5, help="runs per stage (best CPU time is reported)")
+    args = parser.parse_args()
+
+    payload = synthetic_payload(args.products)
+    raw = json.dumps(payload).encode("utf-8")
+    items = payload["data"]["items"]
+    catalog = CatalogStore.from_payload(payload)
+    prompt_rows = catalog.records(range(min(1000, len(catalog))), RECOMMENDATION_FIELDS)
+    gift_rows = catalog.records(range(min(400, len(catalog))), GIFT_FIELDS)
+    products_page = {"items": catalog.records(range(min(100, len(catalog)))), "total": len(catalog),
+                     "page": 1, "page_size": 100, "pages": -(-len(catalog) // 100), "catalog_version": catalog.version}
+    plan = party_plan(catalog, min(10, len(catalog)))
+
+    stages = [
+        ("catalog decode", lambda: json.loads(raw), lambda: serialization.loads(raw)),
+        ("catalog item hashes", lambda: [hashlib.blake2b(json.dumps(item, sort_keys=True, default=str).encode("utf-8"),
+                                                         digest_size=8).digest() for item in items],
+         lambda: [hashlib.blake2b(serialization.dumps(item, sort_keys=True), digest_size=8).digest() for item in items]),
+        ("recommendation prompt (1000)", lambda: json.dumps(prompt_rows), lambda: serialization.dumps_text(prompt_rows)),
+        ("gift prompt (400)", lambda: json.dumps(gift_rows), lambda: serialization.dumps_text(gift_rows)),
+        ("products page response (100)", lambda: JSONResponse(products_page), lambda: FastJSONResponse(products_page)),
+        ("party plan response", lambda: JSONResponse(plan), lambda: FastJSONResponse(plan)),
+    ]
+
+    print(f"benchmark catalog: {args.products} products, {len(raw) / 2**20:.1f} MB JSON; backend: {serialization.BACKEND}\n")
+    print(f"{'stage':<32} {'stdlib ms':>11} {'fast ms':>11} {'speedup':>8}")
+    for label, before, after in stages:
+        stdlib, fast = cpu_ms(before, args.rounds), cpu_ms(after, args.rounds)
+        print(f"{label:<32} {stdlib:>11.3f} {fast:>11.3f} {stdlib / max(fast, 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
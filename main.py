@@ -1,7 +1,11 @@
-from fastapi import FastAPI
+import asyncio
+import uuid
+from fastapi import FastAPI, Request
 from fastapi_utilities.repeat import repeat_every
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
 import uvicorn as uv
 
 from app.api.v1.endpoints import generate_card
@@ -9,39 +13,127 @@ from app.api.v1.endpoints import t_shirt_endpoint
 from app.api.v1.endpoints import generate_party
 from app.api.v1.endpoints import generate_aiMessage
 from app.api.v1.endpoints import recommendation
-from app.utils.helper import request_product 
-from app.config import PRODUCT_API
+from app.api.v1.endpoints import products
+from app.services.catalog.store import CatalogStore
+from app.services.catalog.sync import CatalogSync
+from app.services.catalog.snapshot import write_snapshot
+from app.services.catalog.leader import CatalogLeadership, SnapshotFollower
+from app.services.catalog.pools import fallback_pools
+from app.services.catalog.filters import age_index
+from app.services.catalog.search import search_index
+from app.services.prompt_cache import prompt_cache
+from app.services.prewarm import Prewarmer, demand
+from app.services.t_shirt.background import background_remover
+from app.services.storage import storage, LocalStorage
+from app.services.admission import admission, Overloaded
+from app.services.model_router import router
+from app.services.idempotency import idempotency, IdempotencyConflict, StoredResponse, fingerprint, MAX_KEY_LENGTH
+from app.utils.logger import get_logger, log_context
+from app.utils.metrics import metrics
+from app.utils.serialization import FastJSONResponse
+from app.config import CATALOG_REFRESH_SECONDS, CATALOG_FOLLOW_SECONDS, PREWARM_ENABLED, PREWARM_INTERVAL_SECONDS, ADMISSION_ENABLED
 
+logger = get_logger(__name__)
 
+catalog_sync = CatalogSync()
+# With several uvicorn workers only the leader talks to PRODUCT_API; the others map
+# the snapshots it publishes.
+leadership = CatalogLeadership()
+follower = SnapshotFollower()
+prewarmer = Prewarmer(demand)
 
 
-@repeat_every(seconds=300, wait_first=False)  # Refresh every hour
+
+
+@repeat_every(seconds=CATALOG_REFRESH_SECONDS, wait_first=False)  # Leader only
 async def refresh_product_data(app : FastAPI):
     
     print("Refreshing product data...")
     try:
-        product = request_product(PRODUCT_API)
-        app.state.product_data = product
-        return product
+        current = getattr(app.state, "catalog", None)
+        # Download/diff and build the patched copy off the event loop, then publish it
+        # in one assignment: requests already running keep the store they started with.
+        changes = await asyncio.to_thread(catalog_sync.fetch, current)
+        catalog = await asyncio.to_thread(catalog_sync.apply, current, changes)
+        app.state.catalog = catalog
+        print("Catalog sync:", catalog_sync.last_result)
+        if changes["kind"] != "unchanged" and len(catalog):
+            # Drop context caches built for the previous catalog version.
+            await asyncio.to_thread(prompt_cache.retain, catalog.version)
+            await asyncio.to_thread(fallback_pools, catalog)
+            await asyncio.to_thread(age_index, catalog)
+            await asyncio.to_thread(search_index, catalog)
+            await asyncio.to_thread(write_snapshot, catalog, meta=catalog_sync.state())
+        return catalog
     except Exception as e:
         print("Error refreshing product data:", e)
-        app.state.product_data = []
+        # Keep serving the last good catalog (or the warm-start snapshot).
+
+@repeat_every(seconds=CATALOG_FOLLOW_SECONDS, wait_first=True)
+async def follow_product_data(app : FastAPI):
+    """Attach to snapshots the leader publishes; take over if the leader is gone."""
+    if leadership.is_leader:
+        return
+    if leadership.try_acquire():
+        print("Promoted to catalog refresh leader.")
+        catalog_sync.restore(follower.meta)
+        await refresh_product_data(app)
+        return
+    try:
+        snapshot = follower.poll()
+        if snapshot is not None:
+            app.state.catalog = snapshot[0]
+            print("Catalog attached from snapshot:", snapshot[0].stats())
+            await asyncio.to_thread(prompt_cache.retain, snapshot[0].version)
+            await asyncio.to_thread(fallback_pools, snapshot[0])
+            await asyncio.to_thread(age_index, snapshot[0])
+            await asyncio.to_thread(search_index, snapshot[0])
+    except Exception as e:
+        print("Error attaching catalog snapshot:", e)
+
+@repeat_every(seconds=PREWARM_INTERVAL_SECONDS, wait_first=True)
+async def prewarm_trending():
+    """Fill plan/YouTube/design caches for trending themes while no request is in flight."""
+    # Leader only, like the catalog refresh: one quota share per deployment, not per worker.
+    if demand.inflight or not leadership.is_leader:
+        return
+    try:
+        await asyncio.to_thread(prewarmer.run_once)
+    except Exception as e:
+        print("Error pre-warming caches:", e)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Application startup...")
+    # Warm start from the last good snapshot so serving never waits on PRODUCT_API.
+    snapshot = follower.poll()
+    if snapshot is not None:
+        app.state.catalog = snapshot[0]
+        print("Catalog restored from snapshot:", snapshot[0].stats())
+    else:
+        app.state.catalog = CatalogStore.empty()
     try:
-        print("First Time Loading Product.....")
-        await refresh_product_data(app)
-        print("Product loaded successfully.")
+        if leadership.try_acquire():
+            print("Starting background product refresh.....")
+            catalog_sync.restore(follower.meta)
+            await refresh_product_data(app)
+        else:
+            print("Following the catalog refresh leader.....")
+        await follow_product_data(app)
     except Exception as e:
-        print("Error loading product:", e)
+        print("Error starting product refresh:", e)
+    if PREWARM_ENABLED:
+        await prewarm_trending()
     
     print("Startup complete.")
     yield
+    leadership.release()
+    if background_remover is not None:
+        background_remover.shutdown()
+    storage.shutdown()
     
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -50,10 +142,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class AdmissionControl:
+    """Pure ASGI middleware: each admitted request holds its slot until the last body
+    chunk is sent, so streamed responses count for as long as they run.
+
+    Shed requests never reach the endpoints or count as live traffic.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        priority = None
+        if scope["type"] == "http" and ADMISSION_ENABLED:
+            priority = admission.classify(scope["method"], scope["path"])
+        if priority is None:
+            return await self.app(scope, receive, send)
+        try:
+            async with admission.admit(priority):
+                return await self.app(scope, receive, send)
+        except Overloaded as e:
+            logger.warning(f"Shed {scope['path']}: {e}")
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please retry later", "priority": e.priority},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        await response(scope, receive, send)
+
+
+# Middleware registered later runs further out. From the inside out: CORS, pre-warm
+# demand tracking, admission control, idempotency, request log context.
+@app.middleware("http")
+async def track_inflight(request: Request, call_next):
+    # Pre-warming yields to live traffic; reads and docs do not count.
+    if request.method != "POST":
+        return await call_next(request)
+    with demand.busy():
+        return await call_next(request)
+
+app.add_middleware(AdmissionControl)
+
+@app.middleware("http")
+async def idempotency_key(request: Request, call_next):
+    # Outside admission control: retries attached to a running request take no slot.
+    key = request.headers.get("Idempotency-Key")
+    if not key or not idempotency.applies(request.method, request.url.path):
+        return await call_next(request)
+    if len(key) > MAX_KEY_LENGTH:
+        return JSONResponse(status_code=400, content={"detail": f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters"})
+
+    request_fingerprint = fingerprint(request.method, request.url.path, request.url.query, await request.body())
+
+    async def run() -> StoredResponse:
+        response = await call_next(request)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        return StoredResponse(response.status_code, list(response.headers.raw), body, request_fingerprint)
+
+    try:
+        stored, replayed = await idempotency.execute(f"{request.url.path} {key}", request_fingerprint, run)
+    except IdempotencyConflict:
+        return JSONResponse(status_code=422, content={"detail": "Idempotency-Key was already used for a different request"})
+    response = Response(content=stored.body, status_code=stored.status_code)
+    response.raw_headers = stored.headers + ([(b"idempotent-replayed", b"true")] if replayed else [])
+    return response
+
+@app.middleware("http")
+async def request_log_context(request: Request, call_next):
+    # Outermost, so every log record written while serving the request (including
+    # shed and idempotency logs) carries its id and path.
+    with log_context(request_id=uuid.uuid4().hex[:12], path=request.url.path):
+        return await call_next(request)
+
+# Local storage backend: serve uploaded assets from this app.
+if isinstance(storage, LocalStorage) and storage.public_url.startswith("/"):
+    app.mount(storage.public_url, StaticFiles(directory=storage.root), name="assets")
+
 app.include_router(generate_aiMessage.router)
 app.include_router(generate_card.router)
 app.include_router(t_shirt_endpoint.router)
 app.include_router(recommendation.router)
+app.include_router(products.router)
 
 
 app.include_router(generate_party.router)
@@ -62,6 +231,10 @@ app.include_router(generate_party.router)
 def read_root():    
     return {"message": "Welcome to the Party Planner API! Visit /docs for API documentation."}
 
+@app.get("/metrics")
+def read_metrics():
+    return {**metrics.snapshot(), **router.gauges()}
+
 
 if __name__ == "__main__":
     import uvicorn as uv